@@ -1,3 +1,48 @@
-from .main import ColorPrinter, print
+# 公開する属性と、その属性を定義するモジュール（モジュールは属性の初回参照時に読み込まれる）
+_EXPORTS = {
+    'ColorPrinter': 'main',
+    'ColorTemplate': 'main',
+    'print': 'main',
+    'get_default_printer': 'main',
+    'set_default_printer': 'main',
+    'AsyncColorPrinter': 'aio',
+    'Backend': 'backends',
+    'BytesBackend': 'backends',
+    'FdBackend': 'backends',
+    'HtmlBackend': 'backends',
+    'NullBackend': 'backends',
+    'ColorFormatter': 'log',
+    'ColorHandler': 'log',
+    'ColorQueueHandler': 'log',
+    'LiveRegion': 'live',
+    'ProcessWriter': 'process',
+    'RenderStats': 'stats',
+    'StyleState': 'style',
+    'Table': 'table',
+    'strip_markup': 'lexer',
+    'ansi_spans': 'ansi',
+    'ansi_to_markup': 'ansi',
+    'strip_ansi': 'ansi',
+    'visible_len': 'ansi',
+    'truncate_visible': 'ansi',
+    'output_lock': 'writers',
+}
 
-__all__ = ['ColorPrinter', 'print']
\ No newline at end of file
+__all__ = ['ColorPrinter', 'ColorTemplate', 'AsyncColorPrinter', 'Backend', 'BytesBackend', 'FdBackend', 'HtmlBackend', 'NullBackend', 'ColorFormatter', 'ColorHandler', 'ColorQueueHandler', 'LiveRegion', 'ProcessWriter', 'RenderStats', 'StyleState', 'Table', 'print', 'get_default_printer', 'set_default_printer', 'strip_markup', 'ansi_spans', 'ansi_to_markup', 'strip_ansi', 'visible_len', 'truncate_visible', 'output_lock']
+
+
+def __getattr__(name):
+    """
+    公開する属性を、初回参照時に定義元のモジュールから読み込む。
+    読み込んだ属性はパッケージに保存されるため、2回目以降の参照でこの関数は呼び出されない。
+    """
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(__import__(module, globals(), None, [name], 1), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
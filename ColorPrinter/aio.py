@@ -0,0 +1,102 @@
+import asyncio
+
+from .main import ColorPrinter
+from .palette import TRUECOLOR
+from .writers import BackgroundWriter
+
+
+class _WriterFile:
+    """
+    AsyncColorPrinterのStreamWriterを、テキストのファイルオブジェクトとして扱うためのラッパー。
+    書き込みは送信バッファへの追加のみで、イベントループをブロックしない。
+    """
+
+    __slots__ = ("printer",)
+
+    def __init__(self, printer):
+        self.printer = printer
+
+    def write(self, data: str) -> int:
+        printer = self.printer
+        printer.writer.write(data.encode(printer.encoding))
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class AsyncColorPrinter(ColorPrinter):
+    """
+    asyncioのStreamWriterへ色付きのテキストを出力するクラス。
+    ColorPrinterのメソッド（print_with_color、print_many、stream、表や表示領域など）はそのまま使用でき、
+    出力先を省略した出力はStreamWriterの送信バッファへ書き込まれる。書き込みはイベントループをブロックしない。
+    送信バッファが空くまで待機する場合は、コルーチンのaprint、aprint_manyを使う。
+    StreamWriterはイベントループのスレッドでのみ使用できるため、このクラスのメソッドもイベントループのスレッドから呼び出す。
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, encoding: str = "utf-8", color_depth: str = TRUECOLOR):
+        """
+        AsyncColorPrinterクラスの初期化メソッド。
+
+        Args:
+            writer (asyncio.StreamWriter): 出力先のStreamWriter。
+            encoding (str): 出力時に使用する文字コード。
+            color_depth (str): 出力する色の深さ。出力先は端末とは限らないため、既定では24bitカラーとなる。
+        """
+        super().__init__(color_depth)
+        self.writer: asyncio.StreamWriter = writer
+        self.encoding: str = encoding
+        self._file = _WriterFile(self)
+
+    def _output(self, file, data: str, flush: bool = False, runs: tuple = None):
+        # 出力先を省略した出力は、sys.stdoutではなくStreamWriterへ書き込む（バックエンドがある場合はバックエンドへ出力する）
+        if file is None and self.backends is None:
+            file = self._file
+        super()._output(file, data, flush, runs)
+
+    def _emit(self, file, data: str, flush: bool = False):
+        # StreamWriterはイベントループのスレッドからのみ使用されるため、スレッド間のロック（write_to）を介さずに書き込む
+        if file is self._file:
+            if data:
+                self.writer.write(data.encode(self.encoding))
+            return
+        super()._emit(file, data, flush)
+
+    def start_background(self, maxsize: int = 10000, overflow: str = BackgroundWriter.BLOCK):
+        """
+        StreamWriterは他のスレッドから書き込めないため、バックグラウンド出力は使用できない。
+
+        Raises:
+            RuntimeError: 常に送出される。
+        """
+        raise RuntimeError("AsyncColorPrinter does not support background output; StreamWriter.write does not block")
+
+    async def aprint(self, text, *args, sep: str = " ", end: str = "\n", drain: bool = True):
+        """
+        テキスト内のタグを解析して、色付きでStreamWriterへ出力する。
+        メッセージは1回のwriteで書き込まれるため、複数のタスクから呼び出しても出力が混ざらない。
+
+        Args:
+            text (str | ColorTemplate): 色付きで表示するテキスト、またはコンパイル済みのテンプレート。
+            *args: テキストの後に続けて表示する値。
+            sep (str): 値の区切り文字。Noneの場合は空白。
+            end (str): 末尾に追加する文字列。Noneの場合は改行。
+            drain (bool): Trueの場合、書き込み後に送信バッファが空くまで待機する。
+        """
+        self.print_with_color(text, *args, sep=sep, end=end)
+        if drain:
+            await self.writer.drain()
+
+    async def aprint_many(self, templates, values, end: str = "\n", drain: bool = True):
+        """
+        多数のメッセージをまとめて描画し、1回のwriteでStreamWriterへ出力する。
+
+        Args:
+            templates (str | Iterable[str]): すべての行に共通のテンプレート、またはvaluesと同じ長さのテンプレートのイテラブル。
+            values (Iterable): 各行のテンプレートに埋め込む値（タプル、辞書、または単一の値）のイテラブル。
+            end (str): 各行の末尾に追加する文字列。
+            drain (bool): Trueの場合、書き込み後に送信バッファが空くまで待機する。
+        """
+        self.print_many(templates, values, end)
+        if drain:
+            await self.writer.drain()
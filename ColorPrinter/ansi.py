@@ -0,0 +1,306 @@
+import functools
+import itertools
+
+from .lexer import LazyPattern
+from .palette import ANSI16_PALETTE, palette_rgb
+from .style import DEFAULT_STYLE
+from .table import char_width, display_width
+
+# エスケープシーケンス（CSI、OSC、その他の2文字のシーケンス）を検出する正規表現
+# CSIの場合、グループ1はパラメータ、グループ2は終端の文字となる
+_ESCAPE_RE = LazyPattern(
+    globals(), "_ESCAPE_RE",
+    r'\x1b(?:\[([0-?]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)?|[@-Z\\-_])',
+)
+
+
+def _extended_color(args: list) -> tuple:
+    """
+    38、48に続くパラメータ（5;n または 2;r;g;b）から色を求める。
+
+    Args:
+        args (list): 38、48の後のパラメータの文字列のリスト。
+
+    Returns:
+        tuple: (RGBA値, 使用したパラメータの数)。解釈できない場合の色はNone。
+    """
+    if not args:
+        return None, 0
+    try:
+        if args[0] == "5" and len(args) >= 2:
+            return palette_rgb(min(255, int(args[1]))) + (1,), 2
+        if args[0] == "2" and len(args) >= 4:
+            r, g, b = (min(255, int(value or 0)) for value in args[1:4])
+            return (r, g, b, 1), 4
+    except ValueError:
+        pass
+    return None, len(args)
+
+
+@functools.lru_cache(maxsize=4096)
+def apply_sgr(style: tuple, params: str) -> tuple:
+    """
+    SGRシーケンス（\\033[...m）のパラメータをスタイルに適用する。
+    スタイルとパラメータの組ごとに結果がキャッシュされるため、同じ遷移は1回だけ計算される。
+
+    Args:
+        style (tuple): 適用前のスタイル（DEFAULT_STYLEと同じ形式）。
+        params (str): シーケンスのパラメータ（例："1;38;2;255;0;0"）。
+
+    Returns:
+        tuple: 適用後のスタイル。太字、斜字、下線、前景色、背景色以外の指定は無視される。
+    """
+    fore, back, bold, italic, underline = style
+    groups = params.split(";")
+    index = 0
+    while index < len(groups):
+        parts = groups[index].split(":")
+        index += 1
+        code = int(parts[0]) if parts[0].isdigit() else 0
+        if code == 0:
+            fore = back = None
+            bold = italic = underline = False
+        elif code == 1:
+            bold = True
+        elif code == 22:
+            bold = False
+        elif code == 3:
+            italic = True
+        elif code == 23:
+            italic = False
+        elif code == 4:
+            # 4:0 は下線の解除、4:1~4:5 は下線の種類の指定
+            underline = not (len(parts) > 1 and parts[1] == "0")
+        elif code == 24:
+            underline = False
+        elif 30 <= code <= 37:
+            fore = ANSI16_PALETTE[code - 30] + (1,)
+        elif 90 <= code <= 97:
+            fore = ANSI16_PALETTE[code - 82] + (1,)
+        elif code == 39:
+            fore = None
+        elif 40 <= code <= 47:
+            back = ANSI16_PALETTE[code - 40] + (1,)
+        elif 100 <= code <= 107:
+            back = ANSI16_PALETTE[code - 92] + (1,)
+        elif code == 49:
+            back = None
+        elif code == 38 or code == 48:
+            if len(parts) > 1:
+                # コロン区切りの形式（38:2::r:g:b では色空間の指定を読み飛ばす）
+                args = parts[1:]
+                if args[0] == "2" and len(args) >= 5:
+                    args = [args[0], *args[2:5]]
+                color, used = _extended_color(args)
+            else:
+                color, used = _extended_color(groups[index:index + 4])
+                index += used
+            if color is not None:
+                if code == 38:
+                    fore = color
+                else:
+                    back = color
+    return (fore, back, bold, italic, underline)
+
+
+def ansi_spans(text: str, controls: bool = False) -> list:
+    """
+    エスケープシーケンスを含む文字列を、スタイルと文字列の組のリストに変換する。
+    スタイルはColorPrinter.style_state()と同じ形式で、ColorPrinter.style_runs()の結果と比較できる。
+    SGR以外のエスケープシーケンスは、controlsがFalseの場合は取り除かれる。
+
+    Args:
+        text (str): 変換する文字列。
+        controls (bool): Trueの場合、SGR以外のエスケープシーケンス（カーソル移動など）を、
+            スタイルをNoneとした (None, エスケープシーケンス) の組として出現位置に残す。
+
+    Returns:
+        list: (スタイル, 文字列) のタプルのリスト。同じスタイルが続く部分は1つにまとめられる。
+    """
+    if "\x1b" not in text:
+        return [(DEFAULT_STYLE, text)] if text else []
+
+    spans = []
+    pieces = []         # span_styleで表示される、まだspansに追加していない文字列
+    span_style = style = DEFAULT_STYLE
+    position = 0
+    for match in _ESCAPE_RE.finditer(text):
+        start = match.start()
+        if start > position:
+            if style != span_style:
+                if pieces:
+                    spans.append((span_style, "".join(pieces)))
+                    pieces = []
+                span_style = style
+            pieces.append(text[position:start])
+        position = match.end()
+        params, final = match.groups()
+        if final == "m" and params[:1] not in ("<", "=", ">", "?"):
+            style = apply_sgr(style, params)
+        elif controls:
+            if pieces:
+                spans.append((span_style, "".join(pieces)))
+                pieces = []
+            spans.append((None, match.group()))
+
+    if position < len(text):
+        if style != span_style:
+            if pieces:
+                spans.append((span_style, "".join(pieces)))
+                pieces = []
+            span_style = style
+        pieces.append(text[position:])
+    if pieces:
+        spans.append((span_style, "".join(pieces)))
+    return spans
+
+
+def _color_markup(color: tuple, names: dict) -> str:
+    name = names.get(color)
+    return name if name is not None else "rgba(%d, %d, %d, 1)" % color[:3]
+
+
+def _markup_transition(current: tuple, target: tuple, names: dict) -> str:
+    """
+    スタイルをcurrentからtargetへ変更するタグを生成する。
+    解除されるスタイルがある場合は{end all}ですべてを解除してから、targetのスタイルを適用し直す。
+    """
+    prefix = ""
+    if any(value and not target[index] for index, value in enumerate(current)):
+        if target == DEFAULT_STYLE:
+            return "{end all}"
+        prefix = "{end all}"
+        current = DEFAULT_STYLE
+
+    fore, back, bold, italic, underline = target
+    items = []
+    if fore is not None and fore != current[0]:
+        items.append("fore:" + _color_markup(fore, names))
+    if back is not None and back != current[1]:
+        items.append("back:" + _color_markup(back, names))
+    if bold and not current[2]:
+        items.append("bold")
+    if italic and not current[3]:
+        items.append("italic")
+    if underline and not current[4]:
+        items.append("underline")
+    return prefix + ("{%s}" % ", ".join(items) if items else "")
+
+
+def ansi_to_markup(text: str, names: dict = None) -> str:
+    """
+    エスケープシーケンスを含む文字列を、ColorPrinterのマークアップ文字列に変換する。
+    文字列中の波カッコはエスケープされ、SGR以外のエスケープシーケンスは取り除かれる。
+
+    Args:
+        text (str): 変換する文字列。
+        names (dict): 色名とRGBA値の辞書。一致する色は色名で、それ以外はrgba形式で記述される。Noneの場合はColorPrinter.COLOR_MAP。
+
+    Returns:
+        str: マークアップ文字列。
+    """
+    if names is None:
+        from .main import ColorPrinter
+        names = ColorPrinter.COLOR_MAP
+    reverse = {}
+    for name, color in names.items():
+        if len(color) < 4 or color[3] == 1:
+            reverse.setdefault(tuple(color[:3]) + (1,), name)
+
+    parts = []
+    transitions = {}
+    current = DEFAULT_STYLE
+    for style, value in ansi_spans(text):
+        if style != current:
+            key = (current, style)
+            tag = transitions.get(key)
+            if tag is None:
+                tag = transitions[key] = _markup_transition(current, style, reverse)
+            parts.append(tag)
+            current = style
+        if "{" in value or "}" in value:
+            value = value.replace("{", "{{").replace("}", "}}")
+        parts.append(value)
+    return "".join(parts)
+
+
+def strip_ansi(text: str) -> str:
+    """
+    文字列からエスケープシーケンスを取り除く。
+
+    Args:
+        text (str): エスケープシーケンスを含む文字列。
+
+    Returns:
+        str: エスケープシーケンスを取り除いた文字列。
+    """
+    if "\x1b" not in text:
+        return text
+    return _ESCAPE_RE.sub("", text)
+
+
+def visible_len(text: str) -> int:
+    """
+    エスケープシーケンスを含む文字列の、端末上での表示幅を求める。全角文字は2桁として数える。
+
+    Args:
+        text (str): 表示幅を求める文字列。
+
+    Returns:
+        int: 表示幅（桁数）。
+    """
+    return display_width(strip_ansi(text))
+
+
+def truncate_visible(text: str, width: int, placeholder: str = "") -> str:
+    """
+    エスケープシーケンスを含む文字列を、表示幅がwidth以下となるように切り詰める。
+    エスケープシーケンスは途中で分割されず、切り詰めた位置でスタイルが残っている場合は末尾でリセットする。
+    表示幅がwidth以下の場合は、元の文字列をそのまま返す。
+
+    Args:
+        text (str): 切り詰める文字列。
+        width (int): 表示幅の上限。
+        placeholder (str): 切り詰めた場合に末尾に追加する文字列（例："…"）。表示幅はwidthに含まれる。
+
+    Returns:
+        str: 切り詰めた文字列。
+    """
+    # 末尾に追加する文字列が収まらない場合は追加しない
+    if display_width(placeholder) > width:
+        placeholder = ""
+    limit = max(0, width - display_width(placeholder))
+    used = 0
+    style = DEFAULT_STYLE
+    cut = None          # 切り詰める場合の、文字列の位置とその位置のスタイル
+    position = 0
+    matches = _ESCAPE_RE.finditer(text) if "\x1b" in text else ()
+    for match in itertools.chain(matches, (None,)):
+        end = len(text) if match is None else match.start()
+        segment = text[position:end]
+        if segment:
+            if segment.isascii():
+                if cut is None and used + len(segment) > limit:
+                    cut = (position + limit - used, style)
+                used += len(segment)
+            else:
+                for offset, char in enumerate(segment):
+                    size = char_width(char)
+                    if cut is None and used + size > limit:
+                        cut = (position + offset, style)
+                    used += size
+                    if used > width:
+                        break
+            if used > width:
+                break
+        if match is None:
+            break
+        position = match.end()
+        params, final = match.groups()
+        if final == "m" and params[:1] not in ("<", "=", ">", "?"):
+            style = apply_sgr(style, params)
+
+    if used <= width:
+        return text
+    index, style = cut
+    return text[:index] + placeholder + ("\033[0m" if style != DEFAULT_STYLE else "")
@@ -0,0 +1,389 @@
+import abc
+import html
+import io
+import os
+
+from .palette import TRUECOLOR, detect_color_depth
+from .style import DEFAULT_STYLE
+from .writers import output_lock
+
+
+class Backend(abc.ABC):
+    """
+    ColorPrinter.add_backendで追加する、出力先のバックエンドの基底クラス。
+    バックエンドは描画済みの文字列ではなく、スタイルと文字列の組（ColorTemplate.runs、style_runs()と同じ形式）を受け取る。
+    print_with_colorではコンパイル時にテンプレートに保存された組がそのまま渡されるため、
+    バックエンドの数が増えてもマークアップは再解析されない。
+    それ以外の出力（print_many、stream、表、表示領域など）は、描画済みの文字列をansi_spansで変換した組が渡される。
+    カーソル移動などのSGR以外のエスケープシーケンスは、スタイルがNoneの組として渡される。
+    """
+
+    @abc.abstractmethod
+    def write_runs(self, runs, flush: bool = False):
+        """
+        スタイルと文字列の組を出力する。
+
+        Args:
+            runs (Iterable[tuple]): (スタイル, 文字列) のタプル。スタイルはColorPrinter.style_state()と同じ形式、
+                またはSGR以外のエスケープシーケンスの場合はNone。
+            flush (bool): Trueの場合、出力後に出力先をフラッシュする。
+        """
+
+    def flush(self):
+        """
+        出力先をフラッシュする。
+        """
+
+    def close(self):
+        """
+        バックエンドを閉じる。既定ではフラッシュのみを行う。
+        """
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class BackendGroup(list):
+    """
+    ColorPrinterに追加されたバックエンドのリスト。
+    ファイルオブジェクトと同じwriteとflushを持ち、バッチ出力やバックグラウンド出力では1つの出力先として扱われる。
+    """
+
+    def write(self, runs) -> int:
+        """
+        スタイルと文字列の組を、すべてのバックエンドへ出力する。
+
+        Args:
+            runs (tuple): (スタイル, 文字列) のタプル。
+
+        Returns:
+            int: 組の数。
+        """
+        for backend in self:
+            backend.write_runs(runs)
+        return len(runs)
+
+    def flush(self):
+        """
+        すべてのバックエンドをフラッシュする。
+        """
+        for backend in self:
+            backend.flush()
+
+
+class EncodingBackend(Backend):
+    """
+    スタイルと文字列の組を、エスケープシーケンスを含むバイト列に変換するバックエンドの基底クラス。
+    スタイルの遷移ごとのエスケープシーケンスは、エンコード済みのバイト列としてキャッシュされる。
+    """
+
+    # エンコード済みのエスケープシーケンスをキャッシュする遷移の最大数（超えた場合はキャッシュを空にする）
+    ESCAPE_CACHE_SIZE: int = 4096
+
+    def __init__(self, color_depth: str = TRUECOLOR, encoding: str = "utf-8", errors: str = "strict"):
+        """
+        EncodingBackendクラスの初期化メソッド。
+
+        Args:
+            color_depth (str): エスケープシーケンスの色の深さ。
+            encoding (str): 文字列のエンコーディング。
+            errors (str): エンコードできない文字の扱い（str.encodeのerrorsと同じ）。
+        """
+        from .main import ColorPrinter
+        self._printer = ColorPrinter(color_depth=color_depth)
+        self.encoding: str = encoding
+        self.errors: str = errors
+        self._escapes: dict = {}
+
+    @property
+    def color_depth(self) -> str:
+        return self._printer.color_depth
+
+    def escape(self, current: tuple, target: tuple) -> bytes:
+        """
+        スタイルをcurrentからtargetへ変更するエスケープシーケンスを、エンコード済みのバイト列で取得する。
+
+        Args:
+            current (tuple): 適用済みのスタイル。
+            target (tuple): 適用したいスタイル。
+
+        Returns:
+            bytes: エスケープシーケンス。変更がない場合は空のバイト列。
+        """
+        key = (current, target)
+        escape = self._escapes.get(key)
+        if escape is None:
+            escape = self._printer.sgr_transition(current, target).encode("ascii")
+            if len(self._escapes) >= self.ESCAPE_CACHE_SIZE:
+                self._escapes.clear()
+            self._escapes[key] = escape
+        return escape
+
+    def encode_runs(self, runs) -> bytes:
+        """
+        スタイルと文字列の組をバイト列に変換する。末尾でスタイルが残っている場合はリセットする。
+
+        Args:
+            runs (Iterable[tuple]): (スタイル, 文字列) のタプル。
+
+        Returns:
+            bytes: エスケープシーケンスを含むバイト列。
+        """
+        parts = []
+        append = parts.append
+        escapes = self._escapes
+        encoding, errors = self.encoding, self.errors
+        current = DEFAULT_STYLE
+        for style, text in runs:
+            if style is None:
+                # カーソル移動などのエスケープシーケンスは、そのまま出力する
+                append(text.encode("ascii", "replace"))
+                continue
+            if style != current:
+                escape = escapes.get((current, style))
+                append(escape if escape is not None else self.escape(current, style))
+                current = style
+            append(text.encode(encoding, errors))
+        if current != DEFAULT_STYLE:
+            append(self.escape(current, DEFAULT_STYLE))
+        return b"".join(parts)
+
+
+class FdBackend(EncodingBackend):
+    """
+    ファイルディスクリプタへ、エンコード済みのバイト列をos.writeで直接書き込むバックエンド。
+    テキストのストリーム（sys.stdoutなど）のバッファを経由しないため、
+    同じファイルディスクリプタへsys.stdoutからも書き込む場合は、事前にsys.stdoutをフラッシュする必要がある。
+    """
+
+    def __init__(self, fd=1, color_depth: str = None, encoding: str = "utf-8", errors: str = "strict"):
+        """
+        FdBackendクラスの初期化メソッド。
+
+        Args:
+            fd (int): 書き込み先のファイルディスクリプタ、またはfileno()を持つファイルオブジェクト。
+            color_depth (str): エスケープシーケンスの色の深さ。Noneの場合は環境変数と書き込み先の端末から判定する。
+            encoding (str): 文字列のエンコーディング。
+            errors (str): エンコードできない文字の扱い（str.encodeのerrorsと同じ）。
+        """
+        if not isinstance(fd, int):
+            fd = fd.fileno()
+        if color_depth is None:
+            color_depth = detect_color_depth(fd)
+        super().__init__(color_depth, encoding, errors)
+        self.fd: int = fd
+
+    def write_runs(self, runs, flush: bool = False):
+        data = memoryview(self.encode_runs(runs))
+        # 書き込みはスレッド間で排他され、一部のみが書き込まれた場合は残りを続けて書き込む
+        with output_lock():
+            while data:
+                data = data[os.write(self.fd, data):]
+
+
+class BytesBackend(EncodingBackend):
+    """
+    エンコード済みのバイト列を、メモリ上のバッファまたはバイナリの出力先へ書き込むバックエンド。
+    出力先を指定しない場合はbytearrayに蓄積され、view()でコピーせずにmemoryviewとして参照できる。
+    """
+
+    def __init__(self, target=None, color_depth: str = TRUECOLOR, encoding: str = "utf-8", errors: str = "strict"):
+        """
+        BytesBackendクラスの初期化メソッド。
+
+        Args:
+            target: バイト列を書き込む出力先（io.BytesIOなど、writeを持つオブジェクト）。Noneの場合は内部のbytearrayに蓄積する。
+            color_depth (str): エスケープシーケンスの色の深さ。
+            encoding (str): 文字列のエンコーディング。
+            errors (str): エンコードできない文字の扱い（str.encodeのerrorsと同じ）。
+        """
+        super().__init__(color_depth, encoding, errors)
+        self.target = target
+        self.buffer: bytearray = bytearray()
+
+    def write_runs(self, runs, flush: bool = False):
+        data = self.encode_runs(runs)
+        target = self.target
+        if target is None:
+            self.buffer += data
+        else:
+            target.write(data)
+            if flush:
+                self.flush()
+
+    def flush(self):
+        flush = getattr(self.target, "flush", None)
+        if flush is not None:
+            flush()
+
+    def getvalue(self) -> bytes:
+        """
+        内部のバッファに蓄積されたバイト列を取得する。
+
+        Returns:
+            bytes: 蓄積されたバイト列のコピー。
+        """
+        return bytes(self.buffer)
+
+    def view(self) -> memoryview:
+        """
+        内部のバッファを、コピーせずにmemoryviewとして取得する。
+        memoryviewを解放するまでは、バッファへの書き込みとclear()はBufferErrorとなる。
+
+        Returns:
+            memoryview: 内部のバッファのmemoryview。
+        """
+        return memoryview(self.buffer)
+
+    def clear(self):
+        """
+        内部のバッファを空にする。
+        """
+        del self.buffer[:]
+
+
+class HtmlBackend(Backend):
+    """
+    スタイルと文字列の組を、インラインのCSSを指定したspan要素のHTMLに変換するバックエンド。
+    スタイルごとの開始タグはキャッシュされ、文字列はHTMLエスケープされる。
+    """
+
+    # 開始タグをキャッシュするスタイルの最大数（超えた場合はキャッシュを空にする）
+    TAG_CACHE_SIZE: int = 4096
+
+    def __init__(self, file=None):
+        """
+        HtmlBackendクラスの初期化メソッド。
+
+        Args:
+            file: HTMLを書き込むテキストの出力先。Noneの場合は内部のバッファに蓄積し、getvalue()で取得できる。
+        """
+        self.file = file if file is not None else io.StringIO()
+        self._tags: dict = {}
+
+    @staticmethod
+    def css_color(color: tuple) -> str:
+        """
+        RGBA値をCSSの色に変換する。
+
+        Args:
+            color (tuple): RGBA値。
+
+        Returns:
+            str: "#rrggbb"、または透明度が1でない場合は"rgba(r, g, b, a)"。
+        """
+        if len(color) < 4 or color[3] == 1:
+            return "#%02x%02x%02x" % tuple(color[:3])
+        return "rgba(%d, %d, %d, %g)" % tuple(color[:4])
+
+    def open_tag(self, style: tuple) -> str:
+        """
+        スタイルに対応するspan要素の開始タグを取得する。
+
+        Args:
+            style (tuple): ColorPrinter.style_state()と同じ形式のスタイル。
+
+        Returns:
+            str: 開始タグ。
+        """
+        tag = self._tags.get(style)
+        if tag is None:
+            fore, back, bold, italic, underline = style
+            rules = []
+            if fore is not None:
+                rules.append("color:" + self.css_color(fore))
+            if back is not None:
+                rules.append("background-color:" + self.css_color(back))
+            if bold:
+                rules.append("font-weight:bold")
+            if italic:
+                rules.append("font-style:italic")
+            if underline:
+                rules.append("text-decoration:underline")
+            tag = '<span style="%s">' % ";".join(rules)
+            if len(self._tags) >= self.TAG_CACHE_SIZE:
+                self._tags.clear()
+            self._tags[style] = tag
+        return tag
+
+    def render_runs(self, runs) -> str:
+        """
+        スタイルと文字列の組をHTMLに変換する。同じスタイルが続く部分は1つのspan要素にまとめられる。
+
+        Args:
+            runs (Iterable[tuple]): (スタイル, 文字列) のタプル。
+
+        Returns:
+            str: HTMLの断片。
+        """
+        parts = []
+        append = parts.append
+        tags = self._tags
+        escape = html.escape
+        current = DEFAULT_STYLE
+        for style, text in runs:
+            # 空の文字列と、HTMLでは意味を持たないカーソル移動などのエスケープシーケンスは出力しない
+            if not text or style is None:
+                continue
+            if style != current:
+                if current != DEFAULT_STYLE:
+                    append("</span>")
+                if style != DEFAULT_STYLE:
+                    tag = tags.get(style)
+                    append(tag if tag is not None else self.open_tag(style))
+                current = style
+            append(escape(text, False))
+        if current != DEFAULT_STYLE:
+            append("</span>")
+        return "".join(parts)
+
+    def write_runs(self, runs, flush: bool = False):
+        self.file.write(self.render_runs(runs))
+        if flush:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+
+    def getvalue(self) -> str:
+        """
+        内部のバッファに蓄積されたHTMLを取得する。出力先を指定した場合は使用できない。
+
+        Returns:
+            str: 蓄積されたHTMLの断片。
+        """
+        return self.file.getvalue()
+
+    def document(self, title: str = "") -> str:
+        """
+        内部のバッファに蓄積されたHTMLを、pre要素で囲んだHTML文書として取得する。
+
+        Args:
+            title (str): 文書のタイトル。
+
+        Returns:
+            str: HTML文書。
+        """
+        return (
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>%s</title>\n</head>\n'
+            '<body>\n<pre>%s</pre>\n</body>\n</html>\n' % (html.escape(title), self.getvalue())
+        )
+
+
+class NullBackend(Backend):
+    """
+    出力を破棄し、受け取ったメッセージの数と文字数のみを数えるバックエンド。
+    出力先への書き込みを除いた、解析と出力の準備にかかる時間を計測するベンチマークに使用する。
+    """
+
+    def __init__(self):
+        self.messages: int = 0
+        self.characters: int = 0
+
+    def write_runs(self, runs, flush: bool = False):
+        self.messages += 1
+        self.characters += sum([len(text) for style, text in runs if style is not None])
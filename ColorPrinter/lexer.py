@@ -0,0 +1,213 @@
+import functools
+
+# トークンの種類
+TEXT = "text"        # 通常の文字列
+OPEN = "open"        # スタイルを適用するタグ（例：{fore:red, bold}）
+END = "end"          # endを含むタグ（例：{end}、{end fore}）
+ESCAPE = "escape"    # エスケープされた波カッコ（{{ または }}）
+GRADIENT = "gradient"  # グラデーションを含むタグ（例：{gradient:red, blue}）
+
+
+class LazyPattern:
+    """
+    最初に使用された時にコンパイルされる正規表現。
+    コンパイル後はモジュールの変数をコンパイル済みの正規表現に置き換えるため、以降の使用に余分な処理は発生しない。
+    reモジュールの読み込みも最初の使用時まで遅延される。
+    """
+
+    def __init__(self, namespace: dict, name: str, pattern: str):
+        """
+        LazyPatternクラスの初期化メソッド。
+
+        Args:
+            namespace (dict): 変数を置き換えるモジュールのglobals()。
+            name (str): この正規表現を保持する変数名。
+            pattern (str): 正規表現のパターン。フラグはパターン内に記述する（例：(?s)）。
+        """
+        self.namespace = namespace
+        self.name = name
+        self.pattern = pattern
+
+    def __getattr__(self, attribute: str):
+        import re
+        compiled = re.compile(self.pattern)
+        self.namespace[self.name] = compiled
+        return getattr(compiled, attribute)
+
+
+# 1回の走査で、エスケープされた波カッコとタグを検出する正規表現
+_TOKEN_RE = LazyPattern(globals(), "_TOKEN_RE", r'\{\{|\}\}|\{([^{}]*)\}')
+
+# タグとエスケープされた波カッコで文字列を分割するための正規表現（区切りもsplitの結果に含める）
+_SPLIT_RE = LazyPattern(globals(), "_SPLIT_RE", r'(\{\{|\}\}|\{[^{}]*\})')
+
+# タグを取り除くための正規表現（_TOKEN_REと同じ規則で照合し、エスケープされた波カッコのみをグループとして残す）
+_STRIP_RE = LazyPattern(globals(), "_STRIP_RE", r'\{(\{)|\}(\})|\{[^{}]*\}')
+
+# エスケープされた波カッコを含まない文字列から、タグのみを取り除くための正規表現
+_TAG_RE = LazyPattern(globals(), "_TAG_RE", r'\{[^{}]*\}')
+
+# タグ内の各指定（例：fore:red、back : rgba(0, 0, 0)、bold）を検出する正規表現
+_ITEM_RE = LazyPattern(globals(), "_ITEM_RE", r'(\w+)(?:\s*:\s*(\w+\s*\([^)]*\)|\w+))?')
+
+# グラデーションの指定を検出する正規表現（タグ内のそれ以降はすべて色の指定とみなす）
+_GRADIENT_RE = LazyPattern(globals(), "_GRADIENT_RE", r'(?s)\bgradient\s*:\s*(.*)$')
+
+# グラデーションの各色（色名またはrgba形式）を検出する正規表現
+_STOP_RE = LazyPattern(globals(), "_STOP_RE", r'\w+\s*\([^)]*\)|\w+')
+
+
+@functools.lru_cache(maxsize=512)
+def parse_tag(body: str) -> tuple:
+    """
+    タグの中身を解析し、タグの種類とスタイル指定の組に変換する。
+    同じタグは繰り返し使われることが多いため、結果はキャッシュされる。
+
+    Args:
+        body (str): 波カッコを除いたタグの中身。
+
+    Returns:
+        tuple: (種類, 指定) のタプル。種類はOPEN、END、GRADIENTのいずれか、指定は (スタイル名, 値) のタプル。
+        値が指定されていない場合、値はNoneとなる。グラデーションの値は色の指定のタプルとなる。
+    """
+    gradient = _GRADIENT_RE.search(body)
+    if gradient:
+        body = body[:gradient.start()]
+    items = tuple((name, value or None) for name, value in _ITEM_RE.findall(body))
+    for name, value in items:
+        if name == "end" and value is None:
+            return (END, items)
+    if gradient:
+        return (GRADIENT, items + (("gradient", tuple(_STOP_RE.findall(gradient.group(1)))),))
+    return (OPEN, items)
+
+
+def tokenize(text: str):
+    """
+    マークアップ文字列を先頭から1回だけ走査し、トークン列を生成する。
+
+    トークンは (種類, 値) のタプルで、種類はTEXT、OPEN、END、ESCAPE、GRADIENTのいずれか。
+    TEXTとESCAPEの値は出力する文字列、OPEN、END、GRADIENTの値は (スタイル名, 値) のタプルとなる。
+
+    Args:
+        text (str): 解析するマークアップ文字列。
+
+    Yields:
+        tuple: (種類, 値) のトークン。
+    """
+    position = 0
+    for match in _TOKEN_RE.finditer(text):
+        start = match.start()
+        if start > position:
+            yield (TEXT, text[position:start])
+        position = match.end()
+
+        body = match.group(1)
+        if body is None:
+            # {{ または }} は1文字の波カッコとして出力する
+            yield (ESCAPE, match.group()[0])
+            continue
+
+        yield parse_tag(body)
+
+    if position < len(text):
+        yield (TEXT, text[position:])
+
+
+def split_markup(text: str) -> list:
+    """
+    マークアップ文字列を、タグとエスケープされた波カッコの前後で分割する。
+    tokenizeと同じ規則で照合し、タグの中身の解析は行わない。
+
+    Args:
+        text (str): 分割するマークアップ文字列。
+
+    Returns:
+        list: 偶数番目が文字列（空文字列を含む）、奇数番目がタグまたはエスケープされた波カッコ（{{ または }}）のリスト。
+    """
+    return _SPLIT_RE.split(text)
+
+
+def ends_gradient(kind: str, items) -> bool:
+    """
+    トークンがグラデーションの範囲を終了させるかどうかを判定する。
+
+    Args:
+        kind (str): トークンの種類。
+        items: トークンの値。
+
+    Returns:
+        bool: endタグ、グラデーション、または前景色を指定するタグの場合はTrue。
+    """
+    if kind == END or kind == GRADIENT:
+        return True
+    return kind == OPEN and any(style == "fore" for style, value in items)
+
+
+def open_gradient(text: str, end: int = None) -> int:
+    """
+    ストリームの途中で区切られた文字列について、範囲が終了していないグラデーションのタグの開始位置を求める。
+    グラデーションは範囲全体の文字数から色を補間するため、範囲が終了するまで描画を保留する必要がある。
+
+    Args:
+        text (str): 解析する文字列。
+        end (int): 解析する範囲の終了位置。Noneの場合は文字列の末尾。
+
+    Returns:
+        int: 範囲が終了していないグラデーションのタグの開始位置。存在しない場合は-1。
+    """
+    if "gradient" not in text:
+        return -1
+    start = -1
+    for match in _TOKEN_RE.finditer(text, 0, len(text) if end is None else end):
+        body = match.group(1)
+        if body is None:
+            continue
+        kind, items = parse_tag(body)
+        if kind == GRADIENT:
+            start = match.start()
+        elif start != -1 and ends_gradient(kind, items):
+            start = -1
+    return start
+
+
+def strip_markup(text: str) -> str:
+    """
+    マークアップ文字列からタグを取り除き、エスケープされた波カッコを1文字に戻す。
+    1回の正規表現による走査のみで処理され、スタイルの解析は行わない。
+
+    Args:
+        text (str): マークアップ文字列。
+
+    Returns:
+        str: タグを取り除いた文字列。
+    """
+    if "{" not in text:
+        return text.replace("}}", "}")
+    if "{{" not in text and "}}" not in text:
+        return _TAG_RE.sub("", text)
+    return "".join(filter(None, _STRIP_RE.split(text)))
+
+
+def incomplete_tail(text: str, max_length: int = 256) -> int:
+    """
+    ストリームの途中で区切られた文字列について、次のチャンクと結合して解析すべき末尾の開始位置を求める。
+    閉じられていない「{」で始まる末尾（連続する「{」を含む）が対象となる。
+
+    Args:
+        text (str): 解析する文字列。
+        max_length (int): 保留する末尾の最大の長さ。これより長い場合はタグではないとみなす。
+
+    Returns:
+        int: 保留する末尾の開始位置。保留する必要がない場合はlen(text)。
+    """
+    start = text.rfind("{")
+    if start == -1 or text.find("}", start) != -1:
+        return len(text)
+
+    # 「{{」のエスケープが分断されないよう、連続する「{」の先頭まで戻る
+    while start > 0 and text[start - 1] == "{":
+        start -= 1
+    if len(text) - start > max_length:
+        return len(text)
+    return start
@@ -0,0 +1,263 @@
+import itertools
+import threading
+
+from .palette import NONE
+from .table import char_width
+
+
+class LiveRegion:
+    """
+    複数行の表示領域を繰り返し再描画するクラス。
+    前回のフレームを文字とスタイルの組（セル）の行として保持し、変更されたセルのみを
+    カーソル移動と最小限のエスケープシーケンスで出力する。
+    マークアップは行ごとに解析され、前回と同じ行は解析を省略する。そのため、グラデーションは行ごとに適用される。
+    セルは端末上の1桁に対応する。全角文字は文字のセルと空文字列のセルの2桁を占め、
+    結合文字などの表示幅が0の文字は直前の文字と同じセルにまとめられる。
+    """
+
+    # 変更されたセルの間にある未変更のセルがこの数以下であれば、カーソルを移動せずにそのまま書き直す
+    MAX_GAP: int = 4
+
+    def __init__(self, printer, file=None):
+        """
+        LiveRegionクラスの初期化メソッド。
+
+        Args:
+            printer (ColorPrinter): マークアップの解析とエスケープシーケンスの生成に使用するプリンタ。
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+        """
+        self.printer = printer
+        self.file = file
+        self.rows = []    # 端末に表示されている前回のフレーム
+        self.row = 0      # 領域内のカーソルの行
+        self.column = 0   # 領域内のカーソルの桁（Noneは不明）
+        self._state = printer._renderer(printer.color_depth)
+        self.default = self._state.style_state()
+        self._lines = {}  # 前回のフレームの行ごとの解析結果
+        self._ends = []   # 前回のフレームの各行の末尾のスタイル（save_state()の戻り値）
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def cells(self, text: str) -> list:
+        """
+        マークアップ文字列を、行ごとのセルのタプルのリストに変換する。
+
+        Args:
+            text (str): 描画するマークアップ文字列。末尾の改行は無視される。
+
+        Returns:
+            list: 各行の (文字, スタイル) のタプルのリスト。全角文字の2桁目のセルの文字は空文字列となる。
+        """
+        with self._lock:
+            return self._cells(text)
+
+    @staticmethod
+    def _row(runs) -> tuple:
+        """
+        1行分のスタイルと文字列の組を、端末上の1桁ごとのセルに変換する。
+
+        Args:
+            runs (list): (スタイル, 文字列) のタプルのリスト。
+
+        Returns:
+            tuple: (文字, スタイル) のタプル。
+        """
+        row = []
+        prefix = ""
+        for style, value in runs:
+            if value.isascii() and not prefix:
+                row.extend(zip(value, itertools.repeat(style)))
+                continue
+            for char in value:
+                width = char_width(char)
+                if not width:
+                    # 表示幅が0の文字は直前の文字のセルにまとめる
+                    # （行頭の場合は次の文字のセルにまとめ、表示幅が0の文字のみの行では省略する）
+                    index = len(row) - 1
+                    if index > 0 and not row[index][0]:
+                        index -= 1
+                    if index < 0:
+                        prefix += char
+                    else:
+                        row[index] = (row[index][0] + char, row[index][1])
+                    continue
+                row.append((prefix + char, style))
+                prefix = ""
+                if width == 2:
+                    row.append(("", style))
+        return tuple(row)
+
+    def _cells(self, text: str) -> list:
+        """
+        cells()の本体。_lockを取得した状態で呼び出す。
+        """
+        lines = text.split("\n")
+        if len(lines) > 1 and not lines[-1]:
+            lines.pop()
+
+        state = self._state
+        state.reset_styles()
+        cache = self._lines
+        previous_ends = self._ends
+        parsed = {}
+        rows = []
+        ends = []
+        start = None      # 行頭のスタイル（Noneは既定のスタイル）
+        restored = True   # stateが行頭のスタイルと一致しているかどうか
+        for index, line in enumerate(lines):
+            # 行の解析結果は、行の内容と行頭のスタイルが同じであれば再利用できる
+            # 行頭のスタイルはオブジェクトの識別子で比較し、入れ子の深さに比例する比較やハッシュの計算を避ける
+            key = (line, None if start is None else id(start))
+            entry = cache.get(key) or parsed.get(key)
+            if entry is None:
+                # 直前の行の解析を省略した場合のみ、その行の末尾のスタイルを復元する
+                if not restored:
+                    state.restore_state(start)
+                row = self._row(state._collect_runs(line))
+                end = state.save_state()
+                # 前回のフレームの同じ行と末尾のスタイルが同じであれば、同じオブジェクトを使用して以降の行の解析結果を再利用する
+                if index < len(previous_ends) and previous_ends[index] == end:
+                    end = previous_ends[index]
+                entry = (row, end)
+                restored = True
+            else:
+                restored = False
+            parsed[key] = entry
+            rows.append(entry[0])
+            start = entry[1]
+            ends.append(start)
+        self._lines = parsed
+        self._ends = ends
+        return rows
+
+    def _move(self, segments: list, row: int, column: int):
+        """
+        カーソルを領域内の指定された位置へ移動するエスケープシーケンスを追加する。
+
+        Args:
+            segments (list): 出力する文字列のリスト。
+            row (int): 移動先の行。
+            column (int): 移動先の桁。
+        """
+        if row < self.row:
+            segments.append("\033[%dA" % (self.row - row))
+        elif row > self.row:
+            segments.append("\033[%dB" % (row - self.row))
+        if column != self.column:
+            segments.append("\r" if column == 0 else "\033[%dG" % (column + 1))
+        self.row = row
+        self.column = column
+
+    def render(self, text: str) -> str:
+        """
+        新しいフレームと前回のフレームとの差分を、出力する文字列に変換する。
+        呼び出し後は、新しいフレームが表示されているものとして扱われる。
+
+        Args:
+            text (str): 描画するマークアップ文字列。
+
+        Returns:
+            str: 差分のみを描画するエスケープシーケンスを含む文字列。変更がない場合は空文字列。
+        """
+        printer = self.printer
+        with self._lock:
+            rows = self._cells(text)
+            previous = self.rows
+            height = len(previous)
+
+            # カーソルを制御できない出力先では、変更があった場合のみフレーム全体を出力する
+            if printer.color_depth == NONE:
+                if rows == previous:
+                    return ""
+                self.rows = rows
+                return "".join("".join(char for char, style in row) + "\n" for row in rows)
+
+            # 行数が減った場合、余った行は空の行として消去する
+            if len(rows) < height:
+                rows.extend([()] * (height - len(rows)))
+
+            segments = []
+            default = current = self.default
+            for y, new in enumerate(rows):
+                if y < height:
+                    old = previous[y]
+                    if new == old:
+                        continue
+                else:
+                    # 領域の末尾に行を追加する
+                    old = ()
+                    if y:
+                        self._move(segments, y - 1, self.column)
+                        segments.append("\n")
+                        self.row = y
+                        self.column = None
+
+                # 変更されたセルを、近接するものをまとめた区間に分割する
+                runs = []
+                shared = min(len(new), len(old))
+                for x in range(len(new)):
+                    if x < shared and new[x] == old[x]:
+                        continue
+                    if runs and x - runs[-1][1] <= self.MAX_GAP:
+                        runs[-1][1] = x + 1
+                    else:
+                        runs.append([x, x + 1])
+
+                for start, stop in runs:
+                    # 全角文字の途中から書き始めたり、途中で書き終えたりしないよう、区間を文字の境界まで広げる
+                    if start and not new[start][0]:
+                        start -= 1
+                    if stop < len(new) and not new[stop][0]:
+                        stop += 1
+                    self._move(segments, y, start)
+                    for char, style in new[start:stop]:
+                        if style != current:
+                            segments.append(printer.sgr_transition(current, style))
+                            current = style
+                        segments.append(char)
+                    self.column = stop
+
+                # 行が短くなった場合は、既定のスタイルに戻してから行末まで消去する
+                if len(old) > len(new):
+                    self._move(segments, y, len(new))
+                    if current != default:
+                        segments.append(printer.sgr_transition(current, default))
+                        current = default
+                    segments.append("\033[K")
+
+            if current != default:
+                segments.append(printer.sgr_transition(current, default))
+            self.rows = rows
+            return "".join(segments)
+
+    def update(self, text: str):
+        """
+        新しいフレームを描画し、前回のフレームとの差分のみを出力する。
+
+        Args:
+            text (str): 描画するマークアップ文字列。
+        """
+        data = self.render(text)
+        if data:
+            self.printer._output(self.file, data, flush=True)
+
+    def close(self):
+        """
+        カーソルを領域の下の行へ移動し、以降の出力が領域を上書きしないようにする。
+        """
+        with self._lock:
+            if not self.rows or self.printer.color_depth == NONE:
+                self.rows = []
+                return
+            segments = []
+            self._move(segments, len(self.rows) - 1, self.column)
+            segments.append("\n")
+            self.rows = []
+            self.row = 0
+            self.column = 0
+        self.printer._output(self.file, "".join(segments), flush=True)
@@ -0,0 +1,195 @@
+import copy
+import logging
+import logging.handlers
+import re
+
+from .lexer import strip_markup
+from .main import ColorPrinter
+from .palette import detect_color_depth
+
+# 書式の種類ごとの、logging.Formatterの書式クラス
+_STYLE_CLASSES = {
+    "%": logging.PercentStyle,
+    "{": logging.StrFormatStyle,
+    "$": logging.StringTemplateStyle,
+}
+
+# 書式の種類ごとの、マークアップとして記述した既定の書式（波カッコはエスケープする）
+_DEFAULT_FORMATS = {
+    "%": "%(levelname)s:%(name)s:%(message)s",
+    "{": "{{levelname}}:{{name}}:{{message}}",
+    "$": "${{levelname}}:${{name}}:${{message}}",
+}
+
+# 書式の種類ごとの、レベル名のプレースホルダーにマッチする正規表現（マークアップとして記述したもの）
+_LEVEL_FIELDS = {
+    "%": re.compile(r"%\(levelname\)[#0+ -]*\d*(?:\.\d+)?s"),
+    "{": re.compile(r"\{\{levelname(?:![rsa])?(?::[^{}]*)?\}\}"),
+    "$": re.compile(r"\$(?:levelname\b|\{\{levelname\}\})"),
+}
+
+
+class ColorFormatter(logging.Formatter):
+    """
+    ログレベルごとにコンパイル済みの書式で、ログレコードを色付きの文字列に変換するフォーマッタ。
+    書式はマークアップとして記述でき、レベル名のプレースホルダーはLEVEL_STYLESのスタイルで囲まれる。
+    書式はレベルごとに初回使用時に1回だけコンパイルされ、以降のレコードは値の埋め込みのみで変換される。
+    値は描画後の文字列に埋め込まれるため、メッセージに含まれる波カッコはタグとして解析されない。
+    """
+
+    # ログレベルと、そのレベル名に適用するタグ
+    LEVEL_STYLES: dict[int, str] = {
+        logging.DEBUG: "{fore:gray}",
+        logging.INFO: "{fore:green}",
+        logging.WARNING: "{fore:yellow}",
+        logging.ERROR: "{fore:red, bold}",
+        logging.CRITICAL: "{fore:white, back:red, bold}",
+    }
+
+    def __init__(self, fmt: str = None, datefmt: str = None, style: str = "%", validate: bool = True, *,
+                 defaults: dict = None, level_styles: dict = None, printer: ColorPrinter = None):
+        """
+        ColorFormatterクラスの初期化メソッド。
+
+        Args:
+            fmt (str): マークアップとして記述した書式。"{"形式の場合、プレースホルダーの波カッコは{{levelname}}のようにエスケープする。
+                Noneの場合はレベル名、ロガー名、メッセージを表示する書式。
+            datefmt (str): 日時の書式。
+            style (str): 書式の種類（"%"、"{"、"$"）。
+            validate (bool): Trueの場合、書式が正しいかどうかを検証する。
+            defaults (dict): プレースホルダーの既定値。
+            level_styles (dict): ログレベルとタグの辞書。Noneの場合はLEVEL_STYLES。
+            printer (ColorPrinter): 書式のコンパイルに使用するプリンタ。Noneの場合はsys.stdoutから色の深さを判定する。
+
+        Raises:
+            ValueError: styleが"%"、"{"、"$"のいずれでもない場合、または書式が正しくない場合。
+        """
+        if style not in _STYLE_CLASSES:
+            raise ValueError("Style must be one of: %s" % ",".join(_STYLE_CLASSES))
+        if fmt is None:
+            fmt = _DEFAULT_FORMATS[style]
+        # 日時の要否の判定と書式の検証は、タグを取り除いた書式で行う
+        super().__init__(strip_markup(fmt), datefmt, style, validate, defaults=defaults)
+        self.markup: str = fmt
+        self.style_key: str = style
+        self.level_styles: dict = dict(self.LEVEL_STYLES if level_styles is None else level_styles)
+        self.printer: ColorPrinter = printer if printer is not None else ColorPrinter()
+        self._defaults: dict = defaults
+        self._levels: dict = {}  # ログレベルごとのコンパイル済みの書式
+
+    def level_style(self, level: int) -> str:
+        """
+        ログレベルのレベル名に適用するタグを取得する。登録されていないレベルは、それより低い最も近いレベルのタグを使用する。
+
+        Args:
+            level (int): ログレベル。
+
+        Returns:
+            str: タグ。該当するレベルがない場合は空文字列。
+        """
+        style = self.level_styles.get(level)
+        if style is None:
+            lower = [registered for registered in self.level_styles if registered <= level]
+            style = self.level_styles[max(lower)] if lower else ""
+        return style
+
+    def compile_level(self, level: int) -> logging.PercentStyle:
+        """
+        ログレベルの書式をコンパイルする。
+
+        Args:
+            level (int): ログレベル。
+
+        Returns:
+            logging.PercentStyle: エスケープシーケンスを含む書式。書式の種類によってはStrFormatStyleまたはStringTemplateStyle。
+        """
+        style = self.level_style(level)
+        markup = self.markup
+        if style:
+            markup = _LEVEL_FIELDS[self.style_key].sub(lambda match: style + match.group() + "{end}", markup)
+
+        # テンプレートは末尾でスタイルをリセットするため、次の行には影響しない
+        text = self.printer.template(markup).text
+        return _STYLE_CLASSES[self.style_key](text, defaults=self._defaults)
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        """
+        レコードのログレベルのコンパイル済みの書式に、レコードの値を埋め込む。
+
+        Args:
+            record (logging.LogRecord): 変換するレコード。
+
+        Returns:
+            str: 色付きの文字列。
+        """
+        compiled = self._levels.get(record.levelno)
+        if compiled is None:
+            compiled = self._levels[record.levelno] = self.compile_level(record.levelno)
+        return compiled.format(record)
+
+
+class ColorHandler(logging.StreamHandler):
+    """
+    ColorFormatterで色付きに変換したレコードを、ColorPrinterの出力処理で書き込むハンドラ。
+    プリンタがバックグラウンド出力中の場合、書き込みはプリンタの書き込みスレッドで行われる。
+    QueueListenerのハンドラとして使用すると、書式の変換もログを出力したスレッドとは別のスレッドで行われる。
+    """
+
+    def __init__(self, stream=None, printer: ColorPrinter = None, formatter: logging.Formatter = None):
+        """
+        ColorHandlerクラスの初期化メソッド。
+
+        Args:
+            stream: 出力先のファイルオブジェクト。Noneの場合はsys.stderr。
+            printer (ColorPrinter): 出力に使用するプリンタ。Noneの場合は出力先から色の深さを判定する。
+            formatter (logging.Formatter): 使用するフォーマッタ。Noneの場合は、printerを使用するColorFormatter。
+        """
+        super().__init__(stream)
+        if printer is None:
+            printer = ColorPrinter(color_depth=detect_color_depth(self.stream))
+        self.printer: ColorPrinter = printer
+        self.setFormatter(formatter if formatter is not None else ColorFormatter(printer=printer))
+
+    def emit(self, record: logging.LogRecord):
+        """
+        レコードを色付きに変換し、1回のwriteで出力する。
+
+        Args:
+            record (logging.LogRecord): 出力するレコード。
+        """
+        try:
+            self.printer._output(self.stream, self.format(record) + self.terminator, flush=True)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class ColorQueueHandler(logging.handlers.QueueHandler):
+    """
+    レコードを書式に変換せずにキューへ追加するQueueHandler。
+    標準のQueueHandlerはキューへ追加する前に書式を適用するが、このハンドラはメッセージの引数の埋め込みと
+    例外のトレースバックの文字列化のみを行うため、色付きの書式への変換はQueueListenerのスレッドで行われる。
+    """
+
+    # 例外のトレースバックを文字列化するためのフォーマッタ
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        レコードの複製を、別のスレッドやプロセスで書式に変換できる状態にする。
+
+        Args:
+            record (logging.LogRecord): キューへ追加するレコード。
+
+        Returns:
+            logging.LogRecord: 引数を埋め込んだメッセージと、文字列化したトレースバックを持つレコードの複製。
+        """
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
@@ -1,5 +1,168 @@
-import re
-import builtins  # 元のprint関数を参照するために使用
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+
+from .lexer import (
+    TEXT, OPEN, END, ESCAPE, GRADIENT, LazyPattern, ends_gradient, incomplete_tail, open_gradient, parse_tag, split_markup,
+    strip_markup, tokenize,
+)
+from .palette import TRUECOLOR, NONE, COLOR_DEPTHS, back_escape, blend, blend_many, detect_color_depth, fore_escape, interpolate
+from .style import DEFAULT_STYLE, StyleStack, StyleState
+from .writers import BackgroundWriter, BatchWriter, write_to
+
+# rgba形式の文字列を解析する正規表現（カンマの前後に空白があっても正しくマッチする）
+_RGBA_RE = LazyPattern(globals(), "_RGBA_RE", r'rgba\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,?\s*([\d.]*)\s*\)')
+
+# グラデーションの範囲内で、スコープを開かずに前景色のみを変更する内部のトークンの種類
+_RECOLOR = "recolor"
+
+# バッチ出力中のプリンタと、そのバッファの辞書（コンテキストごとに保持する）
+_batches: contextvars.ContextVar = contextvars.ContextVar("ColorPrinter.batches", default=None)
+
+
+class ColorTemplate:
+    """
+    コンパイル済みのマークアップ文字列を表すクラス。
+    タグは事前にエスケープシーケンスへ解決されているため、再利用時に解析は行われない。
+    出力先のバックエンドへ渡すスタイルと文字列の組（runs、style_runs()と同じ形式）も、同じ1回の解析で求められる。
+    """
+
+    def __init__(self, source: str, segments: list, style_updates: dict, color_depth: str = TRUECOLOR, snapshot: tuple = None,
+                 runs=()):
+        """
+        ColorTemplateクラスの初期化メソッド。
+
+        Args:
+            source (str): コンパイル元のマークアップ文字列。
+            segments (list): 文字列とエスケープシーケンスが交互に並んだセグメントのリスト。
+            style_updates (dict): 描画後にactive_stylesへ反映するスタイルの差分。
+            color_depth (str): コンパイル時の色の深さ。
+            snapshot (tuple): 描画後のスタイル全体のスナップショット。endタグを含まない場合はNone。
+            runs (Iterable[tuple] | Callable): コンパイル時に求めたスタイルと文字列の組、または初回参照時にそれを求める関数。
+        """
+        self.source: str = source
+        self.color_depth: str = color_depth
+        self.segments: tuple = tuple(segments)
+        self.text: str = "".join(self.segments)
+        self.style_updates: dict = style_updates
+        self.snapshot: tuple = snapshot
+        self._runs = runs if callable(runs) else tuple(runs)
+        self._width: int = None
+
+    @property
+    def runs(self) -> tuple:
+        """
+        バックエンドへ渡すスタイルと文字列の組。色を出力しない場合も、タグのスタイルは保持される。
+
+        Returns:
+            tuple: (スタイル, 文字列) のタプルのタプル。
+        """
+        runs = self._runs
+        if callable(runs):
+            runs = self._runs = tuple(runs())
+        return runs
+
+    def apply_styles(self, styles: StyleState):
+        """
+        描画後のスタイルをstylesへ反映する。endタグを含む場合は、スナップショットから一括で復元する。
+
+        Args:
+            styles (StyleState): 反映先のスタイル。
+        """
+        if self.snapshot is not None:
+            styles.restore(self.snapshot)
+        elif self.style_updates:
+            styles.update(self.style_updates)
+
+    def render(self) -> str:
+        """
+        エスケープシーケンスを含む描画済みの文字列を返す。
+
+        Returns:
+            str: 描画済みの文字列。
+        """
+        return self.text
+
+    @property
+    def tags(self) -> int:
+        """
+        コンパイル元のマークアップ文字列に含まれるタグの数。
+
+        Returns:
+            int: タグの数。
+        """
+        return sum(1 for kind, value in tokenize(self.source) if kind != TEXT and kind != ESCAPE)
+
+    @property
+    def width(self) -> int:
+        """
+        描画した文字列の端末上での表示幅。初回参照時に求められ、テンプレートに保存される。
+
+        Returns:
+            int: 表示幅（桁数）。東アジアの全角文字は2桁として数える。
+        """
+        if self._width is None:
+            from .table import display_width
+            self._width = display_width(strip_markup(self.source))
+        return self._width
+
+    def __repr__(self) -> str:
+        return f"ColorTemplate({self.source!r})"
+
+
+class _Layout:
+    """
+    タグとエスケープされた波カッコの並びについて、描画時にそれぞれの位置へ挿入する文字列を求めたもの。
+    タグの並びが同じであれば間の文字列に関わらず同じエスケープシーケンスとなるため、
+    1回しか出力されない文字列も、タグの解析とスタイルの追跡を行わずに描画できる。
+    """
+
+    __slots__ = ("fills", "reset", "style_updates", "snapshot")
+
+    def __init__(self, fills: tuple, reset: str, style_updates: dict, snapshot: tuple = None):
+        """
+        _Layoutクラスの初期化メソッド。
+
+        Args:
+            fills (tuple): 各タグ・エスケープされた波カッコの位置に挿入する文字列。
+            reset (str): 末尾に追加する文字列。
+            style_updates (dict): 描画後にactive_stylesへ反映するスタイルの差分。
+            snapshot (tuple): 描画後のスタイル全体のスナップショット。endタグを含まない場合はNone。
+        """
+        self.fills: tuple = fills
+        self.reset: str = reset
+        self.style_updates: dict = style_updates
+        self.snapshot: tuple = snapshot
+
+    apply_styles = ColorTemplate.apply_styles
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_cached(cls: type, text: str, color_depth: str) -> ColorTemplate:
+    """
+    クラス、マークアップ文字列、色の深さをキーにして、コンパイル済みテンプレートをLRUキャッシュする。
+    """
+    return cls._build_template(text, color_depth)
+
+
+# print_with_colorで1回出力された (クラス, マークアップ文字列, 色の深さ) のハッシュ値の集合
+# 2回目に出力された文字列のみをテンプレートキャッシュに追加し、1回しか出力されない文字列がよく使う文字列を追い出さないようにする
+# （文字列そのものは保持しない。ハッシュ値が衝突した場合は、1回目からキャッシュに追加されるのみ）
+_seen: set = set()
+
+# _seenに保持する最大数（超えた場合は空にする）
+_SEEN_SIZE: int = 4096
+
+# (クラス, 色の深さ, タグの並び, 各タグの後に文字列があるかどうか) をキーとした_Layoutの表
+# グラデーションを含むなど、_Layoutで描画できない並びの値はFalseとなる
+# 色名や端末の背景色が変更された場合に破棄される
+_layouts: dict = {}
+
+# _layoutsに保持する最大数（超えた場合は空にする）
+_LAYOUT_CACHE_SIZE: int = 4096
+
 
 class ColorPrinter:
     """
@@ -20,25 +183,141 @@ class ColorPrinter:
         "skyblue" : (135, 206, 235,  1),
     }
 
-    def __init__(self):
+    # アルファ値を持つ色を合成する際の、端末の背景色（RGB値）
+    TERMINAL_BACKGROUND: tuple = (0, 0, 0)
+
+    # 色の深さごとの、(r, g, b) をキーとした前景色・背景色のエスケープシーケンスの表
+    # 色名・rgba指定のどちらの色も、初回使用時に計算して追加される
+    FORE_ESCAPES: dict[str, dict[tuple, str]] = {}
+    BACK_ESCAPES: dict[str, dict[tuple, str]] = {}
+
+    # (色の深さ, 変更前のスタイル, 変更後のスタイル) をキーとした、スタイル変更用のエスケープシーケンスの表
+    TRANSITIONS: dict[tuple, str] = {}
+
+    # rgba指定の色やスタイル変更をエスケープシーケンスの表に追加する上限
+    ESCAPE_CACHE_SIZE: int = 4096
+
+    # ストリーム出力でチャンクの境界をまたいで保留するタグの最大の長さ
+    MAX_TAG_LENGTH: int = 256
+
+    # ストリーム出力で範囲が終了していないグラデーションを保留する最大の文字数（超えた場合はチャンクごとに適用する）
+    MAX_GRADIENT_LENGTH: int = 65536
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        サブクラス生成時に、そのクラス専用のエスケープシーケンスの表を作成する。
+        """
+        super().__init_subclass__(**kwargs)
+        cls._build_escape_tables()
+
+    @classmethod
+    def _build_escape_tables(cls):
+        """
+        空のエスケープシーケンスの表を作成する。表の内容は、各色の初回使用時に追加される。
+        """
+        cls.FORE_ESCAPES = {depth: {} for depth in COLOR_DEPTHS}
+        cls.BACK_ESCAPES = {depth: {} for depth in COLOR_DEPTHS}
+        cls.TRANSITIONS = {}
+
+    @classmethod
+    def register_color(cls, name: str, color: tuple):
+        """
+        色名を登録する。
+
+        Args:
+            name (str): 登録する色の名前。
+            color (tuple): RGB値またはRGBA値を含むタプル。アルファ値を省略した場合は1となる。
+
+        Raises:
+            ValueError: colorが3要素または4要素のタプルでない場合。
+        """
+        if len(color) == 3:
+            color = (*color, 1)
+        elif len(color) != 4:
+            raise ValueError(f"color must be an RGB or RGBA tuple: {color!r}")
+
+        # 親クラスのCOLOR_MAPを書き換えないよう、必要に応じてクラス専用のコピーを作成する
+        if "COLOR_MAP" not in cls.__dict__:
+            cls.COLOR_MAP = dict(cls.COLOR_MAP)
+        cls.COLOR_MAP[name.lower()] = color
+
+        # 登録前にコンパイルされたテンプレートは新しい色名を解決していないため破棄する
+        cls.cache_clear()
+        _layouts.clear()
+
+    @classmethod
+    def set_terminal_background(cls, color: tuple):
+        """
+        アルファ値を持つ色を合成する際の、端末の背景色を設定する。
+
+        Args:
+            color (tuple): 端末の背景色のRGB値を含むタプル。
+        """
+        cls.TERMINAL_BACKGROUND = tuple(color[:3])
+        # 設定前にコンパイルされたテンプレートは古い背景色で合成されているため破棄する
+        cls.cache_clear()
+        _layouts.clear()
+
+    @classmethod
+    def _renderer(cls, color_depth: str) -> "ColorPrinter":
+        """
+        描画中のスタイルのみを管理する作業用のプリンタを作成する。
+        色名やエスケープシーケンスの表はクラスのものを使用し、サブクラスの初期化メソッドは呼び出さない。
+
+        Args:
+            color_depth (str): 描画する色の深さ。
+
+        Returns:
+            ColorPrinter: 作成したプリンタ。
+        """
+        printer = cls.__new__(cls)
+        ColorPrinter.__init__(printer, color_depth)
+        return printer
+
+    def __init__(self, color_depth: str = None):
         """
         ColorPrinterクラスの初期化メソッド。
+
+        Args:
+            color_depth (str): 出力する色の深さ（"truecolor"、"256"、"16"、"none"）。Noneの場合は環境変数とsys.stdoutから判定する。
         """
-        self.reset: str = "\033[0m"
-        self.bold: str = "\033[1m"
-        self.italic: str = "\033[3m"
-        self.underline: str = "\033[4m"
-        self.active_styles: dict[str, any] = {
-            "fore": "",
-            "back": "",
-            "bold": False,
-            "italic": False,
-            "underline": False,
-        }
+        self.color_depth = color_depth if color_depth is not None else detect_color_depth()
+        self.active_styles: StyleState = StyleState()
+        # タグで開かれたスコープ（最初のスコープが開かれた時に作成される）
+        self._stack: StyleStack = None
+        # バックグラウンド出力用の書き込みスレッド（start_backgroundで開始される）
+        self._background: BackgroundWriter = None
+        # 統計情報（enable_statsで有効になる）
+        self.stats: "RenderStats" = None
+        # print_with_colorの出力先のバックエンド（add_backendで追加される）
+        self.backends: list = None
+
+    @property
+    def color_depth(self) -> str:
+        """
+        出力する色の深さ。変更すると、以降の出力は新しい色の深さに合わせて描画される。
+        """
+        return self._color_depth
+
+    @color_depth.setter
+    def color_depth(self, depth: str):
+        if depth not in COLOR_DEPTHS:
+            raise ValueError(f"color_depth must be one of {COLOR_DEPTHS}: {depth!r}")
+        self._color_depth: str = depth
+        self._fore_escapes: dict = self.FORE_ESCAPES[depth]
+        self._back_escapes: dict = self.BACK_ESCAPES[depth]
+        if depth == NONE:
+            self.reset = self.bold = self.italic = self.underline = ""
+        else:
+            self.reset: str = "\033[0m"
+            self.bold: str = "\033[1m"
+            self.italic: str = "\033[3m"
+            self.underline: str = "\033[4m"
 
     def set_rgba_color(self, color: tuple) -> str:
         """
         RGBA値に基づいて前景色のANSIエスケープシーケンスを生成する。
+        色の深さが24bit未満の場合は、パレットの最も近い色に変換される。
 
         Args:
             color (tuple): RGBA値を含むタプル。
@@ -47,11 +326,18 @@ class ColorPrinter:
             str: 前景色用のANSIエスケープシーケンス。
         """
         r, g, b, a = color
-        return f"\033[38;2;{r};{g};{b}m"
+        table = self._fore_escapes
+        escape = table.get((r, g, b))
+        if escape is None:
+            escape = fore_escape((r, g, b), self._color_depth)
+            if len(table) < self.ESCAPE_CACHE_SIZE:
+                table[(r, g, b)] = escape
+        return escape
 
     def set_rgba_background(self, color: tuple) -> str:
         """
         RGBA値に基づいて背景色のANSIエスケープシーケンスを生成する。
+        色の深さが24bit未満の場合は、パレットの最も近い色に変換される。
 
         Args:
             color (tuple): RGBA値を含むタプル。
@@ -60,7 +346,13 @@ class ColorPrinter:
             str: 背景色用のANSIエスケープシーケンス。
         """
         r, g, b, a = color
-        return f"\033[48;2;{r};{g};{b}m"
+        table = self._back_escapes
+        escape = table.get((r, g, b))
+        if escape is None:
+            escape = back_escape((r, g, b), self._color_depth)
+            if len(table) < self.ESCAPE_CACHE_SIZE:
+                table[(r, g, b)] = escape
+        return escape
 
     def get_color_by_name(self, name: str) -> tuple:
         """
@@ -82,27 +374,303 @@ class ColorPrinter:
             value (str): RGBA形式の文字列。
 
         Returns:
-            tuple: RGBA値を含むタプル。無効な場合はNoneを返す。
+            tuple: RGBA値を含むタプル。r, g, bは0~255に収められる。無効な場合はNoneを返す。
         """
-        # カンマの前後に空白があっても正しくマッチする正規表現
-        rgba_match = re.match(r'rgba\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,?\s*([\d.]*)\s*\)', value)
+        rgba_match = _RGBA_RE.match(value)
         if rgba_match:
-            r, g, b = map(int, rgba_match.groups()[:3])  # r, g, bを整数に変換
+            # r, g, bを整数に変換し、範囲外の値はどの色の深さでも同じ色となるよう255に収める
+            r, g, b = (min(255, int(channel)) for channel in rgba_match.groups()[:3])
             a = float(rgba_match.group(4)) if rgba_match.group(4) else 1  # アルファ値が指定されていない場合は1
             return (r, g, b, a)  # aを指定された値または1にする
         return None
 
     def reset_styles(self):
         """
-        現在のスタイルをリセットする。
+        現在のスタイルをリセットし、開いているスコープをすべて破棄する。新しいオブジェクトは作成せず、その場で既定の状態に戻す。
+        """
+        self.active_styles.reset()
+        if self._stack is not None:
+            self._stack.clear()
+
+    def save_state(self) -> tuple:
+        """
+        現在のスタイルと開いているスコープを、変更されないタプルとして保存する。
+
+        Returns:
+            tuple: restore_state()に渡すことができるハッシュ可能なタプル。
         """
-        self.active_styles = {
-            "fore": "",
-            "back": "",
-            "bold": False,
-            "italic": False,
-            "underline": False,
-        }
+        stack = self._stack
+        return (self.active_styles.snapshot(), stack.snapshot() if stack is not None and stack.scopes else None)
+
+    def restore_state(self, state: tuple):
+        """
+        save_state()で保存したスタイルとスコープを復元する。
+
+        Args:
+            state (tuple): save_state()の戻り値。
+        """
+        styles, scopes = state
+        self.active_styles.restore(styles)
+        if scopes is not None:
+            if self._stack is None:
+                self._stack = StyleStack()
+            self._stack.restore(scopes)
+        elif self._stack is not None:
+            self._stack.clear()
+
+    def resolve_color(self, value: str) -> tuple:
+        """
+        rgba形式の文字列または色名からRGBA値を取得する。
+
+        Args:
+            value (str): rgba形式の文字列または色名。
+
+        Returns:
+            tuple: RGBA値を含むタプル。無効な場合はNoneを返す。
+        """
+        return self.get_color_by_name(value) or self.parse_rgba(value)
+
+    def resolve_stops(self, stops) -> tuple:
+        """
+        グラデーションの色の指定をRGBA値に変換する。無効な指定は無視される。
+
+        Args:
+            stops (Iterable): 色名、rgba形式の文字列、またはRGB値・RGBA値を含むタプルのイテラブル。
+
+        Returns:
+            tuple: RGBA値を含むタプルのタプル。
+        """
+        colors = []
+        for stop in stops:
+            if isinstance(stop, str):
+                color = self.resolve_color(stop)
+            elif len(stop) == 3:
+                color = (*stop, 1)
+            else:
+                color = tuple(stop) if len(stop) == 4 else None
+            if color:
+                colors.append(color)
+        return tuple(colors)
+
+    def gradient(self, text: str, stops) -> str:
+        """
+        文字列の各文字に、指定された色を補間したグラデーションを適用する。
+        隣り合う文字が同じエスケープシーケンスになる場合は、まとめて1つのエスケープシーケンスのみを出力する。
+
+        Args:
+            text (str): グラデーションを適用する文字列（タグは解析されない）。
+            stops (Iterable): 色名、rgba形式の文字列、またはRGB値・RGBA値を含むタプルのイテラブル。
+
+        Returns:
+            str: エスケープシーケンスを含む文字列。末尾で前景色のみを既定に戻す。
+        """
+        colors = self.resolve_stops(stops)
+        if not text or not colors or self.color_depth == NONE:
+            return text
+
+        palette = interpolate(colors, len(text))
+        if any(color[3] != 1 for color in palette):
+            palette = self._blend_fore(palette)
+        segments = []
+        previous = None
+        start = 0
+        for index, color in enumerate(palette):
+            escape = self.set_rgba_color(color)
+            if escape != previous:
+                segments.append(text[start:index])
+                segments.append(escape)
+                previous = escape
+                start = index
+        segments.append(text[start:])
+        segments.append("\033[39m")
+        return "".join(segments)
+
+    def style_state(self) -> tuple:
+        """
+        現在のスタイルを比較可能なタプルとして取得する。
+        アルファ値を持つ色は、背景色は端末の背景色に、前景色は現在の背景色に合成される。
+
+        Returns:
+            tuple: (前景色, 背景色, 太字, 斜字, 下線) のタプル。色が未指定の場合はNone。
+        """
+        styles = self.active_styles
+        fore = styles.fore or None
+        back = styles.back or None
+        if back and back[3] != 1:
+            back = blend(back, self.TERMINAL_BACKGROUND)
+        if fore and fore[3] != 1:
+            fore = blend(fore, back or self.TERMINAL_BACKGROUND)
+        return (
+            fore,
+            back,
+            styles.bold,
+            styles.italic,
+            styles.underline,
+        )
+
+    def _blend_fore(self, colors) -> list:
+        """
+        前景色として使用する複数のRGBA値を、style_stateと同じ規則で現在の背景色（未指定の場合は端末の背景色）に一括で合成する。
+        NumPyがインストールされている場合は、palette.blend_manyにより配列として計算される。
+
+        Args:
+            colors (Iterable[tuple]): RGBA値を含むタプルのイテラブル。
+
+        Returns:
+            list: 合成後のRGBA値を含むタプルのリスト。アルファ値は1となる。
+        """
+        return blend_many(colors, self.style_state()[1] or self.TERMINAL_BACKGROUND)
+
+    def sgr_transition(self, current: tuple, target: tuple) -> str:
+        """
+        端末のスタイルをcurrentからtargetへ変更するための、最小のエスケープシーケンスを生成する。
+        変更が必要なパラメータは1つのシーケンス（例：\\033[1;3;38;2;r;g;bm）にまとめられる。
+
+        Args:
+            current (tuple): style_stateで取得した、端末に適用済みのスタイル。
+            target (tuple): style_stateで取得した、適用したいスタイル。
+
+        Returns:
+            str: 対応するANSIエスケープシーケンス。変更がない場合は空文字列。
+        """
+        if current == target or self._color_depth == NONE:
+            return ""
+        key = (self._color_depth, current, target)
+        escape = self.TRANSITIONS.get(key)
+        if escape is not None:
+            return escape
+
+        fore, back, bold, italic, underline = target
+        attributes = (
+            (bold, current[2], self.bold, "22"),
+            (italic, current[3], self.italic, "23"),
+            (underline, current[4], self.underline, "24"),
+            (fore, current[0], fore and self.set_rgba_color(fore), "39"),
+            (back, current[1], back and self.set_rgba_background(back), "49"),
+        )
+
+        full_codes = []     # リセット後に適用し直す場合のパラメータ
+        diff_codes = []     # 差分のみを適用する場合のパラメータ
+        turns_off = False
+        for value, current_value, on_escape, off_code in attributes:
+            if value:
+                full_codes.append(on_escape[2:-1])
+            if value != current_value:
+                if value:
+                    diff_codes.append(on_escape[2:-1])
+                else:
+                    diff_codes.append(off_code)
+                    turns_off = True
+
+        # スタイルを解除する場合は、個別の解除コードとリセット後の再適用のうち短い方を選ぶ
+        codes = ";".join(diff_codes)
+        if turns_off:
+            reset_codes = ";".join([self.reset[2:-1], *full_codes])
+            if len(reset_codes) <= len(codes):
+                codes = reset_codes
+
+        escape = f"\033[{codes}m"
+        if len(self.TRANSITIONS) < self.ESCAPE_CACHE_SIZE:
+            self.TRANSITIONS[key] = escape
+        return escape
+
+    def update_styles(self, kind: str, items: tuple):
+        """
+        字句解析済みのタグに基づいて、active_stylesを更新する。
+        スタイルを適用するタグは新しいスコープを開き、endタグはスコープを閉じて外側のスタイルに戻す。
+
+        Args:
+            kind (str): タグの種類（lexer.OPEN、lexer.END、lexer.GRADIENTのいずれか）。
+            items (tuple): (スタイル名, 値) のタプル。色の値には解決済みのRGBA値も指定できる。
+        """
+        styles = self.active_styles
+        if kind == _RECOLOR:
+            styles.fore = items
+            return
+        if kind == END:
+            self._close_scopes(items)
+            return
+
+        # 変更するスタイルの変更前の値を記録し、新しいスコープとして保存する
+        changes = []
+        for style, value in items:
+            if style == "fore" or style == "back":
+                if value:
+                    color_value = value if isinstance(value, tuple) else self.resolve_color(value)
+                    if color_value:
+                        changes.append((style, getattr(styles, style)))
+                        setattr(styles, style, color_value)
+            elif style == "bold" or style == "italic" or style == "underline":
+                changes.append((style, getattr(styles, style)))
+                setattr(styles, style, True)
+            elif style == "gradient" and value:
+                # 単独で適用された場合は、グラデーションの最初の色を前景色とする
+                colors = self.resolve_stops(value)
+                if colors:
+                    changes.append(("fore", styles.fore))
+                    styles.fore = colors[0]
+
+        if changes:
+            if self._stack is None:
+                self._stack = StyleStack()
+            self._stack.push(changes)
+
+    def _close_scopes(self, items: tuple):
+        """
+        endタグに基づいてスコープを閉じる。
+
+        {end}は最も内側のスコープを閉じ、{end fore}のようにスタイル名を指定した場合はそのスタイルのみを閉じる。
+        {end all}、または開いているスコープがない場合の{end}は、すべてのスタイルをリセットする。
+        値とともに指定された色（例：{end, fore:red}）は、スコープを閉じた後にスコープを開かずに適用する。
+
+        Args:
+            items (tuple): endタグの (スタイル名, 値) のタプル。
+        """
+        styles = self.active_styles
+        stack = self._stack
+        if len(items) == 1:
+            # 最も多く使われる{end}は、最も内側のスコープを閉じるのみ
+            if stack is None or not stack.pop(styles):
+                self.reset_styles()
+            return
+
+        names = [
+            "fore" if style == "gradient" else style
+            for style, value in items
+            if value is None and style != "end"
+        ]
+        if "all" in names:
+            self.reset_styles()
+        elif not names:
+            if stack is None or not stack.pop(styles):
+                self.reset_styles()
+        else:
+            if stack is None:
+                stack = self._stack = StyleStack()
+            for style in names:
+                if style in StyleState.FIELDS:
+                    stack.close(styles, style)
+
+        for style, value in items:
+            if (style == "fore" or style == "back") and value:
+                color_value = value if isinstance(value, tuple) else self.resolve_color(value)
+                if color_value:
+                    setattr(styles, style, color_value)
+
+    def apply_tag(self, kind: str, items: tuple) -> str:
+        """
+        字句解析済みのタグを適用し、対応するエスケープシーケンスに変換。
+
+        Args:
+            kind (str): タグの種類（lexer.OPEN、lexer.END、lexer.GRADIENTのいずれか）。
+            items (tuple): (スタイル名, 値) のタプル。
+
+        Returns:
+            str: 適用前のスタイルからの差分のみを表すANSIエスケープシーケンス。
+        """
+        current = self.style_state()
+        self.update_styles(kind, items)
+        return self.sgr_transition(current, self.style_state())
 
     def parse_color_tag(self, tag: str) -> str:
         """
@@ -114,71 +682,820 @@ class ColorPrinter:
         Returns:
             str: 対応するANSIエスケープシーケンス。
         """
-        output = ""
+        if tag.startswith("{") and tag.endswith("}"):
+            tag = tag[1:-1]
+        return self.apply_tag(*parse_tag(tag))
 
-        # endタグの処理
-        if "end" in tag:
-            # 現在のスタイルをリセット
-            output += self.reset
-            self.reset_styles()
+    def _expand_gradients(self, tokens: list):
+        """
+        グラデーションの範囲内の文字列を、前景色を指定するトークンと文字列のトークンに展開するジェネレータ。
+        範囲内の文字数から全体の色を一括で補間し、同じエスケープシーケンスになる隣り合う文字はまとめる。
+        半透明の色は、範囲の開始タグを適用した時点の背景色に一括で合成するため、
+        取り出したトークンは次のトークンを取り出す前にupdate_stylesで適用する必要がある。
 
-            # タグに指定されたスタイルを適用
-            style_tags = re.findall(r'(\w+)\s*:\s*([\w(),\s]+)', tag)
-            for style, color_value in style_tags:
-                if style == "fore":
-                    color_value = self.parse_rgba(color_value) or self.get_color_by_name(color_value)
-                    if color_value:
-                        output += self.set_rgba_color(color_value)
-                elif style == "back":
-                    color_value = self.parse_rgba(color_value) or self.get_color_by_name(color_value)
-                    if color_value:
-                        output += self.set_rgba_background(color_value)
-            return output
-
-        # 色とスタイルの指定
-        style_tags = re.findall(r'(\w+)\s*:\s*([\w(),\s]+)', tag)
-        for style, color_value in style_tags:
-            if style == "fore":
-                color_value = self.parse_rgba(color_value) or self.get_color_by_name(color_value)
-                if color_value:
-                    output += self.set_rgba_color(color_value)
-                    self.active_styles["fore"] = color_value
-            elif style == "back":
-                color_value = self.parse_rgba(color_value) or self.get_color_by_name(color_value)
-                if color_value:
-                    output += self.set_rgba_background(color_value)
-                    self.active_styles["back"] = color_value
-            elif style == "bold":
-                output += self.bold
-                self.active_styles["bold"] = True
-            elif style == "italic":
-                output += self.italic
-                self.active_styles["italic"] = True
-            elif style == "underline":
-                output += self.underline
-                self.active_styles["underline"] = True
-
-        return output
-
-    def print_with_color(self, text: str, *args, **kwargs):
+        Args:
+            tokens (list): lexer.tokenizeが生成するトークンのリスト。
+
+        Yields:
+            tuple: GRADIENT以外の種類のトークン。
+        """
+        index = 0
+        count = len(tokens)
+        while index < count:
+            kind, items = tokens[index]
+            index += 1
+            if kind != GRADIENT:
+                yield (kind, items)
+                continue
+
+            stops = ()
+            others = []
+            for style, value in items:
+                if style == "gradient":
+                    stops = value
+                else:
+                    others.append((style, value))
+
+            # 範囲はendタグ、次のグラデーション、または前景色の指定まで
+            end = index
+            while end < count and not ends_gradient(*tokens[end]):
+                end += 1
+            span = tokens[index:end]
+            index = end
+
+            colors = self.resolve_stops(stops)
+            length = sum(len(value) for kind, value in span if kind == TEXT or kind == ESCAPE)
+            if not colors or not length:
+                if others:
+                    yield (OPEN, tuple(others))
+                yield from span
+                continue
+
+            # グラデーション全体で1つのスコープとし、範囲内の色の変更はスコープを開かずに行う
+            palette = interpolate(colors, length)
+            yield (OPEN, (*others, ("fore", palette[0])))
+            # 範囲内で背景色が変更されない場合は、半透明の色を開始タグの適用後の背景色に一括で合成する
+            # （変更される場合は、style_stateが文字ごとに合成する）
+            if any(color[3] != 1 for color in palette) and not any(
+                kind == OPEN and any(name == "back" for name, _ in styles) for kind, styles in span
+            ):
+                palette = self._blend_fore(palette)
+            position = 0
+            for kind, value in span:
+                if kind != TEXT and kind != ESCAPE:
+                    yield (kind, value)
+                    continue
+                previous = None
+                start = 0
+                for offset in range(len(value)):
+                    color = palette[position + offset]
+                    # 合成されていない半透明の色は、同じエスケープシーケンスでも合成後の色が異なる可能性がある
+                    key = self.set_rgba_color(color) if color[3] == 1 else color
+                    if key != previous:
+                        if offset > start:
+                            yield (kind, value[start:offset])
+                            start = offset
+                        yield (_RECOLOR, color)
+                        previous = key
+                yield (kind, value[start:])
+                position += len(value)
+
+    def _render_tokens(self, tokens, segments: list, current: tuple, runs: list = None) -> tuple:
+        """
+        トークン列を描画し、文字列とエスケープシーケンスをsegmentsに追加する。
+        タグはスタイルの更新のみを行い、エスケープシーケンスは文字列の直前で差分として出力する。
+
+        Args:
+            tokens (list): lexer.tokenizeが生成するトークンのリスト。
+            segments (list): 描画結果を追加するリスト。
+            current (tuple): 描画開始時に端末に適用済みのスタイル。
+            runs (list): 指定した場合、文字列ごとの (スタイル, 文字列) のタプルを追加するリスト。
+
+        Returns:
+            tuple: 描画終了時に端末に適用済みのスタイル。
+        """
+        # グラデーションは範囲全体の文字数が必要なため、事前に展開する
+        if any(kind == GRADIENT for kind, value in tokens):
+            tokens = self._expand_gradients(tokens)
+
+        # 前回の呼び出し以降にスタイルが更新されている可能性があるため、最初の文字列の前では必ず比較する
+        changed = True
+        for kind, value in tokens:
+            if kind == TEXT or kind == ESCAPE:
+                if changed:
+                    target = self.style_state()
+                    if target != current:
+                        segments.append(self.sgr_transition(current, target))
+                        current = target
+                    changed = False
+                segments.append(value)
+                if runs is not None:
+                    runs.append((current, value))
+            else:
+                self.update_styles(kind, value)
+                changed = True
+        return current
+
+    def style_runs(self, text: str) -> list:
+        """
+        マークアップ文字列を、スタイルと文字列の組のリストに変換する。
+        スタイルはstyle_state()と同じ形式で、グラデーションは展開済みとなる。
+
+        Args:
+            text (str): 変換するマークアップ文字列。
+
+        Returns:
+            list: (スタイル, 文字列) のタプルのリスト。
+        """
+        return self._renderer(self.color_depth)._collect_runs(text)
+
+    def _collect_runs(self, text: str) -> list:
+        """
+        現在のスタイルから続けてマークアップ文字列を解析し、スタイルと文字列の組のリストに変換する。
+
+        Args:
+            text (str): 変換するマークアップ文字列。
+
+        Returns:
+            list: (スタイル, 文字列) のタプルのリスト。
+        """
+        tokens = list(tokenize(text))
+        if any(kind == GRADIENT for kind, value in tokens):
+            tokens = self._expand_gradients(tokens)
+
+        runs = []
+        style = self.style_state()
+        for kind, value in tokens:
+            if kind == TEXT or kind == ESCAPE:
+                runs.append((style, value))
+            else:
+                self.update_styles(kind, value)
+                style = self.style_state()
+        return runs
+
+    @classmethod
+    def _build_template(cls, text: str, color_depth: str = TRUECOLOR, collect_runs: bool = True) -> ColorTemplate:
+        """
+        キャッシュを介さずにマークアップ文字列をコンパイルする。
+
+        Args:
+            text (str): コンパイルするマークアップ文字列。
+            color_depth (str): 出力する色の深さ。
+            collect_runs (bool): Falseの場合、バックエンドへ渡すスタイルと文字列の組（runs）を求めない。
+
+        Returns:
+            ColorTemplate: コンパイル済みのテンプレート。
+        """
+        # 色を出力しない場合はタグを取り除くのみとし、スタイルの解析は行わない
+        # （バックエンドは独自の色の深さで出力するため、スタイルと文字列の組は初回参照時に24bitカラーで解析して求める）
+        if color_depth == NONE:
+            stripped = strip_markup(text)
+            return ColorTemplate(text, [stripped], {}, color_depth, runs=lambda: cls._renderer(TRUECOLOR)._collect_runs(text))
+
+        printer = cls._renderer(color_depth)
+        default = current = printer.style_state()
+        tokens = list(tokenize(text))
+
+        segments = []
+        runs = [] if collect_runs else None
+        current = printer._render_tokens(tokens, segments, current, runs)
+
+        # 端末にスタイルが残っている場合のみリセットする
+        if current != default:
+            segments.append(printer.reset)
+
+        # endタグがあればスタイル全体を、なければ適用されたスタイルのみを差分として記録する
+        styles = printer.active_styles
+        if any(kind == END for kind, value in tokens):
+            return ColorTemplate(text, segments, dict(styles), color_depth, styles.snapshot(), runs or ())
+        style_updates = {style: value for style, value in styles.items() if value}
+        return ColorTemplate(text, segments, style_updates, color_depth, runs=runs or ())
+
+    @classmethod
+    def _build_layout(cls, delimiters: tuple, follows: tuple, color_depth: str):
+        """
+        タグとエスケープされた波カッコの並びから、描画時に挿入する文字列を求める。
+        結果は_build_templateと同じく、スタイルの差分は文字列の直前でのみ出力される。
+
+        Args:
+            delimiters (tuple): split_markupの結果の奇数番目の要素。
+            follows (tuple): 各要素の直後の文字列が空でないかどうか。
+            color_depth (str): 出力する色の深さ。
+
+        Returns:
+            _Layout | bool: 求めた_Layout。グラデーションを含む場合はFalse。
+        """
+        printer = cls._renderer(color_depth)
+        default = current = printer.style_state()
+        changed = False
+        has_end = False
+        fills = []
+        for delimiter, follow in zip(delimiters, follows):
+            if delimiter == "{{" or delimiter == "}}":
+                text = delimiter[0]
+            else:
+                kind, items = parse_tag(delimiter[1:-1])
+                # グラデーションは範囲内の文字数によって色が変わるため、タグの並びのみからは描画できない
+                if kind == GRADIENT:
+                    return False
+                has_end = has_end or kind == END
+                printer.update_styles(kind, items)
+                changed = True
+                text = ""
+                if not follow:
+                    fills.append(text)
+                    continue
+
+            # 文字列を出力する直前でのみ、スタイルの差分を出力する
+            if changed:
+                target = printer.style_state()
+                text = printer.sgr_transition(current, target) + text
+                current = target
+                changed = False
+            fills.append(text)
+
+        reset = printer.reset if current != default else ""
+        styles = printer.active_styles
+        if has_end:
+            return _Layout(tuple(fills), reset, dict(styles), styles.snapshot())
+        return _Layout(tuple(fills), reset, {style: value for style, value in styles.items() if value})
+
+    def _render_layout(self, text: str) -> str:
+        """
+        タグの並びごとに求めた_Layoutを使用して、マークアップ文字列を描画する。
+        描画後のスタイルはactive_stylesへ反映される。
+
+        Args:
+            text (str): 描画するマークアップ文字列。
+
+        Returns:
+            str: 描画済みの文字列。_Layoutで描画できない場合はNone。
+        """
+        parts = split_markup(text)
+        cls = type(self)
+        depth = self._color_depth
+        key = (cls, depth, tuple(parts[1::2]), tuple(map(bool, parts[2::2])))
+        layout = _layouts.get(key)
+        if layout is None:
+            layout = cls._build_layout(key[2], key[3], depth)
+            if len(_layouts) >= _LAYOUT_CACHE_SIZE:
+                _layouts.clear()
+            _layouts[key] = layout
+        if not layout:
+            return None
+
+        parts[1::2] = layout.fills
+        if layout.reset:
+            parts.append(layout.reset)
+        layout.apply_styles(self.active_styles)
+        return "".join(parts)
+
+    @classmethod
+    def compile(cls, text: str, color_depth: str = TRUECOLOR) -> ColorTemplate:
+        """
+        マークアップ文字列をコンパイルし、再利用可能なテンプレートを返す。
+        結果はLRUキャッシュに保存され、同じ文字列の再コンパイルは行われない。
+
+        Args:
+            text (str): コンパイルするマークアップ文字列。
+            color_depth (str): 出力する色の深さ。
+
+        Returns:
+            ColorTemplate: コンパイル済みのテンプレート。
+        """
+        return _compile_cached(cls, text, color_depth)
+
+    def template(self, text) -> ColorTemplate:
+        """
+        このプリンタの色の深さでコンパイルされたテンプレートを取得する。
+
+        Args:
+            text (str | ColorTemplate): マークアップ文字列、またはコンパイル済みのテンプレート。
+
+        Returns:
+            ColorTemplate: コンパイル済みのテンプレート。色の深さが異なるテンプレートは再コンパイルされる。
+        """
+        if isinstance(text, ColorTemplate):
+            if text.color_depth == self._color_depth:
+                return text
+            text = text.source
+        return _compile_cached(type(self), text, self._color_depth)
+
+    @staticmethod
+    def strip_markup(text: str) -> str:
+        """
+        マークアップ文字列からタグを取り除く。エスケープされた波カッコは1文字に戻される。
+
+        Args:
+            text (str): マークアップ文字列。
+
+        Returns:
+            str: タグを取り除いた文字列。
+        """
+        return strip_markup(text)
+
+    @staticmethod
+    def cache_info():
+        """
+        テンプレートキャッシュの統計情報を取得する。
+
+        Returns:
+            functools._CacheInfo: ヒット数、ミス数、最大サイズ、現在のサイズ。
+        """
+        return _compile_cached.cache_info()
+
+    @staticmethod
+    def cache_clear():
+        """
+        テンプレートキャッシュを空にし、統計情報をリセットする。
+        """
+        _compile_cached.cache_clear()
+        _seen.clear()
+
+    @staticmethod
+    def set_cache_size(maxsize: int):
+        """
+        テンプレートキャッシュの最大サイズを変更する。既存のキャッシュは破棄される。
+
+        Args:
+            maxsize (int): キャッシュに保持するテンプレートの最大数。
+        """
+        global _compile_cached
+        _compile_cached = functools.lru_cache(maxsize=maxsize)(_compile_cached.__wrapped__)
+        _seen.clear()
+
+    def print_with_color(self, text, *args, sep: str = " ", end: str = "\n", file=None, flush: bool = False):
         """
         テキスト内のタグを解析して色付きで表示。
+        print関数と同じ規則で組み立てたメッセージを1回のwriteで出力するため、複数のスレッドから呼び出しても出力が混ざらない。
+        波カッコを含まない文字列はそのまま出力される。それ以外の文字列は、2回目に出力された時点でテンプレートキャッシュに追加される。
 
         Args:
-            text (str): 色付きで表示するテキスト。
-            *args: print関数に渡す追加の引数。
-            **kwargs: print関数に渡す追加のキーワード引数。
+            text (str | ColorTemplate): 色付きで表示するテキスト、またはコンパイル済みのテンプレート。
+            *args: テキストの後に続けて表示する値。
+            sep (str): 値の区切り文字。Noneの場合は空白。
+            end (str): 末尾に追加する文字列。Noneの場合は改行。
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+            flush (bool): Trueの場合、出力後に出力先をフラッシュする。
         """
-        parts = re.split(r'(\{.*?\})', text)
-        colored_text = ""
-        for part in parts:
-            if part.startswith("{") and part.endswith("}"):
-                colored_text += self.parse_color_tag(part)
+        stats = self.stats
+        if stats is not None:
+            start = stats.begin(self, text)
+
+        collect_runs = file is None and self.backends is not None
+        if stats is None and isinstance(text, str):
+            rendered, template = self._render_text(text, collect_runs)
+        else:
+            # 統計情報の集計中は、キャッシュのヒット数とミス数を数えるため常にテンプレートキャッシュを使用する
+            template = self.template(text)
+            template.apply_styles(self.active_styles)
+            rendered = template.text
+
+        if end is None:
+            end = "\n"
+        if args:
+            if sep is None:
+                sep = " "
+            output = sep.join([rendered, *map(str, args)]) + end
+        else:
+            output = rendered + end
+
+        if stats is not None:
+            parsed = time.perf_counter()
+        if collect_runs:
+            # バックエンドへは、描画済みの文字列ではなくテンプレートに保存されたスタイルと文字列の組を渡す
+            if template is not None:
+                runs = template.runs
+                tail = output[len(rendered):]
             else:
-                colored_text += part
-        colored_text += self.reset
-        builtins.print(colored_text, *args, **kwargs)
+                runs = ()
+                tail = output
+            if tail:
+                runs = runs + ((DEFAULT_STYLE, tail),)
+            self._output(file, output, flush, runs)
+        else:
+            self._output(file, output, flush)
+        if stats is not None:
+            stats.record(self, start, parsed, template, output)
+
+    def _render_text(self, text: str, collect_runs: bool = False) -> tuple:
+        """
+        print_with_colorに渡されたマークアップ文字列を描画し、描画後のスタイルをactive_stylesへ反映する。
+        波カッコを含まない文字列はそのまま、色を出力しない場合はタグを取り除いた文字列を、テンプレートを作成せずに返す。
+        初めて出力される文字列はキャッシュせずに、タグの並びごとに求めた_Layoutで描画し、
+        2回目に出力された時点でコンパイルしてテンプレートキャッシュに追加する。
+
+        Args:
+            text (str): 描画するマークアップ文字列。
+            collect_runs (bool): Trueの場合、バックエンドへ渡すスタイルと文字列の組を持つテンプレートを返す。
+
+        Returns:
+            tuple: (描画済みの文字列, テンプレート) のタプル。テンプレートを作成しなかった場合、テンプレートはNone。
+        """
+        if "{" not in text and "}" not in text:
+            return text, None
+        # 色を出力しない場合、スタイルは変化しないため、タグを取り除くのみとしてテンプレートキャッシュも使用しない
+        if self._color_depth == NONE and not collect_runs:
+            return strip_markup(text), None
+
+        cls = type(self)
+        depth = self._color_depth
+        key = hash((cls, text, depth))
+        if key in _seen:
+            template = _compile_cached(cls, text, depth)
+        else:
+            if len(_seen) >= _SEEN_SIZE:
+                _seen.clear()
+            _seen.add(key)
+            if not collect_runs:
+                rendered = self._render_layout(text)
+                if rendered is not None:
+                    return rendered, None
+            template = cls._build_template(text, depth, collect_runs)
+        template.apply_styles(self.active_styles)
+        return template.text, template
+
+    def render_many(self, templates, values, end: str = "\n") -> str:
+        """
+        多数のメッセージをまとめて描画する。
+        テンプレートは%書式のプレースホルダーを含むマークアップ文字列で、異なるテンプレートごとに1回だけコンパイルされる。
+        値はコンパイル後の文字列に%演算子で埋め込まれるため、値に含まれる波カッコはタグとして解析されない。
+
+        Args:
+            templates (str | Iterable[str]): すべての行に共通のテンプレート、またはvaluesと同じ長さのテンプレートのイテラブル。
+            values (Iterable): 各行のテンプレートに埋め込む値（タプル、辞書、または単一の値）のイテラブル。
+            end (str): 各行の末尾に追加する文字列。
+
+        Returns:
+            str: すべての行を結合した描画済みの文字列。
+        """
+        if isinstance(templates, str):
+            template = self.template(templates)
+            template.apply_styles(self.active_styles)
+            text = template.text
+            rows = [text % value for value in values]
+        else:
+            compiled = {}
+            rows = []
+            previous = None
+            for source, value in zip(templates, values):
+                template = compiled.get(source)
+                if template is None:
+                    template = compiled[source] = self.template(source)
+                # 同じテンプレートのスタイル差分を続けて適用しても結果は変わらないため、切り替わった時のみ適用する
+                if template is not previous:
+                    template.apply_styles(self.active_styles)
+                    previous = template
+                rows.append(template.text % value)
+
+        if not rows:
+            return ""
+        rows.append("")
+        return end.join(rows)
+
+    def print_many(self, templates, values, end: str = "\n", file=None, flush: bool = False):
+        """
+        多数のメッセージをまとめて描画し、1回のwriteで出力する。
+
+        Args:
+            templates (str | Iterable[str]): すべての行に共通のテンプレート、またはvaluesと同じ長さのテンプレートのイテラブル。
+            values (Iterable): 各行のテンプレートに埋め込む値（タプル、辞書、または単一の値）のイテラブル。
+            end (str): 各行の末尾に追加する文字列。
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+            flush (bool): Trueの場合、出力後に出力先をフラッシュする。
+        """
+        stats = self.stats
+        if stats is not None:
+            start = stats.begin(self, templates)
+        output = self.render_many(templates, values, end)
+
+        if stats is not None:
+            parsed = time.perf_counter()
+        self._output(file, output, flush)
+        if stats is not None:
+            stats.record(self, start, parsed, None, output)
+
+    @contextlib.contextmanager
+    def batch(self, max_bytes: int = 65536, flush_interval: float = None):
+        """
+        コンテキスト内のprint_with_colorの出力をバッファに蓄積し、まとめて出力する。
+        コンテキストを抜ける際（例外発生時を含む）に、残りの内容はすべて出力される。
+        バッファは現在のコンテキスト（スレッドやタスク）でのみ使用され、既にバッチ出力中の場合は外側のバッファをそのまま使用する。
+        コンテキスト内で開始されたタスクやスレッドがコンテキストを抜けた後に出力した内容は、バッファを介さずに直接出力される。
 
+        Args:
+            max_bytes (int): バッファに蓄積する最大の文字数。
+            flush_interval (float): 前回の出力から一定秒数が経過した場合に出力する間隔。Noneの場合は時間による出力を行わない。
+
+        Yields:
+            BatchWriter: 使用中のバッファ。flush()で任意のタイミングで出力できる。
+        """
+        batches = _batches.get()
+        writer = None if batches is None else batches.get(self)
+        if writer is not None:
+            yield writer
+            return
+
+        # 他のプリンタのバッファを含む辞書は変更せず、このプリンタのバッファを追加した新しい辞書を設定する
+        writer = BatchWriter(max_bytes, flush_interval, self._emit)
+        token = _batches.set({**batches, self: writer} if batches else {self: writer})
+        try:
+            yield writer
+        finally:
+            # コンテキストを引き継いだタスクやスレッドが、コンテキストを抜けた後に書き込んだ内容が失われないよう閉じる
+            _batches.reset(token)
+            writer.closed = True
+            writer.flush()
+
+    def render_stream(self, source, chunk_size: int = 65536):
+        """
+        チャンクに分割されたマークアップを順に描画するジェネレータ。
+        チャンクの境界で分断されたタグは次のチャンクと結合して解析され、スタイルはチャンクをまたいで引き継がれる。
+        範囲が終了していないグラデーションは、一括で描画した場合と同じ色になるよう、範囲が終了するまで保留される。
+        保持するのは未完成のタグと、MAX_GRADIENT_LENGTH以下のグラデーションの範囲のみであるため、
+        入力の大きさに関わらずメモリ使用量は一定となる。
+        描画中のスタイルは呼び出しごとに独立して管理され、各チャンクの描画後にactive_stylesへ反映される。
+        開いているスコープは、描画の終了時にまとめて反映される。
+
+        Args:
+            source: 文字列のイテラブル、またはread()を持つテキストファイルオブジェクト。
+            chunk_size (int): ファイルオブジェクトから1回に読み込む文字数。
+
+        Yields:
+            str: 描画済みの文字列。
+        """
+        for rendered, runs in self._render_chunks(source, chunk_size):
+            yield rendered
+
+    def _render_chunks(self, source, chunk_size: int = 65536, collect: bool = False):
+        """
+        render_streamの本体。描画済みの文字列とともに、バックエンドへ渡すスタイルと文字列の組を生成する。
+
+        Args:
+            source: 文字列のイテラブル、またはread()を持つテキストファイルオブジェクト。
+            chunk_size (int): ファイルオブジェクトから1回に読み込む文字数。
+            collect (bool): Trueの場合、スタイルと文字列の組も求める。
+
+        Yields:
+            tuple: (描画済みの文字列, スタイルと文字列の組のタプル)。collectがFalseの場合、組はNone。
+        """
+        if hasattr(source, "read"):
+            source = iter(functools.partial(source.read, chunk_size), "")
+
+        # 同じプリンタで複数のストリームを同時に描画できるよう、描画中のスタイルは専用のインスタンスで管理する
+        state = self._renderer(self._color_depth)
+        default = current = state.style_state()
+        pending = ""
+        for chunk in source:
+            buffer = pending + chunk if pending else chunk
+            cut = incomplete_tail(buffer, self.MAX_TAG_LENGTH)
+            # グラデーションの範囲が終了していない場合は、開始タグから保留する（長すぎる場合はチャンクごとに適用する）
+            span = open_gradient(buffer, cut)
+            if span != -1 and cut - span <= self.MAX_GRADIENT_LENGTH:
+                cut = span
+            pending = buffer[cut:]
+
+            tokens = list(tokenize(buffer[:cut]))
+            # 末尾の「}」は次のチャンクの「}」とともにエスケープとなる可能性があるため保留する
+            # （保留する範囲がある場合、その先頭は「{」であるため、エスケープとはならない）
+            if cut == len(buffer) and tokens and tokens[-1][0] == TEXT and tokens[-1][1].endswith("}"):
+                tokens[-1] = (TEXT, tokens[-1][1][:-1])
+                pending = "}" + pending
+
+            segments = []
+            runs = [] if collect else None
+            current = state._render_tokens(tokens, segments, current, runs)
+            # チャンクごとにはスタイルのみを反映し、入れ子の深さに比例するスコープの複製は行わない
+            self.active_styles.restore(state.active_styles.snapshot())
+            if segments:
+                yield "".join(segments), None if runs is None else tuple(runs)
+
+        segments = []
+        runs = [] if collect else None
+        current = state._render_tokens(list(tokenize(pending)), segments, current, runs)
+        self.restore_state(state.save_state())
+        if current != default:
+            segments.append(state.reset)
+        if segments:
+            yield "".join(segments), None if runs is None else tuple(runs)
+
+    def stream(self, source, out=None, chunk_size: int = 65536):
+        """
+        チャンクに分割されたマークアップやファイルを、色付きで逐次出力する。
+
+        Args:
+            source: 文字列のイテラブル、またはread()を持つテキストファイルオブジェクト。
+            out: 出力先のファイルオブジェクト。Noneの場合はsys.stdout（バックエンドがある場合はすべてのバックエンド）。
+            chunk_size (int): ファイルオブジェクトから1回に読み込む文字数。
+        """
+        collect = out is None and self.backends is not None
+        for rendered, runs in self._render_chunks(source, chunk_size, collect):
+            self._output(out, rendered, runs=runs)
+
+    def enable_stats(self) -> "RenderStats":
+        """
+        print_with_colorとprint_manyの統計情報の集計を開始する。既に有効な場合は、集計中のものをそのまま返す。
+
+        Returns:
+            RenderStats: 集計結果。pre_renderとpost_renderにフックを追加できる。
+        """
+        if self.stats is None:
+            from .stats import RenderStats
+            self.stats = RenderStats()
+        return self.stats
+
+    def disable_stats(self):
+        """
+        統計情報の集計を終了する。
+        """
+        self.stats = None
+
+    def live(self, file=None) -> "LiveRegion":
+        """
+        前回の描画内容との差分のみを出力して再描画する、表示領域を作成する。
+
+        Args:
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+
+        Returns:
+            LiveRegion: 作成した表示領域。withブロックの終了時に、カーソルは領域の下へ移動する。
+        """
+        from .live import LiveRegion
+        return LiveRegion(self, file)
+
+    def table(self, header=None, align=None, sep: str = "  ", rule: str = "-", formats=None) -> "Table":
+        """
+        セルの表示幅を揃えて描画する表を作成する。
+
+        Args:
+            header (Iterable): 見出しの行のセル。Noneの場合は見出しを表示しない。
+            align (str | Iterable[str]): 列の揃え方（"left"、"right"、"center"）。列ごとに指定できる。
+            sep (str): 列の区切り文字列。
+            rule (str): 見出しの下に引く線の文字。None、空文字列、または表示幅が0の文字列の場合は線を引かない。
+            formats (Iterable[str]): 列ごとの%書式のテンプレート（例："{fore:green}%s{end}"）。Noneの列は書式を使用しない。
+
+        Returns:
+            Table: 作成した表。add_row()で行を追加し、print()で出力する。
+        """
+        from .table import Table
+        return Table(self, header, align, sep, rule, formats)
+
+    def print_columns(self, items, width: int = None, sep: str = "  ", file=None, flush: bool = False):
+        """
+        項目を、表示幅に収まる列数で並べて1回のwriteで出力する。
+
+        Args:
+            items (Iterable): 項目（マークアップ文字列、コンパイル済みのテンプレート、またはその他の値）。
+            width (int): 全体の表示幅。Noneの場合は端末の幅。
+            sep (str): 列の区切り文字列。
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+            flush (bool): Trueの場合、出力後に出力先をフラッシュする。
+        """
+        from .table import render_columns
+        self._output(file, render_columns(self, items, width, sep), flush)
+
+    def add_backend(self, backend):
+        """
+        出力先にバックエンドを追加する。
+        バックエンドが1つ以上ある場合、出力先を省略した出力（print_with_color、print_many、stream、表、表示領域など）は、
+        sys.stdoutの代わりにすべてのバックエンドへ出力される。batch()とバックグラウンド出力もそのまま使用できる。
+        出力先のファイルオブジェクトを指定した出力は、バックエンドを介さずにそのファイルへ書き込まれる。
+
+        Args:
+            backend (Backend): 追加するバックエンド。
+
+        Returns:
+            Backend: 追加したバックエンド。
+        """
+        if self.backends is None:
+            from .backends import BackendGroup
+            self.backends = BackendGroup()
+        self.backends.append(backend)
+        return backend
+
+    def remove_backend(self, backend):
+        """
+        バックエンドを出力先から取り除く。すべて取り除かれると、出力先を省略した出力はsys.stdoutへの出力に戻る。
+
+        Args:
+            backend (Backend): 取り除くバックエンド。
+
+        Raises:
+            ValueError: 追加されていないバックエンドが指定された場合。
+        """
+        if self.backends is None:
+            raise ValueError("backend is not added")
+        self.backends.remove(backend)
+        if not self.backends:
+            self.backends = None
+
+    def _output(self, file, data: str, flush: bool = False, runs: tuple = None):
+        """
+        描画済みの文字列を出力する。すべての出力はこのメソッドを介して行われる。
+        出力先が省略され、バックエンドがある場合は、スタイルと文字列の組をすべてのバックエンドへ出力する。
+        batch()のコンテキスト内ではバッファに蓄積し、それ以外は_emitで出力する。
+
+        Args:
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+            data (str): 出力する文字列。
+            flush (bool): Trueの場合、書き込み後に出力先をフラッシュする。
+            runs (tuple): dataに対応するスタイルと文字列の組。Noneの場合、バックエンドへはdataを変換して渡す。
+        """
+        if file is None and self.backends is not None:
+            file = self.backends
+            if runs is None:
+                from .ansi import ansi_spans
+                runs = tuple(ansi_spans(data, controls=True))
+            data = runs
+        batches = _batches.get()
+        batch = None if batches is None else batches.get(self)
+        if batch is None or batch.closed:
+            self._emit(file, data, flush)
+        else:
+            batch.write(data, file, flush)
+
+    def _emit(self, file, data: str, flush: bool = False):
+        """
+        描画済みの文字列を出力する。バックグラウンド出力中はキューに追加し、それ以外は直接書き込む。
+
+        Args:
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+            data (str): 出力する文字列。
+            flush (bool): Trueの場合、書き込み後に出力先をフラッシュする。
+        """
+        background = self._background
+        if background is None:
+            write_to(file, data, flush)
+        else:
+            background.write(file, data, flush)
+
+    def start_background(self, maxsize: int = 10000, overflow: str = BackgroundWriter.BLOCK) -> BackgroundWriter:
+        """
+        バックグラウンド出力を開始する。
+        以降のprint_with_colorは描画済みのメッセージをキューに追加するのみとなり、専用のスレッドが出力先へ書き込む。
+        キューの内容はstop_background()の呼び出し時、またはインタプリタの終了時に出力される。
+
+        Args:
+            maxsize (int): キューに保持するメッセージの最大数。1以上。
+            overflow (str): キューが満杯の場合の動作。"block"（待機）、"drop_oldest"（最も古いものを破棄）、"drop"（追加しようとしたものを破棄）のいずれか。
+
+        Returns:
+            BackgroundWriter: 開始した書き込みスレッド。stats()で統計情報を取得できる。
+        """
+        if self._background is not None:
+            return self._background
+        background = BackgroundWriter(maxsize, overflow)
+        background.start()
+        self._background = background
+        return background
+
+    def stop_background(self, timeout: float = None):
+        """
+        バックグラウンド出力を停止し、キューに残っている内容をすべて出力する。
+
+        Args:
+            timeout (float): 出力の完了を待機する最大の秒数。Noneの場合は完了するまで待機する。
+        """
+        background = self._background
+        if background is not None:
+            self._background = None
+            background.close(timeout)
+
+
+
+ColorPrinter._build_escape_tables()
+
+
+# set_default_printerで明示的に設定されたプロセス全体の既定プリンタ
+_default_printer = None
+# 未設定の場合にスレッドごとに生成される既定プリンタ（active_stylesをスレッド間で共有しないため）
+_thread_local = threading.local()
+
+
+def get_default_printer() -> ColorPrinter:
+    """
+    モジュールレベルのprint関数が使用する既定のColorPrinterを取得する。
+
+    Returns:
+        ColorPrinter: set_default_printerで設定されたプリンタ。未設定の場合は現在のスレッド専用のプリンタ。
+    """
+    if _default_printer is not None:
+        return _default_printer
+    printer = getattr(_thread_local, "printer", None)
+    if printer is None:
+        printer = _thread_local.printer = ColorPrinter()
+    return printer
+
+
+def set_default_printer(printer: ColorPrinter = None):
+    """
+    モジュールレベルのprint関数が使用する既定のColorPrinterを設定する。
+
+    Args:
+        printer (ColorPrinter): プロセス全体で使用するプリンタ。Noneを指定するとスレッドごとの既定プリンタに戻る。
+    """
+    global _default_printer
+    _default_printer = printer
 
 
 def print(text, *args, **kwargs):
@@ -190,4 +1507,4 @@ def print(text, *args, **kwargs):
         *args: print関数に渡す追加の引数。
         **kwargs: print関数に渡す追加のキーワード引数。
     """
-    ColorPrinter().print_with_color(text, *args, **kwargs)
+    get_default_printer().print_with_color(text, *args, **kwargs)
@@ -0,0 +1,305 @@
+import functools
+import os
+import sys
+
+# NumPyはblend_manyの初回呼び出し時に読み込む（インストールされていない場合はFalse）
+numpy = None
+
+# 出力する色の深さ
+TRUECOLOR = "truecolor"   # 24bitカラー（\033[38;2;r;g;bm）
+COLOR256 = "256"          # 256色パレット（\033[38;5;nm）
+COLOR16 = "16"            # 16色パレット（\033[31m など）
+NONE = "none"             # エスケープシーケンスを出力しない
+
+COLOR_DEPTHS = (TRUECOLOR, COLOR256, COLOR16, NONE)
+
+# FORCE_COLORの値と色の深さの対応
+_FORCE_COLOR_LEVELS: dict = {"1": COLOR16, "2": COLOR256, "3": TRUECOLOR}
+
+# 16色パレットの各色のRGB値（xtermの既定値）
+ANSI16_PALETTE: tuple = (
+    (  0,   0,   0), (205,   0,   0), (  0, 205,   0), (205, 205,   0),
+    (  0,   0, 238), (205,   0, 205), (  0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255,   0,   0), (  0, 255,   0), (255, 255,   0),
+    ( 92,  92, 255), (255,   0, 255), (  0, 255, 255), (255, 255, 255),
+)
+
+# 256色パレットの6x6x6の色立方体で使われる各チャンネルの値
+_CUBE_LEVELS: tuple = (0, 95, 135, 175, 215, 255)
+
+# チャンネルの値（0~255）から、最も近い色立方体の段階への対応表
+# 隣り合う段階の中間で区切り、等距離の場合は小さい方の段階とする（0~47、48~115、116~155、156~195、196~235、236~255）
+_CUBE_INDEX: tuple = (0,) * 48 + (1,) * 68 + (2,) * 40 + (3,) * 40 + (4,) * 40 + (5,) * 20
+
+
+def detect_color_depth(stream=None) -> str:
+    """
+    環境変数と出力先の端末から、出力できる色の深さを判定する。
+
+    FORCE_COLORが空でない値で設定されている場合は端末かどうかに関わらず色を出力する（"0"または"false"の場合は出力しない）。
+    空の場合は設定されていないものとして扱う。
+    値が"1"、"2"、"3"の場合は、それぞれ16色、256色、24bitカラーとなる。
+    NO_COLORが空でない値で設定されている場合は色を出力しない。
+
+    Args:
+        stream: 出力先のファイルオブジェクト、またはファイルディスクリプタ。Noneの場合はsys.stdout。
+
+    Returns:
+        str: TRUECOLOR、COLOR256、COLOR16、NONEのいずれか。
+    """
+    force_color = os.environ.get("FORCE_COLOR", "").strip().lower() or None
+    if force_color is not None:
+        if force_color in ("0", "false"):
+            return NONE
+        if force_color in _FORCE_COLOR_LEVELS:
+            return _FORCE_COLOR_LEVELS[force_color]
+    else:
+        if os.environ.get("NO_COLOR"):
+            return NONE
+
+        if stream is None:
+            stream = sys.stdout
+        if isinstance(stream, int):
+            if not os.isatty(stream):
+                return NONE
+        else:
+            isatty = getattr(stream, "isatty", None)
+            try:
+                if isatty is None or not isatty():
+                    return NONE
+            except ValueError:
+                # 閉じられたファイルの場合
+                return NONE
+
+    term = os.environ.get("TERM", "")
+    colorterm = os.environ.get("COLORTERM", "").lower()
+    if term == "dumb":
+        return NONE if force_color is None else COLOR16
+    if colorterm in ("truecolor", "24bit") or "direct" in term:
+        return TRUECOLOR
+    if "256color" in term:
+        return COLOR256
+    if not term and os.name == "nt":
+        # Windows 10以降のコンソールは24bitカラーに対応している
+        return TRUECOLOR
+    return COLOR16
+
+
+@functools.lru_cache(maxsize=4096)
+def nearest_256(r: int, g: int, b: int) -> int:
+    """
+    RGB値に最も近い256色パレットの番号を求める。
+
+    Args:
+        r (int): 赤の値。
+        g (int): 緑の値。
+        b (int): 青の値。
+
+    Returns:
+        int: 16~255のパレット番号。0~255の範囲外の値は、範囲内に収めてから変換する。
+    """
+    if not (0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255):
+        r, g, b = (min(255, max(0, channel)) for channel in (r, g, b))
+
+    # 色立方体の候補
+    ri, gi, bi = _CUBE_INDEX[r], _CUBE_INDEX[g], _CUBE_INDEX[b]
+    cr, cg, cb = _CUBE_LEVELS[ri], _CUBE_LEVELS[gi], _CUBE_LEVELS[bi]
+    cube_distance = (cr - r) ** 2 + (cg - g) ** 2 + (cb - b) ** 2
+
+    # グレースケールの候補（232~255、値は8~238）
+    gray_index = min(23, max(0, round(((r + g + b) / 3 - 8) / 10)))
+    gray = 8 + gray_index * 10
+    gray_distance = (gray - r) ** 2 + (gray - g) ** 2 + (gray - b) ** 2
+
+    if gray_distance < cube_distance:
+        return 232 + gray_index
+    return 16 + 36 * ri + 6 * gi + bi
+
+
+def palette_rgb(index: int) -> tuple:
+    """
+    256色パレットの番号に対応するRGB値を求める。nearest_256の逆変換。
+
+    Args:
+        index (int): 0~255のパレット番号。
+
+    Returns:
+        tuple: (r, g, b) のタプル。
+    """
+    if index < 16:
+        return ANSI16_PALETTE[index]
+    if index < 232:
+        index -= 16
+        return (_CUBE_LEVELS[index // 36], _CUBE_LEVELS[index // 6 % 6], _CUBE_LEVELS[index % 6])
+    gray = 8 + (index - 232) * 10
+    return (gray, gray, gray)
+
+
+@functools.lru_cache(maxsize=4096)
+def nearest_16(r: int, g: int, b: int) -> int:
+    """
+    RGB値に最も近い16色パレットの番号を求める。
+
+    Args:
+        r (int): 赤の値。
+        g (int): 緑の値。
+        b (int): 青の値。
+
+    Returns:
+        int: 0~15のパレット番号。
+    """
+    best, best_distance = 0, None
+    for index, (pr, pg, pb) in enumerate(ANSI16_PALETTE):
+        distance = (pr - r) ** 2 + (pg - g) ** 2 + (pb - b) ** 2
+        if best_distance is None or distance < best_distance:
+            best, best_distance = index, distance
+    return best
+
+
+def fore_escape(rgb: tuple, depth: str) -> str:
+    """
+    RGB値と色の深さから、前景色のANSIエスケープシーケンスを生成する。
+
+    Args:
+        rgb (tuple): (r, g, b) のタプル。
+        depth (str): 色の深さ。
+
+    Returns:
+        str: 前景色用のANSIエスケープシーケンス。NONEの場合は空文字列。
+    """
+    r, g, b = rgb
+    if depth == TRUECOLOR:
+        return f"\033[38;2;{r};{g};{b}m"
+    if depth == COLOR256:
+        return f"\033[38;5;{nearest_256(r, g, b)}m"
+    if depth == COLOR16:
+        index = nearest_16(r, g, b)
+        return f"\033[{30 + index if index < 8 else 82 + index}m"
+    return ""
+
+
+def back_escape(rgb: tuple, depth: str) -> str:
+    """
+    RGB値と色の深さから、背景色のANSIエスケープシーケンスを生成する。
+
+    Args:
+        rgb (tuple): (r, g, b) のタプル。
+        depth (str): 色の深さ。
+
+    Returns:
+        str: 背景色用のANSIエスケープシーケンス。NONEの場合は空文字列。
+    """
+    r, g, b = rgb
+    if depth == TRUECOLOR:
+        return f"\033[48;2;{r};{g};{b}m"
+    if depth == COLOR256:
+        return f"\033[48;5;{nearest_256(r, g, b)}m"
+    if depth == COLOR16:
+        index = nearest_16(r, g, b)
+        return f"\033[{40 + index if index < 8 else 92 + index}m"
+    return ""
+
+
+@functools.lru_cache(maxsize=4096)
+def blend(color: tuple, background: tuple) -> tuple:
+    """
+    RGBA値を背景色に重ねた結果の色を求める。
+    アルファ値は0~1で指定するが、1より大きい場合は0~255で指定されたものとみなす。
+
+    Args:
+        color (tuple): 重ねるRGBA値を含むタプル。
+        background (tuple): 背景色のRGB値またはRGBA値を含むタプル（アルファ値は無視される）。
+
+    Returns:
+        tuple: 合成後のRGBA値を含むタプル。アルファ値は1となる。
+    """
+    r, g, b, a = color
+    if a > 1:
+        a = a / 255
+    a = min(max(a, 0), 1)
+    br, bg, bb = background[:3]
+    return (
+        round(r * a + br * (1 - a)),
+        round(g * a + bg * (1 - a)),
+        round(b * a + bb * (1 - a)),
+        1,
+    )
+
+
+def blend_many(colors, background: tuple) -> list:
+    """
+    複数のRGBA値をまとめて背景色に重ねる。NumPyがインストールされている場合は一括で計算する。
+
+    Args:
+        colors (Iterable[tuple]): RGBA値を含むタプルのイテラブル。
+        background (tuple): 背景色のRGB値またはRGBA値を含むタプル（アルファ値は無視される）。
+
+    Returns:
+        list: 合成後のRGBA値を含むタプルのリスト。アルファ値は1となる。
+    """
+    global numpy
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:  # NumPyがない場合は純粋なPythonで処理する
+            numpy = False
+    if not numpy:
+        return [blend(tuple(color), background) for color in colors]
+
+    array = numpy.asarray(colors, dtype=float).reshape(-1, 4)
+    alpha = array[:, 3]
+    alpha = numpy.clip(numpy.where(alpha > 1, alpha / 255, alpha), 0, 1)[:, None]
+    rgb = numpy.rint(array[:, :3] * alpha + numpy.asarray(background[:3], dtype=float) * (1 - alpha))
+    return [(r, g, b, 1) for r, g, b in rgb.astype(int).tolist()]
+
+
+# interpolateの結果をキャッシュする最大の長さ（長いグラデーションの結果がキャッシュに溜まり続けないようにする）
+INTERPOLATE_CACHE_LENGTH: int = 1024
+
+
+def interpolate(stops: tuple, length: int) -> tuple:
+    """
+    複数の色を等間隔に配置し、指定された個数の色を線形補間で一括して求める。
+    同じ長さのグラデーションは繰り返し描画されることが多いため、長さがINTERPOLATE_CACHE_LENGTH以下の結果はキャッシュされる。
+
+    Args:
+        stops (tuple): 補間の基準となるRGBA値を含むタプルのタプル。
+        length (int): 求める色の個数（通常は文字数）。
+
+    Returns:
+        tuple: RGBA値を含むタプルのタプル。
+    """
+    if length > INTERPOLATE_CACHE_LENGTH:
+        return _interpolate(stops, length)
+    return _interpolate_cached(stops, length)
+
+
+def _interpolate(stops: tuple, length: int) -> tuple:
+    """
+    interpolateの本体。キャッシュを介さずに色を求める。
+    """
+    if length <= 0 or not stops:
+        return ()
+    if len(stops) == 1 or length == 1:
+        return (stops[0],) * length
+
+    segments = len(stops) - 1
+    scale = segments / (length - 1)
+    colors = []
+    for i in range(length):
+        position = i * scale
+        index = min(int(position), segments - 1)
+        t = position - index
+        r1, g1, b1, a1 = stops[index]
+        r2, g2, b2, a2 = stops[index + 1]
+        colors.append((
+            round(r1 + (r2 - r1) * t),
+            round(g1 + (g2 - g1) * t),
+            round(b1 + (b2 - b1) * t),
+            a1 if a1 == a2 else a1 + (a2 - a1) * t,
+        ))
+    return tuple(colors)
+
+
+# 長さがINTERPOLATE_CACHE_LENGTH以下の結果のみを保持するため、キャッシュ全体の大きさも制限される
+_interpolate_cached = functools.lru_cache(maxsize=256)(_interpolate)
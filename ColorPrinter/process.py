@@ -0,0 +1,235 @@
+import atexit
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import sys
+import threading
+
+from .main import ColorPrinter, set_default_printer
+from .palette import detect_color_depth
+from .writers import BatchWriter, _GroupedWriter, write_to
+
+
+class ProcessWriter(_GroupedWriter):
+    """
+    複数のプロセスの出力を、キューを介して親プロセスの1つのスレッドで書き込むクラス。
+    ワーカープロセスは描画済みのメッセージをキューへ送るのみで、端末へ書き込むのは親プロセスの書き込みスレッドのみとなる。
+    メッセージは途中で分割されずに書き込まれるため、異なるプロセスの出力がエスケープシーケンスの途中で混ざることはない。
+    ワーカープロセスではメッセージをBatchWriterに蓄積してまとめて送り、親プロセスでは溜まっているメッセージをまとめて取り出し、
+    同じ出力先への連続したメッセージを1回のwriteで書き込む。
+    ワーカープロセスで蓄積されたメッセージは、続けて書き込まれなくてもflush_interval秒後には送られる。
+
+    ProcessPoolExecutorやmultiprocessing.Poolのinitializerにattachを指定すると、
+    ワーカープロセスのモジュールレベルのprintは、このライターを介して出力される。
+    """
+
+    def __init__(self, color_depth: str = None, max_batch: int = 1024, max_bytes: int = 8192, flush_interval: float = 0.1,
+                 context=None, stdout=None, stderr=None):
+        """
+        ProcessWriterクラスの初期化メソッド。書き込み用のスレッドはstart()で開始される。
+
+        Args:
+            color_depth (str): ワーカープロセスで描画する色の深さ。Noneの場合は環境変数と親プロセスのsys.stdoutから判定する。
+            max_batch (int): 親プロセスで1回の書き込みにまとめる、キューから取り出したメッセージの最大数。
+            max_bytes (int): ワーカープロセスで蓄積してからキューへ送る最大の文字数。
+            flush_interval (float): ワーカープロセスで蓄積したメッセージを送るまでの最大の秒数。Noneの場合はmax_bytesに達するか、
+                flush()の呼び出し時、またはプロセスの終了時にのみ送る。
+            context: キューの作成に使用するmultiprocessingのコンテキスト、またはその名前。Noneの場合は既定のコンテキスト。
+            stdout: 親プロセスで標準出力の代わりに書き込む出力先。Noneの場合は書き込み時点のsys.stdout。
+            stderr: 親プロセスで標準エラー出力の代わりに書き込む出力先。Noneの場合は書き込み時点のsys.stderr。
+        """
+        if context is None or isinstance(context, str):
+            context = multiprocessing.get_context(context)
+        self.color_depth: str = color_depth if color_depth is not None else detect_color_depth()
+        self.max_batch: int = max_batch
+        self.max_bytes: int = max_bytes
+        self.flush_interval: float = flush_interval
+
+        # 統計情報
+        self.written: int = 0      # 書き込んだメッセージの数（ワーカープロセスでまとめて送られたものは1つと数える）
+        self.batches: int = 0      # 書き込んだ回数
+        self.max_depth: int = 0    # 1回にまとめたメッセージの最大数
+        self.errors: int = 0       # 書き込みに失敗したメッセージの数
+        self.last_error: Exception = None  # 最後に発生した書き込みのエラー
+
+        self._queue = context.Queue()
+        self._files: dict = {"stdout": stdout, "stderr": stderr}
+        self._thread: threading.Thread = None
+        self._closed: bool = False
+        # 親プロセスのプロセスID（forkで引き継がれた場合も、ワーカープロセスかどうかを判定できる）
+        self._pid: int = os.getpid()
+        self._batch: BatchWriter = None
+        self._batch_lock: threading.Lock = None
+        self._timer: threading.Timer = None
+
+    def __getstate__(self) -> dict:
+        # ワーカープロセスへはキューと送信の設定のみを渡す
+        return {
+            "color_depth": self.color_depth,
+            "max_bytes": self.max_bytes,
+            "flush_interval": self.flush_interval,
+            "_queue": self._queue,
+            "_pid": self._pid,
+        }
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._closed = False
+        self._thread = None
+        self._batch = None
+        self._batch_lock = None
+        self._timer = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def stats(self) -> dict:
+        """
+        統計情報を取得する。親プロセスでのみ有効。
+
+        Returns:
+            dict: written、batches、max_depth、errorsを含む辞書。
+        """
+        return {
+            "written": self.written,
+            "batches": self.batches,
+            "max_depth": self.max_depth,
+            "errors": self.errors,
+        }
+
+    def start(self):
+        """
+        親プロセスで書き込み用のスレッドを開始し、終了時にキューの内容を出力するようatexitに登録する。
+        """
+        if self._thread is not None or os.getpid() != self._pid:
+            return
+        self._thread = threading.Thread(target=self._run, name="ColorPrinter-process-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def attach(self, printer: ColorPrinter = None) -> ColorPrinter:
+        """
+        プリンタの出力を、このライターのキューへ送るよう設定する。
+        ワーカープロセスで呼び出すよう、ProcessPoolExecutorのinitializerに指定できる。
+
+        Args:
+            printer (ColorPrinter): 設定するプリンタ。Noneの場合は新しいプリンタを作成し、プロセスの既定プリンタとして登録する。
+
+        Returns:
+            ColorPrinter: 設定したプリンタ。
+        """
+        if printer is None:
+            printer = ColorPrinter(color_depth=self.color_depth)
+            set_default_printer(printer)
+        printer._background = self
+        return printer
+
+    def write(self, file, data: str, flush: bool = False):
+        """
+        文字列をキューへ送る。write_toと同じ引数を受け取る。
+        標準出力と標準エラー出力以外の出力先は、プロセス間で共有できないため呼び出し元で直接書き込む。
+
+        Args:
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+            data (str): 書き込む文字列。
+            flush (bool): 直接書き込む場合にのみ使用される。キューへ送ったメッセージは書き込みのたびにフラッシュされる。
+        """
+        if file is None or file is sys.stdout:
+            name = "stdout"
+        elif file is sys.stderr:
+            name = "stderr"
+        else:
+            write_to(file, data, flush)
+            return
+
+        if self._closed:
+            write_to(self._files[name] or getattr(sys, name), data, flush)
+        elif os.getpid() == self._pid:
+            if data:
+                self._queue.put((name, data))
+        else:
+            if self._batch is None:
+                self._batch_lock = threading.Lock()
+                self._batch = BatchWriter(self.max_bytes, self.flush_interval, self._send)
+                # プロセスの終了時（キューを閉じる前）に、蓄積されている内容を送る
+                multiprocessing.util.Finalize(self, self.flush, exitpriority=20)
+            with self._batch_lock:
+                batch = self._batch
+                batch.write(data, name, flush)
+                # 続けて書き込まれない場合も、蓄積した内容がflush_interval秒後に送られるようにする
+                if batch.pending and self._timer is None and self.flush_interval is not None:
+                    timer = self._timer = threading.Timer(self.flush_interval, self.flush)
+                    timer.daemon = True
+                    timer.start()
+
+    def flush(self):
+        """
+        ワーカープロセスで蓄積されているメッセージを、直ちにキューへ送る。
+        """
+        if self._batch is None:
+            return
+        with self._batch_lock:
+            timer = self._timer
+            if timer is not None:
+                self._timer = None
+                # タイマーのスレッドから呼び出された場合、cancelは何もしない
+                timer.cancel()
+            self._batch.flush()
+
+    def _send(self, name: str, data: str, flush: bool = False):
+        """
+        ワーカープロセスで蓄積されたメッセージをキューへ送る。BatchWriterから呼び出される。
+        """
+        if data:
+            self._queue.put((name, data))
+
+    def _run(self):
+        """
+        書き込み用のスレッドで実行され、キューの内容を出力先へ書き込む。
+        """
+        messages = self._queue
+        files = self._files
+        try:
+            while True:
+                items = [messages.get()]
+                while items[-1] is not None and len(items) < self.max_batch:
+                    try:
+                        items.append(messages.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = items[-1] is None
+                if stop:
+                    items.pop()
+
+                if items:
+                    self._write_items([(files[name] or getattr(sys, name), data, True) for name, data in items])
+                    self.batches += 1
+                    if len(items) > self.max_depth:
+                        self.max_depth = len(items)
+                if stop:
+                    return
+        finally:
+            # スレッドが予期せず終了した場合も、以降の親プロセスのメッセージは呼び出し元で直接書き込まれる
+            self._closed = True
+
+    def close(self, timeout: float = None):
+        """
+        親プロセスで、キューに残っている内容をすべて出力してから書き込み用のスレッドを終了する。
+        ワーカープロセスの出力は、ワーカープロセスの終了後（ProcessPoolExecutorのshutdown後など）に閉じることで、すべて出力される。
+        以降に親プロセスで書き込まれたメッセージは、呼び出し元のスレッドで直接書き込まれる。
+
+        Args:
+            timeout (float): スレッドの終了を待機する最大の秒数。Noneの場合は終了するまで待機する。
+        """
+        if os.getpid() != self._pid or self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            atexit.unregister(self.close)
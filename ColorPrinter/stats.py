@@ -0,0 +1,103 @@
+import threading
+import time
+
+
+class RenderStats:
+    """
+    ColorPrinterの描画と出力の統計情報を集計するクラス。
+    ColorPrinter.enable_stats()で有効にした場合のみ集計され、無効な場合の描画にはほとんど影響しない。
+
+    Attributes:
+        calls (int): print_with_colorとprint_manyの呼び出し回数。
+        tags_parsed (int): テンプレートのコンパイル時に解析したタグの数。
+        cache_hits (int): テンプレートキャッシュのヒット数。
+        cache_misses (int): テンプレートキャッシュのミス数（コンパイルした回数）。
+        bytes_written (int): 出力したバイト数（UTF-8）。
+        parse_time (float): 解析と描画に費やした時間（秒）。
+        write_time (float): 出力に費やした時間（秒）。
+        pre_render (list): 描画の前に printer, text を引数として呼び出される関数のリスト。
+        post_render (list): 出力の後に printer, rendered, stats を引数として呼び出される関数のリスト。
+    """
+
+    FIELDS = ("calls", "tags_parsed", "cache_hits", "cache_misses", "bytes_written", "parse_time", "write_time")
+
+    def __init__(self):
+        """
+        RenderStatsクラスの初期化メソッド。
+        """
+        self.pre_render: list = []
+        self.post_render: list = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        すべての集計値を0に戻す。フックは削除されない。
+        """
+        with self._lock:
+            self.calls = 0
+            self.tags_parsed = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.bytes_written = 0
+            self.parse_time = 0.0
+            self.write_time = 0.0
+
+    def snapshot(self) -> dict:
+        """
+        現在の集計値を辞書として取得する。
+
+        Returns:
+            dict: FIELDSの各項目をキーとする辞書。
+        """
+        with self._lock:
+            return {field: getattr(self, field) for field in self.FIELDS}
+
+    def begin(self, printer, text) -> tuple:
+        """
+        描画の開始を記録し、描画前のフックを呼び出す。
+
+        Args:
+            printer (ColorPrinter): 描画するプリンタ。
+            text: 描画するマークアップ文字列またはテンプレート。
+
+        Returns:
+            tuple: record()に渡す開始時の情報。
+        """
+        for hook in self.pre_render:
+            hook(printer, text)
+        info = printer.cache_info()
+        return (time.perf_counter(), info.hits, info.misses)
+
+    def record(self, printer, start: tuple, parsed: float, template, rendered: str):
+        """
+        描画と出力の結果を集計し、出力後のフックを呼び出す。
+        テンプレートキャッシュは共有されているため、複数のスレッドから同時に描画した場合、
+        キャッシュの集計には他のスレッドの分が含まれることがある。
+
+        Args:
+            printer (ColorPrinter): 描画したプリンタ。
+            start (tuple): begin()の戻り値。
+            parsed (float): 描画が完了した時刻（time.perf_counter()の値）。
+            template (ColorTemplate): 描画に使用したテンプレート。複数の場合はNone。
+            rendered (str): 出力した文字列。
+        """
+        finished = time.perf_counter()
+        started, hits, misses = start
+        info = printer.cache_info()
+        misses = info.misses - misses
+        tags = template.tags if misses and template is not None else 0
+        size = len(rendered) if rendered.isascii() else len(rendered.encode("utf-8"))
+        with self._lock:
+            self.calls += 1
+            self.tags_parsed += tags
+            self.cache_hits += info.hits - hits
+            self.cache_misses += misses
+            self.bytes_written += size
+            self.parse_time += parsed - started
+            self.write_time += finished - parsed
+        for hook in self.post_render:
+            hook(printer, rendered, self)
+
+    def __repr__(self) -> str:
+        return "RenderStats(%s)" % ", ".join("%s=%r" % item for item in self.snapshot().items())
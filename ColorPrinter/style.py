@@ -0,0 +1,239 @@
+import collections
+from collections.abc import MutableMapping
+
+# ColorPrinter.style_state()の形式で、スタイルが指定されていない状態
+DEFAULT_STYLE: tuple = (None, None, False, False, False)
+
+
+class StyleState(MutableMapping):
+    """
+    現在のスタイル（前景色、背景色、太字、斜字、下線）を保持するクラス。
+    属性は__slots__で固定されているため、辞書よりも少ないメモリで保持できる。
+    リセットやスナップショットからの復元は、新しいオブジェクトを作成せずにその場で行われる。
+    以前のactive_stylesとの互換性のため、辞書と同じ添字アクセス（styles["fore"]）にも対応する。
+    """
+
+    __slots__ = ("fore", "back", "bold", "italic", "underline")
+
+    # スタイル名（スナップショットのタプルの順序）
+    FIELDS: tuple = ("fore", "back", "bold", "italic", "underline")
+
+    # 既定のスタイルのスナップショット（色は未指定、装飾はなし）
+    DEFAULT: tuple = ("", "", False, False, False)
+
+    def __init__(self, snapshot: tuple = DEFAULT):
+        """
+        StyleStateクラスの初期化メソッド。
+
+        Args:
+            snapshot (tuple): 初期状態のスナップショット。省略した場合は既定のスタイル。
+        """
+        self.fore, self.back, self.bold, self.italic, self.underline = snapshot
+
+    def reset(self):
+        """
+        スタイルを既定の状態に戻す。
+        """
+        self.fore = ""
+        self.back = ""
+        self.bold = False
+        self.italic = False
+        self.underline = False
+
+    def snapshot(self) -> tuple:
+        """
+        現在のスタイルを、変更されないタプルとして取得する。
+
+        Returns:
+            tuple: (前景色, 背景色, 太字, 斜字, 下線) のタプル。ハッシュ可能なため、辞書のキーとしても使用できる。
+        """
+        return (self.fore, self.back, self.bold, self.italic, self.underline)
+
+    def restore(self, snapshot: tuple):
+        """
+        snapshot()で取得したスタイルを復元する。
+
+        Args:
+            snapshot (tuple): 復元するスナップショット。
+        """
+        self.fore, self.back, self.bold, self.italic, self.underline = snapshot
+
+    def update(self, updates=(), **kwargs):
+        """
+        辞書または (スタイル名, 値) のイテラブルでスタイルを更新する。
+
+        Raises:
+            KeyError: 存在しないスタイル名が指定された場合。
+        """
+        if hasattr(updates, "items"):
+            updates = updates.items()
+        for style, value in updates:
+            self[style] = value
+        for style, value in kwargs.items():
+            self[style] = value
+
+    def __getitem__(self, style: str):
+        if style not in self.FIELDS:
+            raise KeyError(style)
+        return getattr(self, style)
+
+    def __setitem__(self, style: str, value):
+        if style not in self.FIELDS:
+            raise KeyError(style)
+        setattr(self, style, value)
+
+    def __delitem__(self, style: str):
+        raise TypeError("styles cannot be deleted")
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __repr__(self) -> str:
+        return "StyleState(%s)" % ", ".join("%s=%r" % (style, getattr(self, style)) for style in self.FIELDS)
+
+
+class StyleStack:
+    """
+    タグで開かれたスタイルのスコープを管理するスタック。
+    スコープごとの (識別子, 変更したスタイルと変更前の値) と、スタイルごとの (識別子, 変更前の値) のスタックを保持するため、
+    {end}による最も内側のスコープの終了と、{end fore}による特定のスタイルの終了は、どちらも入れ子の深さに関わらずO(1)で行われる。
+    閉じられないタグが続いても大きくならないよう、開いているスコープがMAX_DEPTHを超えた場合は、
+    最も外側の2つのスコープを1つにまとめる。まとめたスコープを閉じると、両方のスコープで変更したスタイルが元に戻る。
+    """
+
+    __slots__ = ("scopes", "saved", "counter")
+
+    # 開いたままにできるスコープの最大数
+    MAX_DEPTH: int = 256
+
+    def __init__(self):
+        """
+        StyleStackクラスの初期化メソッド。
+        """
+        self.scopes: collections.deque = collections.deque()
+        self.saved: dict = {style: collections.deque() for style in StyleState.FIELDS}
+        self.counter: int = 0
+
+    def clear(self):
+        """
+        すべてのスコープを破棄する。
+        """
+        self.scopes.clear()
+        for stack in self.saved.values():
+            stack.clear()
+
+    def push(self, changes: list):
+        """
+        新しいスコープを開く。
+
+        Args:
+            changes (list): タグで変更したスタイルの (スタイル名, 変更前の値) のリスト。
+        """
+        self.counter += 1
+        identifier = self.counter
+        saved = self.saved
+        for style, value in changes:
+            saved[style].append((identifier, value))
+        self.scopes.append((identifier, tuple(changes)))
+        if len(self.scopes) > self.MAX_DEPTH:
+            self._merge_outermost()
+
+    def _merge_outermost(self):
+        """
+        最も外側のスコープを、その内側のスコープにまとめる。
+        各スタイルの変更前の値は、外側のスコープで変更する前の値とする。
+        """
+        scopes = self.scopes
+        saved = self.saved
+        outer, outer_changes = scopes.popleft()
+        inner, inner_changes = scopes[0]
+        changes = dict(inner_changes)
+        for style, value in outer_changes:
+            stack = saved[style]
+            # {end fore}などで既に閉じられたスタイルは、スタックに残っていない
+            if not stack or stack[0][0] != outer:
+                continue
+            stack.popleft()
+            if stack and stack[0][0] == inner:
+                stack.popleft()
+            stack.appendleft((inner, value))
+            changes[style] = value
+        scopes[0] = (inner, tuple(changes.items()))
+
+    def pop(self, state: StyleState) -> bool:
+        """
+        まだ閉じられていない最も内側のスコープを閉じ、そのスコープで変更したスタイルを変更前の値に戻す。
+        {end fore}などで既にすべてのスタイルが閉じられたスコープは読み飛ばす。
+
+        Args:
+            state (StyleState): 値を戻すスタイル。
+
+        Returns:
+            bool: スコープを閉じた場合はTrue。開いているスコープがない場合はFalse。
+        """
+        scopes = self.scopes
+        saved = self.saved
+        while scopes:
+            identifier, changes = scopes.pop()
+            closed = False
+            for style, value in changes:
+                stack = saved[style]
+                if stack and stack[-1][0] == identifier:
+                    setattr(state, style, stack.pop()[1])
+                    closed = True
+            if closed:
+                return True
+        return False
+
+    def close(self, state: StyleState, style: str):
+        """
+        指定されたスタイルを変更した最も内側のスコープについて、そのスタイルのみを変更前の値に戻す。
+        そのスタイルを変更したスコープがない場合は、既定の値に戻す。
+
+        Args:
+            state (StyleState): 値を戻すスタイル。
+            style (str): 閉じるスタイル名。
+        """
+        stack = self.saved[style]
+        if stack:
+            setattr(state, style, stack.pop()[1])
+        else:
+            setattr(state, style, StyleState.DEFAULT[StyleState.FIELDS.index(style)])
+
+        # すべてのスタイルが閉じられたスコープがスタックの先頭に残らないよう取り除く
+        scopes = self.scopes
+        saved = self.saved
+        while scopes:
+            identifier, changes = scopes[-1]
+            if any(saved[name] and saved[name][-1][0] == identifier for name, value in changes):
+                break
+            scopes.pop()
+
+    def snapshot(self) -> tuple:
+        """
+        スタックの状態をタプルとして取得する。入れ子の深さに比例する時間がかかる。
+
+        Returns:
+            tuple: restore()に渡すことができるハッシュ可能なタプル。
+        """
+        return (tuple(self.scopes), tuple(tuple(self.saved[style]) for style in StyleState.FIELDS), self.counter)
+
+    def restore(self, snapshot: tuple):
+        """
+        snapshot()で取得した状態を復元する。
+
+        Args:
+            snapshot (tuple): 復元するスナップショット。
+        """
+        scopes, saved, self.counter = snapshot
+        self.scopes.clear()
+        self.scopes.extend(scopes)
+        for style, stack in zip(StyleState.FIELDS, saved):
+            self.saved[style].clear()
+            self.saved[style].extend(stack)
+
+    def __len__(self) -> int:
+        return len(self.scopes)
@@ -0,0 +1,272 @@
+import functools
+import itertools
+
+from .lexer import strip_markup
+
+# 揃え方ごとの、余白の文字数から (左の余白, 右の余白) を求める関数
+_ALIGNMENTS = {
+    "left": lambda space: (0, space),
+    "right": lambda space: (space, 0),
+    "center": lambda space: (space // 2, space - space // 2),
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def char_width(char: str) -> int:
+    """
+    1文字の端末上での表示幅を求める。
+
+    Args:
+        char (str): 1文字の文字列。
+
+    Returns:
+        int: 全角文字は2、結合文字や書式制御文字は0、それ以外は1。
+    """
+    import unicodedata
+    if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf"):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+def display_width(text: str) -> int:
+    """
+    エスケープシーケンスやタグを含まない文字列の、端末上での表示幅を求める。
+    東アジアの全角文字は2桁、結合文字や書式制御文字は0桁として数える。
+
+    Args:
+        text (str): 表示幅を求める文字列。
+
+    Returns:
+        int: 表示幅（桁数）。
+    """
+    if text.isascii():
+        return len(text)
+    return sum(map(char_width, text))
+
+
+class Table:
+    """
+    マークアップを含むセルを、表示幅を揃えて表形式で描画するクラス。
+    各セルの表示幅は1回だけ求められ、マークアップ文字列のセルはコンパイル済みテンプレートに保存された表示幅を再利用する。
+    マークアップ文字列以外の値はstr()で変換され、波カッコはタグとして解析されない。
+    列ごとに%書式のテンプレートを指定すると、その列のセルの値はコンパイル済みのテンプレートに埋め込まれるため、
+    値ごとにコンパイルされることはない。
+    表全体は1つの文字列として描画され、1回のwriteで出力される。
+    """
+
+    def __init__(self, printer, header=None, align=None, sep: str = "  ", rule: str = "-", formats=None):
+        """
+        Tableクラスの初期化メソッド。
+
+        Args:
+            printer (ColorPrinter): セルの描画に使用するプリンタ。
+            header (Iterable): 見出しの行のセル。Noneの場合は見出しを表示しない。
+            align (str | Iterable[str]): 列の揃え方（"left"、"right"、"center"）。列ごとに指定できる。Noneの場合は左揃え。
+            sep (str): 列の区切り文字列。
+            rule (str): 見出しの下に引く線の文字。None、空文字列、または表示幅が0の文字列の場合は線を引かない。
+            formats (Iterable[str]): 列ごとの%書式のテンプレート（例："{fore:green}%s{end}"）。Noneの列は書式を使用しない。
+
+        Raises:
+            ValueError: alignに無効な揃え方が指定された場合。
+        """
+        self.printer = printer
+        self.sep: str = sep
+        self.rule: str = rule
+        self.align: tuple = ()
+        self.formats: tuple = None  # 列ごとの (描画済みの書式, タグを取り除いた書式)
+        self.header: tuple = None
+        self.rows: list = []  # 各行の (描画済みの文字列, 表示幅) のタプル
+        if align is not None:
+            self.set_align(align)
+        if formats is not None:
+            self.set_formats(formats)
+        if header is not None:
+            measure = self.measure
+            self.header = tuple([measure(cell) for cell in header])
+
+    def set_align(self, align):
+        """
+        列の揃え方を設定する。
+
+        Args:
+            align (str | Iterable[str]): すべての列に共通の揃え方、または列ごとの揃え方。
+
+        Raises:
+            ValueError: 無効な揃え方が指定された場合。
+        """
+        align = (align,) if isinstance(align, str) else tuple(align)
+        for value in align:
+            if value not in _ALIGNMENTS:
+                raise ValueError(f"align must be one of {tuple(_ALIGNMENTS)}: {value!r}")
+        self.align = align
+
+    def set_formats(self, formats):
+        """
+        列ごとの%書式のテンプレートを設定する。テンプレートはここで1回だけコンパイルされる。
+
+        Args:
+            formats (Iterable[str]): 列ごとのテンプレート。Noneの列は書式を使用しない。
+        """
+        self.formats = tuple(
+            None if source is None else (self.printer.template(source).text, strip_markup(source))
+            for source in formats
+        )
+
+    def measure(self, cell) -> tuple:
+        """
+        セルを描画し、表示幅を求める。
+
+        Args:
+            cell: マークアップ文字列、コンパイル済みのテンプレート、またはその他の値。
+
+        Returns:
+            tuple: (描画済みの文字列, 表示幅)。
+        """
+        if isinstance(cell, str):
+            # タグを含まない文字列は、コンパイルせずにそのまま使用する
+            if "{" not in cell and "}" not in cell:
+                return (cell, display_width(cell))
+        elif not hasattr(cell, "source"):
+            text = str(cell)
+            return (text, display_width(text))
+        template = self.printer.template(cell)
+        return (template.text, template.width)
+
+    def measure_row(self, cells) -> tuple:
+        """
+        行のすべてのセルを描画し、表示幅を求める。
+
+        Args:
+            cells (Iterable): 行のセル。
+
+        Returns:
+            tuple: 各セルの (描画済みの文字列, 表示幅) のタプル。
+        """
+        measure = self.measure
+        formats = self.formats
+        if formats is None:
+            return tuple([measure(cell) for cell in cells])
+
+        row = []
+        for index, cell in enumerate(cells):
+            compiled = formats[index] if index < len(formats) else None
+            if compiled is None:
+                row.append(measure(cell))
+            else:
+                text, plain = compiled
+                row.append((text % (cell,), display_width(plain % (cell,))))
+        return tuple(row)
+
+    def add_row(self, *cells):
+        """
+        行を追加する。
+
+        Args:
+            *cells: 行のセル。
+        """
+        self.rows.append(self.measure_row(cells))
+
+    def add_rows(self, rows):
+        """
+        複数の行をまとめて追加する。
+
+        Args:
+            rows (Iterable[Iterable]): 各行のセルのイテラブル。
+        """
+        measure_row = self.measure_row
+        self.rows.extend([measure_row(cells) for cells in rows])
+
+    def widths(self) -> list:
+        """
+        各列の幅（その列のセルの表示幅の最大値）を求める。
+
+        Returns:
+            list: 列ごとの幅。
+        """
+        rows = self.rows if self.header is None else itertools.chain((self.header,), self.rows)
+        widths = []
+        for row in rows:
+            if len(row) > len(widths):
+                widths.extend([0] * (len(row) - len(widths)))
+            for index, (text, width) in enumerate(row):
+                if width > widths[index]:
+                    widths[index] = width
+        return widths
+
+    def render(self) -> str:
+        """
+        表全体を描画する。
+
+        Returns:
+            str: 各行の末尾に改行を含む、描画済みの文字列。行がない場合は空文字列。
+        """
+        widths = self.widths()
+        if not widths:
+            return ""
+        align = self.align or ("left",)
+        padders = [_ALIGNMENTS[align[min(index, len(align) - 1)]] for index in range(len(widths))]
+        last = len(widths) - 1
+        sep = self.sep
+
+        lines = []
+        append = lines.append
+
+        def render_row(row):
+            parts = []
+            for index, (text, width) in enumerate(row):
+                left, right = padders[index](widths[index] - width)
+                # 行末の余白は出力しない
+                if index == len(row) - 1:
+                    right = 0
+                parts.append(" " * left + text + " " * right if left or right else text)
+            append(sep.join(parts))
+
+        if self.header is not None:
+            render_row(self.header)
+            rule_width = display_width(self.rule) if self.rule else 0
+            if rule_width:
+                total = sum(widths) + display_width(sep) * last
+                append(self.rule * (total // rule_width))
+        for row in self.rows:
+            render_row(row)
+        lines.append("")
+        return "\n".join(lines)
+
+    def print(self, file=None, flush: bool = False):
+        """
+        表全体を描画し、1回のwriteで出力する。
+
+        Args:
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+            flush (bool): Trueの場合、出力後に出力先をフラッシュする。
+        """
+        self.printer._output(file, self.render(), flush)
+
+
+def render_columns(printer, items, width: int = None, sep: str = "  ") -> str:
+    """
+    項目を、表示幅に収まる列数で上から下、左から右の順に並べて描画する。
+
+    Args:
+        printer (ColorPrinter): 項目の描画に使用するプリンタ。
+        items (Iterable): 項目（マークアップ文字列、コンパイル済みのテンプレート、またはその他の値）。
+        width (int): 全体の表示幅。Noneの場合は端末の幅。
+        sep (str): 列の区切り文字列。
+
+    Returns:
+        str: 各行の末尾に改行を含む、描画済みの文字列。項目がない場合は空文字列。
+    """
+    table = Table(printer, sep=sep)
+    cells = [table.measure(item) for item in items]
+    if not cells:
+        return ""
+    if width is None:
+        import shutil
+        width = shutil.get_terminal_size().columns
+
+    column = max(cell_width for text, cell_width in cells)
+    gap = display_width(sep)
+    count = max(1, (width + gap) // (column + gap))
+    height = -(-len(cells) // count)
+    table.rows = [tuple(cells[index::height]) for index in range(height)]
+    return table.render()
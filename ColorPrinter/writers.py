@@ -0,0 +1,341 @@
+import atexit
+import collections
+import itertools
+import sys
+import threading
+import time
+
+# 複数のスレッドから同じ出力先へ書き込む際に、メッセージが混ざらないようにするためのロック
+# （バックエンドはwrite_toの中から書き込むため、同じスレッドから再び取得できるRLockとする）
+_write_lock = threading.RLock()
+
+
+def output_lock():
+    """
+    write_toが出力先への書き込みに使用するロックを取得する。
+    独自の出力先やバックエンドで、print_with_colorなどの出力と混ざらないように書き込む場合に使用する。
+    同じスレッドからは重ねて取得できる。
+
+    Returns:
+        threading.RLock: withで使用できるロック。
+    """
+    return _write_lock
+
+
+def _join(parts: list):
+    """
+    出力する内容のリストを結合する。
+    文字列は1つの文字列に、バックエンドへ出力するスタイルと文字列の組のタプルは1つのタプルに結合する。
+    """
+    if isinstance(parts[0], str):
+        return "".join(parts)
+    return tuple(itertools.chain.from_iterable(parts))
+
+
+def _length(data) -> int:
+    """
+    出力する内容の文字数を求める。
+    """
+    if isinstance(data, str):
+        return len(data)
+    return sum([len(text) for style, text in data])
+
+
+def write_to(file, data: str, flush: bool = False):
+    """
+    文字列を1回のwriteで出力先に書き込む。書き込みはスレッド間で排他され、メッセージ単位で不可分となる。
+    出力先がColorPrinterのバックエンドの場合、dataはスタイルと文字列の組のタプルとなる。
+
+    Args:
+        file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+        data (str | tuple): 書き込む文字列。
+        flush (bool): Trueの場合、書き込み後に出力先をフラッシュする。
+    """
+    if file is None:
+        file = sys.stdout
+        if file is None:
+            return
+    with _write_lock:
+        if data:
+            file.write(data)
+        if flush:
+            file.flush()
+
+
+class BatchWriter:
+    """
+    描画済みの文字列をバッファに蓄積し、まとめて1回のwriteで出力するクラス。
+    ColorPrinter.batch()のコンテキスト内でprint_with_colorから使用される。
+    バッファはコンテキスト（スレッドやタスク）ごとに作成されるため、スレッド間で共有されない。
+    """
+
+    def __init__(self, max_bytes: int = 65536, flush_interval: float = None, write=write_to):
+        """
+        BatchWriterクラスの初期化メソッド。
+
+        Args:
+            max_bytes (int): バッファに蓄積する最大の文字数。これを超えると出力される。
+            flush_interval (float): 前回の出力からこの秒数が経過していれば、次の書き込み時に出力される。Noneの場合は時間による出力を行わない。
+            write: バッファの内容を出力する関数。write_toと同じ引数を受け取る。
+        """
+        self.max_bytes: int = max_bytes
+        self.flush_interval: float = flush_interval
+        self._write = write
+        self._parts: list = []
+        self._size: int = 0
+        self._file = None
+        self._last_flush: float = time.monotonic()
+        self.closed: bool = False  # batch()のコンテキストを抜けた後はTrueとなり、以降の書き込みはバッファに蓄積されない
+
+    def write(self, text: str, file=None, flush: bool = False):
+        """
+        文字列をバッファに追加し、必要であれば出力する。
+
+        Args:
+            text (str): 出力する文字列。
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+            flush (bool): Trueの場合、バッファの内容を直ちに出力し、出力先もフラッシュする。
+        """
+        if file is None:
+            file = sys.stdout
+            if file is None:
+                return
+
+        # 閉じられた後の書き込み（コンテキストを引き継いだタスクやスレッドからの出力）は、バッファを介さずに出力する
+        if self.closed:
+            self._write(file, text, flush)
+            return
+
+        # 出力先が変わった場合、出力順序を保つため先にバッファの内容を出力する
+        if file is not self._file:
+            self.flush()
+            self._file = file
+
+        self._parts.append(text)
+        self._size += _length(text)
+
+        if flush:
+            self.flush(flush=True)
+        elif self._size >= self.max_bytes or (
+            self.flush_interval is not None
+            and time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self, flush: bool = False):
+        """
+        バッファに蓄積された文字列を1回のwriteで出力する。
+
+        Args:
+            flush (bool): Trueの場合、出力後に出力先もフラッシュする。
+        """
+        if self._parts:
+            data = _join(self._parts)
+            self._parts.clear()
+            self._size = 0
+            self._write(self._file, data, flush)
+        self._last_flush = time.monotonic()
+
+    @property
+    def pending(self) -> bool:
+        """
+        バッファに出力されていない内容があるかどうか。
+        """
+        return bool(self._parts)
+
+
+class _GroupedWriter:
+    """
+    キューから取り出したメッセージを、出力先ごとにまとめて書き込む書き込みスレッドの共通部分。
+    書き込んだメッセージの数はwritten、失敗したメッセージの数はerrors、最後のエラーはlast_errorに記録され、
+    書き込みスレッドは以降のメッセージの出力を続ける。これらの属性は継承先の初期化メソッドで作成する。
+    """
+
+    def _write_items(self, items: list):
+        """
+        (出力先, 文字列, フラッシュするかどうか) のタプルのリストを、同じ出力先への連続したメッセージごとに1回のwriteで書き込む。
+
+        Args:
+            items (list): 書き込むメッセージのリスト。
+        """
+        file, parts, flush = items[0][0], [], False
+        for item_file, data, item_flush in items:
+            if item_file is not file:
+                self._write(file, parts, flush)
+                file, parts, flush = item_file, [], False
+            parts.append(data)
+            flush = flush or item_flush
+        self._write(file, parts, flush)
+
+    def _write(self, file, parts: list, flush: bool):
+        """
+        同じ出力先へのメッセージを1回のwriteで書き込む。
+        書き込みに失敗した場合（閉じられたファイルやEPIPEなど）はエラーを記録し、例外は送出しない。
+
+        Args:
+            file: 出力先のファイルオブジェクト。
+            parts (list): 書き込むメッセージのリスト。
+            flush (bool): Trueの場合、書き込み後に出力先をフラッシュする。
+        """
+        try:
+            write_to(file, _join(parts), flush)
+        except Exception as error:
+            self.errors += len(parts)
+            self.last_error = error
+        else:
+            self.written += len(parts)
+
+
+class BackgroundWriter(_GroupedWriter):
+    """
+    描画済みの文字列を有界のキューに追加し、専用のスレッドで出力先へ書き込むクラス。
+    呼び出し元は端末やパイプへの書き込みを待たずに処理を続けられる。
+    """
+
+    # キューが満杯の場合の動作
+    BLOCK = "block"               # 空きができるまで待機する
+    DROP_OLDEST = "drop_oldest"   # 最も古いメッセージを破棄して追加する
+    DROP = "drop"                 # 追加しようとしたメッセージを破棄し、破棄した数を数える
+
+    def __init__(self, maxsize: int = 10000, overflow: str = BLOCK):
+        """
+        BackgroundWriterクラスの初期化メソッド。書き込み用のスレッドはstart()で開始される。
+
+        Args:
+            maxsize (int): キューに保持するメッセージの最大数。1以上。
+            overflow (str): キューが満杯の場合の動作。"block"、"drop_oldest"、"drop"のいずれか。
+
+        Raises:
+            ValueError: maxsizeが1未満、またはoverflowが無効な値の場合。
+        """
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1: {maxsize!r}")
+        if overflow not in (self.BLOCK, self.DROP_OLDEST, self.DROP):
+            raise ValueError(f"overflow must be 'block', 'drop_oldest' or 'drop': {overflow!r}")
+        self.maxsize: int = maxsize
+        self.overflow: str = overflow
+
+        # 統計情報
+        self.written: int = 0      # 出力したメッセージの数
+        self.dropped: int = 0      # 破棄したメッセージの数
+        self.errors: int = 0       # 書き込みに失敗したメッセージの数
+        self.max_depth: int = 0    # キューに溜まったメッセージの最大数
+        self.last_error: Exception = None  # 最後に発生した書き込みのエラー
+
+        self._queue: collections.deque = collections.deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed: bool = False
+        self._thread: threading.Thread = None
+
+    @property
+    def depth(self) -> int:
+        """
+        キューに溜まっているメッセージの数。
+        """
+        return len(self._queue)
+
+    def stats(self) -> dict:
+        """
+        統計情報を取得する。
+
+        Returns:
+            dict: depth（現在のキューの長さ）、max_depth、written、dropped、errorsを含む辞書。
+        """
+        return {
+            "depth": len(self._queue),
+            "max_depth": self.max_depth,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+    def start(self):
+        """
+        書き込み用のスレッドを開始し、終了時にキューの内容を出力するようatexitに登録する。
+        """
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="ColorPrinter-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, file, data: str, flush: bool = False):
+        """
+        文字列をキューに追加する。write_toと同じ引数を受け取る。
+        停止後に呼び出された場合は、呼び出し元のスレッドで直接書き込む。
+
+        Args:
+            file: 出力先のファイルオブジェクト。Noneの場合はsys.stdout。
+            data (str): 書き込む文字列。
+            flush (bool): Trueの場合、書き込み後に出力先をフラッシュする。
+        """
+        # sys.stdoutの差し替えに追従するため、出力先は追加時点で決定する
+        if file is None:
+            file = sys.stdout
+            if file is None:
+                return
+
+        with self._lock:
+            if self._closed:
+                write_to(file, data, flush)
+                return
+
+            queue = self._queue
+            while len(queue) >= self.maxsize:
+                if self.overflow == self.BLOCK:
+                    self._not_full.wait()
+                    if self._closed:
+                        write_to(file, data, flush)
+                        return
+                elif self.overflow == self.DROP_OLDEST:
+                    queue.popleft()
+                    self.dropped += 1
+                else:
+                    self.dropped += 1
+                    return
+
+            queue.append((file, data, flush))
+            if len(queue) > self.max_depth:
+                self.max_depth = len(queue)
+            self._not_empty.notify()
+
+    def _run(self):
+        """
+        書き込み用のスレッドで実行され、キューの内容を出力先へ書き込む。
+        溜まっているメッセージはまとめて取り出し、同じ出力先への連続したメッセージは1回のwriteで書き込む。
+        """
+        queue = self._queue
+        try:
+            while True:
+                with self._lock:
+                    while not queue and not self._closed:
+                        self._not_empty.wait()
+                    if not queue:
+                        return
+                    items = list(queue)
+                    queue.clear()
+                    self._not_full.notify_all()
+
+                self._write_items(items)
+        finally:
+            # スレッドが予期せず終了した場合も、以降のメッセージは呼び出し元で直接書き込まれ、待機中の呼び出し元は再開する
+            with self._lock:
+                self._closed = True
+                self._not_full.notify_all()
+
+    def close(self, timeout: float = None):
+        """
+        新たなメッセージの受け付けを停止し、キューに残っている内容をすべて出力してからスレッドを終了する。
+
+        Args:
+            timeout (float): スレッドの終了を待機する最大の秒数。Noneの場合は終了するまで待機する。
+        """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            atexit.unregister(self.close)
@@ -0,0 +1,90 @@
+"""
+エスケープシーケンスを含む文字列の解析（ansi_spans、ansi_to_markup、strip_ansi、visible_len、truncate_visible）の速度を計測するベンチマーク。
+
+--fileを指定しない場合は、24bitカラー、256色、16色で描画したログ形式の行を生成して使用する。
+他のツールの出力を保存したファイル（例：ls --color=always > captured.log）を指定することもできる。
+ファイル全体を1つの文字列として処理する場合と、1行ずつ処理する場合の処理速度（MB/s）を表示する。
+
+使用例:
+    python benchmarks/bench_ansi.py
+    python benchmarks/bench_ansi.py --file captured.log --repeat 5
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ColorPrinter import ColorPrinter, ansi_spans, ansi_to_markup, strip_ansi, truncate_visible, visible_len  # noqa: E402
+
+# 生成するログの各行のマークアップ
+LINES = (
+    "{fore:gray}2024-01-01 12:00:%02d{end} {fore:green}INFO{end}  request handled in {bold}%d{end} ms",
+    "{fore:gray}2024-01-01 12:00:%02d{end} {fore:yellow, bold}WARN{end}  slow query: {underline}SELECT * FROM t{end} (%d ms)",
+    "{fore:gray}2024-01-01 12:00:%02d{end} {fore:red, bold}ERROR{end} {back:red, fore:white}失敗しました{end} code=%d",
+    "{fore:gray}2024-01-01 12:00:%02d{end} {gradient:red, blue}progress bar ==========>{end} %d%%",
+)
+
+
+def generate(lines: int) -> str:
+    """
+    3種類の色の深さで描画した、ログ形式の文字列を生成する。
+    """
+    printers = [ColorPrinter(color_depth=depth) for depth in ("truecolor", "256", "16")]
+    rendered = []
+    for index in range(lines):
+        printer = printers[index % len(printers)]
+        rendered.append(printer.template(LINES[index % len(LINES)] % (index % 60, index)).text)
+    return "\n".join(rendered) + "\n"
+
+
+def measure(function, argument, repeat: int) -> float:
+    """
+    関数をrepeat回実行し、最も短い時間を返す。
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="エスケープシーケンスの解析のベンチマーク")
+    parser.add_argument("--file", help="解析するファイル。省略した場合はログ形式の行を生成する")
+    parser.add_argument("--lines", type=int, default=50000, help="生成する行数")
+    parser.add_argument("--width", type=int, default=40, help="truncate_visibleで切り詰める表示幅")
+    parser.add_argument("--repeat", type=int, default=3, help="計測を繰り返す回数（最も短い時間を採用する）")
+    args = parser.parse_args(argv)
+
+    if args.file:
+        with open(args.file, encoding="utf-8", errors="replace") as file:
+            text = file.read()
+    else:
+        text = generate(args.lines)
+    lines = text.splitlines()
+    size = len(text.encode("utf-8")) / 1e6
+
+    cases = (
+        ("ansi_spans", "whole", ansi_spans, text),
+        ("ansi_to_markup", "whole", ansi_to_markup, text),
+        ("strip_ansi", "whole", strip_ansi, text),
+        ("visible_len", "whole", visible_len, text),
+        ("ansi_spans", "lines", lambda lines: [ansi_spans(line) for line in lines], lines),
+        ("visible_len", "lines", lambda lines: [visible_len(line) for line in lines], lines),
+        ("truncate_visible", "lines", lambda lines: [truncate_visible(line, args.width, "…") for line in lines], lines),
+    )
+
+    sys.stdout.write("input: %d lines, %.2f MB\n" % (len(lines), size))
+    header = "%-17s %-6s %10s %10s" % ("function", "input", "time (s)", "MB/s")
+    sys.stdout.write(header + "\n" + "-" * len(header) + "\n")
+    for name, mode, function, argument in cases:
+        elapsed = measure(function, argument, args.repeat)
+        sys.stdout.write("%-17s %-6s %10.3f %10.1f\n" % (name, mode, elapsed, size / elapsed))
+
+
+if __name__ == "__main__":
+    main()
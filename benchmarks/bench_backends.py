@@ -0,0 +1,114 @@
+"""
+出力先のバックエンドごとに、1秒あたりに出力できるメッセージ数を計測するベンチマーク。
+
+マークアップの解析はテンプレートのコンパイル時に1回のみ行われ、すべてのバックエンドは同じスタイルと文字列の組を受け取る。
+fanoutで複数のバックエンドへ同時に出力しても、解析の回数が増えないことを確認できる。
+  text:    バックエンドを使用せず、描画済みの文字列をio.StringIOへ書き込む（以前の出力方法）
+  null:    NullBackend（出力を破棄し、文字数のみを数える）
+  bytes:   BytesBackend（bytearrayへエンコード済みのバイト列を蓄積する）
+  fd:      FdBackend（os.devnullのファイルディスクリプタへos.writeで書き込む）
+  html:    HtmlBackend（span要素のHTMLをio.StringIOへ書き込む）
+  fanout:  null、bytes、htmlの3つへ同時に出力する
+  batch:   BytesBackendへ、batch()内で出力する
+  many:    BytesBackendへ、print_manyで100行ずつ出力する（描画済みの文字列をansi_spansで変換する）
+
+使用例:
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --messages 100000 --cases null,fanout
+"""
+import argparse
+import io
+import os
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ColorPrinter import BytesBackend, ColorPrinter, FdBackend, HtmlBackend, NullBackend  # noqa: E402
+
+CASES = ("text", "null", "bytes", "fd", "html", "fanout", "batch", "many")
+
+# 出力するメッセージ（順に繰り返す）
+MESSAGES = (
+    "{fore:red, bold}ERROR{end} connection refused: {underline}db-01{end}",
+    "{fore:green}OK{end} request <GET /index.html> took {bold}12{end} ms",
+    "{fore:yellow}WARN{end} {italic}retrying{end} in {back:blue}5{end} seconds",
+    "plain message without tags",
+    "{gradient:cyan:magenta}progress{end} [{fore:green}####{end}      ]",
+)
+
+
+def run_case(case: str, messages: int) -> dict:
+    """
+    1つのケースを計測する。
+
+    Returns:
+        dict: 計測結果。
+    """
+    printer = ColorPrinter(color_depth="truecolor")
+    file = None
+    fd = None
+    if case == "text":
+        file = io.StringIO()
+    elif case == "null":
+        printer.add_backend(NullBackend())
+    elif case == "bytes":
+        printer.add_backend(BytesBackend())
+    elif case == "fd":
+        fd = os.open(os.devnull, os.O_WRONLY)
+        printer.add_backend(FdBackend(fd, color_depth="truecolor"))
+    elif case == "html":
+        printer.add_backend(HtmlBackend())
+    elif case in ("batch", "many"):
+        printer.add_backend(BytesBackend())
+    else:
+        for backend in (NullBackend(), BytesBackend(), HtmlBackend()):
+            printer.add_backend(backend)
+
+    templates = [printer.template(message) for message in MESSAGES]
+    try:
+        start = time.perf_counter()
+        if case == "batch":
+            with printer.batch():
+                for index in range(messages):
+                    printer.print_with_color(templates[index % len(templates)])
+        elif case == "many":
+            sources = [MESSAGES[index % len(MESSAGES)].replace("%", "%%") + " %d" for index in range(100)]
+            for index in range(0, messages, 100):
+                printer.print_many(sources, range(index, index + 100))
+        else:
+            for index in range(messages):
+                printer.print_with_color(templates[index % len(templates)], file=file)
+        elapsed = time.perf_counter() - start
+    finally:
+        if fd is not None:
+            os.close(fd)
+    return {
+        "case": case,
+        "backends": len(printer.backends or ()),
+        "messages_per_sec": messages / elapsed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="出力先のバックエンドのベンチマーク")
+    parser.add_argument("--messages", type=int, default=200000, help="出力するメッセージの数")
+    parser.add_argument("--cases", default=",".join(CASES), help="計測するケース（カンマ区切り）：%s" % ", ".join(CASES))
+    args = parser.parse_args(argv)
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error("unknown case: %s" % ", ".join(unknown))
+
+    header = "%-7s %9s %16s" % ("case", "backends", "messages/sec")
+    sys.stdout.write(header + "\n" + "-" * len(header) + "\n")
+    for case in cases:
+        result = run_case(case, args.messages)
+        sys.stdout.write("%-7s %9d %16.0f\n" % (result["case"], result["backends"], result["messages_per_sec"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+1つのプリンタを多数のスレッドやタスクで共有した場合に、出力が行の途中で混ざらないことを検証するベンチマーク。
+
+出力先は書き込みを3文字ずつに分割して行うため、スレッドの切り替えが起きやすく、排他されていない書き込みは混ざる。
+すべての行が「色の指定、本文、リセット」の形で完全な状態で含まれているかを検証し、1秒あたりの行数を表示する。
+  threads:  スレッドごとにprint_with_color、batch()内のprint_with_color、モジュールレベルのprintを交互に使用する
+  tasks:    asyncioのタスクごとにAsyncColorPrinter.aprintでソケットへ出力する
+
+使用例:
+    python benchmarks/bench_concurrency.py
+    python benchmarks/bench_concurrency.py --workers 64 --messages 500 --modes tasks
+"""
+import argparse
+import asyncio
+import io
+import pathlib
+import re
+import socket
+import sys
+import threading
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ColorPrinter import AsyncColorPrinter, ColorPrinter, print as color_print, set_default_printer  # noqa: E402
+
+MODES = ("threads", "tasks")
+
+# 出力されるべき1行の形
+LINE_RE = re.compile(
+    r'^(?:\x1b\[38;2;255;0;0mT\d+\x1b\[0m \x1b\[1mmsg\x1b\[0m'
+    r'|\x1b\[38;2;0;0;255mT\d+\x1b\[0m batch'
+    r'|\x1b\[48;2;0;255;0mT\d+\x1b\[0m'
+    r'|\x1b\[38;2;255;0;0mA\d+\x1b\[0m x*) \d+$'
+)
+
+
+class SplittingSink(io.StringIO):
+    """
+    書き込みを3文字ずつに分割して行い、スレッドの切り替えを誘発する出力先。
+    """
+
+    def write(self, data: str) -> int:
+        for index in range(0, len(data), 3):
+            super().write(data[index:index + 3])
+        return len(data)
+
+
+def count_torn(text: str) -> tuple:
+    """
+    出力を検証する。
+
+    Returns:
+        tuple: (行数, 壊れた行の数)。
+    """
+    lines = text.split("\n")[:-1]
+    return len(lines), sum(1 for line in lines if not LINE_RE.match(line))
+
+
+def run_threads(workers: int, messages: int) -> tuple:
+    """
+    スレッドから1つのプリンタへ出力する。
+
+    Returns:
+        tuple: (経過時間, 出力)。
+    """
+    printer = ColorPrinter(color_depth="truecolor")
+    set_default_printer(printer)
+    sink = SplittingSink()
+
+    def worker(number: int):
+        for index in range(messages):
+            if index % 3 == 0:
+                printer.print_with_color("{fore:red}T%d{end} {bold}msg{end}" % number, index, file=sink)
+            elif index % 3 == 1:
+                with printer.batch(max_bytes=200):
+                    printer.print_with_color("{fore:blue}T%d{end} batch" % number, index, file=sink)
+            else:
+                color_print("{back:green}T%d{end}" % number, index, file=sink)
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(workers)]
+    start = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        set_default_printer(None)
+    return time.perf_counter() - start, sink.getvalue()
+
+
+async def _run_tasks(workers: int, messages: int) -> tuple:
+    left, right = socket.socketpair()
+    # 受信側のStreamWriterは破棄されると接続を閉じるため、終了まで保持する
+    reader, reader_writer = await asyncio.open_connection(sock=left)
+    _, writer = await asyncio.open_connection(sock=right)
+    printer = AsyncColorPrinter(writer)
+    expected = workers * messages
+
+    async def task(number: int):
+        for index in range(messages):
+            await printer.aprint("{fore:red}A%d{end} %s" % (number, "x" * (index % 50)), index)
+
+    async def collect() -> bytes:
+        chunks = []
+        lines = 0
+        while lines < expected:
+            chunk = await reader.read(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            lines += chunk.count(b"\n")
+        return b"".join(chunks)
+
+    start = time.perf_counter()
+    collector = asyncio.create_task(collect())
+    await asyncio.gather(*(task(number) for number in range(workers)))
+    data = await collector
+    elapsed = time.perf_counter() - start
+    writer.close()
+    reader_writer.close()
+    return elapsed, data.decode("utf-8")
+
+
+def run_case(mode: str, workers: int, messages: int) -> dict:
+    """
+    1つのモードを計測する。
+
+    Returns:
+        dict: 計測結果。
+    """
+    if mode == "threads":
+        elapsed, output = run_threads(workers, messages)
+    else:
+        elapsed, output = asyncio.run(_run_tasks(workers, messages))
+    lines, torn = count_torn(output)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "lines": lines,
+        "lines_per_sec": lines / elapsed,
+        "torn": torn,
+        "missing": workers * messages - lines,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="スレッドとタスクからの同時出力のベンチマーク")
+    parser.add_argument("--workers", type=int, default=32, help="スレッドまたはタスクの数")
+    parser.add_argument("--messages", type=int, default=300, help="1つのスレッドまたはタスクが出力する行数")
+    parser.add_argument("--modes", default=",".join(MODES), help="計測するモード（カンマ区切り）：%s" % ", ".join(MODES))
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error("unknown mode: %s" % ", ".join(unknown))
+
+    header = "%-8s %8s %8s %14s %8s %8s" % ("mode", "workers", "lines", "lines/sec", "torn", "missing")
+    sys.stdout.write(header + "\n" + "-" * len(header) + "\n")
+    failed = False
+    for mode in modes:
+        result = run_case(mode, args.workers, args.messages)
+        sys.stdout.write("%-8s %8d %8d %14.0f %8d %8d\n" % (
+            result["mode"], result["workers"], result["lines"], result["lines_per_sec"], result["torn"], result["missing"],
+        ))
+        failed = failed or result["torn"] or result["missing"]
+    if failed:
+        sys.stdout.write("FAILED: output is torn or incomplete\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
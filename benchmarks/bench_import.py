@@ -0,0 +1,92 @@
+"""
+ColorPrinterパッケージの読み込み時間を、python -X importtimeで計測するベンチマーク。
+
+新しいインタプリタで読み込みを繰り返し、空のインタプリタの起動時に読み込まれるモジュールを除いた
+読み込み時間の中央値を表示する。--max-msを指定すると、上限を超えた場合に終了コード1で終了するため、
+起動時間の劣化を検出する回帰テストとして使用できる。
+
+使用例:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --statement "import ColorPrinter" --max-ms 5
+"""
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# 読み込み時に読み込まれるべきでない、重いモジュール
+HEAVY_MODULES = ("asyncio", "numpy", "re", "yaml")
+
+
+def import_time(statement: str) -> float:
+    """
+    新しいインタプリタで文を実行し、読み込まれたモジュールの読み込み時間の合計（ミリ秒）を求める。
+
+    Args:
+        statement (str): 実行する文。
+
+    Returns:
+        float: 最上位のモジュールの累積読み込み時間の合計（ミリ秒）。
+    """
+    environment = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True, env=environment, cwd=ROOT,
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line.split("|")
+        module = fields[2]
+        # 字下げされていないモジュールのみを合計する（字下げされたものは累積時間に含まれている）
+        if module.startswith(" ") and not module.startswith("  "):
+            try:
+                total += int(fields[1])
+            except ValueError:  # 見出し行
+                pass
+    return total / 1000
+
+
+def loaded_heavy_modules(statement: str) -> list:
+    """
+    文を実行した後に読み込まれている、重いモジュールを求める。
+
+    Args:
+        statement (str): 実行する文。
+
+    Returns:
+        list: HEAVY_MODULESのうち、読み込まれているモジュールの名前。
+    """
+    environment = dict(os.environ, PYTHONPATH=str(ROOT))
+    code = "%s\nimport sys\nsys.stdout.write(','.join(name for name in %r if name in sys.modules))" % (statement, HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=environment, cwd=ROOT)
+    return [name for name in result.stdout.split(",") if name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ColorPrinterの読み込み時間のベンチマーク")
+    parser.add_argument("--statement", default="from ColorPrinter import print", help="計測する文")
+    parser.add_argument("--repeat", type=int, default=20, help="計測する回数")
+    parser.add_argument("--max-ms", type=float, help="読み込み時間の中央値の上限（ミリ秒）")
+    args = parser.parse_args(argv)
+
+    baseline = statistics.median(import_time("pass") for _ in range(args.repeat))
+    measured = statistics.median(import_time(args.statement) for _ in range(args.repeat))
+    cost = measured - baseline
+    heavy = loaded_heavy_modules(args.statement)
+
+    sys.stdout.write("statement:      %s\n" % args.statement)
+    sys.stdout.write("import time:    %.2f ms (median of %d, interpreter startup excluded)\n" % (cost, args.repeat))
+    sys.stdout.write("heavy modules:  %s\n" % (", ".join(heavy) or "none"))
+    if args.max_ms is not None and cost > args.max_ms:
+        sys.stdout.write("FAILED: import time exceeds %.2f ms\n" % args.max_ms)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
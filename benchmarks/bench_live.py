@@ -0,0 +1,111 @@
+"""
+live()の表示領域による差分描画と、フレーム全体の再描画を比較するベンチマーク。
+
+同じフレームの列について、1フレームあたりの出力のバイト数と描画時間を表示する。
+各フレームの先頭の行にはフレームの番号を表示するため、フレーム全体が同じになることはない。
+full repaintはカーソルを領域の先頭へ戻し、テンプレートの描画結果全体を出力する場合、live diffはLiveRegion.render()の出力となる。
+  dashboard:  一部の行の数値とグラデーションのバーが変化する
+  plain:      4行に1行の数値のみが変化する
+  wide:       全角文字のラベルと、全角文字のバーが変化する
+
+使用例:
+    python benchmarks/bench_live.py
+    python benchmarks/bench_live.py --frames 1000 --rows 48 --cases wide
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ColorPrinter import ColorPrinter  # noqa: E402
+
+CASES = ("dashboard", "plain", "wide")
+
+
+def frame(case: str, index: int, rows: int) -> str:
+    """
+    ケースごとの1フレームのマークアップ文字列を作成する。
+
+    Returns:
+        str: 複数行のマークアップ文字列。
+    """
+    lines = ["{bold}frame{end} %d" % index]
+    for row in range(rows - 1):
+        if case == "dashboard":
+            value = (index * 7 + row * 13) % 100 if row % 3 == 0 else row
+            lines.append("{bold}svc-%02d{end} {fore:%s}%5d req/s{end} {gradient:red, green}%s{end}%s" % (
+                row, "green" if value < 50 else "red", value, "█" * (value // 4), " " * (25 - value // 4),
+            ))
+        elif case == "plain":
+            value = (index * 7 + row) % 1000 if row % 4 == 0 else row
+            lines.append("{bold}svc-%02d{end} {fore:%s}%5d req/s{end} {fore:cyan}%s{end}" % (
+                row, "green" if row % 2 else "red", value, "#" * (row % 20),
+            ))
+        else:
+            value = (index * 3 + row * 5) % 20 if row % 2 == 0 else row % 20
+            lines.append("{bold}サービス%02d{end} {fore:%s}%3d%%{end} {fore:cyan}%s{end}%s" % (
+                row, "green" if value < 10 else "red", value * 5, "■" * value, "　" * (20 - value),
+            ))
+    return "\n".join(lines)
+
+
+def run_case(case: str, frames: int, rows: int) -> dict:
+    """
+    1つのケースを計測する。
+
+    Returns:
+        dict: 計測結果。
+    """
+    printer = ColorPrinter(color_depth="truecolor")
+    texts = [frame(case, index, rows) for index in range(frames)]
+
+    ColorPrinter.cache_clear()
+    full_bytes = 0
+    start = time.perf_counter()
+    for index, text in enumerate(texts):
+        data = ("\033[%dF" % (rows - 1) if index else "") + printer.template(text).text + "\n"
+        full_bytes += len(data.encode("utf-8"))
+    full_time = time.perf_counter() - start
+
+    region = printer.live()
+    live_bytes = 0
+    start = time.perf_counter()
+    for text in texts:
+        live_bytes += len(region.render(text).encode("utf-8"))
+    live_time = time.perf_counter() - start
+
+    return {
+        "case": case,
+        "full_bytes": full_bytes / frames,
+        "full_usec": full_time / frames * 1e6,
+        "live_bytes": live_bytes / frames,
+        "live_usec": live_time / frames * 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="live()の差分描画のベンチマーク")
+    parser.add_argument("--frames", type=int, default=300, help="描画するフレームの数")
+    parser.add_argument("--rows", type=int, default=24, help="1フレームの行数")
+    parser.add_argument("--cases", default=",".join(CASES), help="計測するケース（カンマ区切り）：%s" % ", ".join(CASES))
+    args = parser.parse_args(argv)
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error("unknown case: %s" % ", ".join(unknown))
+
+    header = "%-10s %16s %16s %16s %16s" % ("case", "full bytes/frame", "full us/frame", "live bytes/frame", "live us/frame")
+    sys.stdout.write(header + "\n" + "-" * len(header) + "\n")
+    for case in cases:
+        result = run_case(case, args.frames, args.rows)
+        sys.stdout.write("%-10s %16.0f %16.0f %16.0f %16.0f\n" % (
+            case, result["full_bytes"], result["full_usec"], result["live_bytes"], result["live_usec"],
+        ))
+
+
+if __name__ == "__main__":
+    main()
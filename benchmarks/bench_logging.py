@@ -0,0 +1,151 @@
+"""
+loggingモジュールと組み合わせた場合のログ出力のスループットを計測するベンチマーク。
+
+標準のStreamHandler、レコードごとにprint_with_colorを呼び出すラッパー、ColorHandler、
+QueueHandler/QueueListenerを介した場合を比較する。出力はメモリ上の出力先に書き込まれる。
+キューを介する場合は、ログを出力したスレッドの所要時間（hot）と、リスナーが出力を終えるまでの所要時間（total）を表示する。
+
+使用例:
+    python benchmarks/bench_logging.py
+    python benchmarks/bench_logging.py --records 50000 --cases stdlib,color,color-queue
+"""
+import argparse
+import logging
+import logging.handlers
+import pathlib
+import queue
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ColorPrinter import ColorFormatter, ColorHandler, ColorPrinter, ColorQueueHandler  # noqa: E402
+
+# 出力するレコードのログレベル（順に繰り返す）
+LEVELS = (logging.INFO, logging.INFO, logging.WARNING, logging.DEBUG, logging.ERROR)
+
+
+class CountingSink:
+    """
+    書き込まれた文字数のみを記録する、メモリ上の出力先。
+    """
+
+    def __init__(self):
+        self.characters = 0
+
+    def write(self, data: str) -> int:
+        self.characters += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class WrapperHandler(logging.Handler):
+    """
+    レコードごとにマークアップ文字列を組み立て、print_with_colorで出力する以前のラッパー。
+    メッセージごとに異なる文字列となるため、毎回マークアップの解析が行われる。
+    """
+
+    def __init__(self, stream, printer: ColorPrinter):
+        super().__init__()
+        self.stream = stream
+        self.printer = printer
+
+    def emit(self, record: logging.LogRecord):
+        style = ColorFormatter.LEVEL_STYLES.get(record.levelno, "")
+        message = record.getMessage().replace("{", "{{").replace("}", "}}")
+        self.printer.print_with_color("%s%s{end}:%s:%s" % (style, record.levelname, record.name, message), file=self.stream)
+
+
+def make_handlers(case: str, sink, color_depth: str):
+    """
+    ケースごとのハンドラを作成する。
+
+    Returns:
+        tuple: (ロガーに追加するハンドラ, QueueListener)。キューを介さない場合、QueueListenerはNone。
+    """
+    printer = ColorPrinter(color_depth=color_depth)
+    if case == "stdlib":
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        return handler, None
+    if case == "wrapper":
+        return WrapperHandler(sink, printer), None
+    if case == "color":
+        return ColorHandler(sink, printer=printer), None
+
+    records = queue.SimpleQueue()
+    if case == "stdlib-queue":
+        target = logging.StreamHandler(sink)
+        target.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        return logging.handlers.QueueHandler(records), logging.handlers.QueueListener(records, target)
+    if case == "color-queue":
+        target = ColorHandler(sink, printer=printer)
+        return ColorQueueHandler(records), logging.handlers.QueueListener(records, target)
+    raise ValueError("unknown case: %s" % case)
+
+
+CASES = ("stdlib", "wrapper", "color", "stdlib-queue", "color-queue")
+
+
+def run_case(case: str, records: int, color_depth: str) -> dict:
+    """
+    1つのケースでrecords件のレコードを出力し、所要時間を計測する。
+
+    Returns:
+        dict: 計測結果。
+    """
+    sink = CountingSink()
+    handler, listener = make_handlers(case, sink, color_depth)
+    logger = logging.getLogger("bench.%s" % case)
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    if listener is not None:
+        listener.start()
+    levels = LEVELS
+    count = len(levels)
+    start = time.perf_counter()
+    for index in range(records):
+        logger.log(levels[index % count], "request %d handled in %.2f ms {id=%s}", index, index * 0.01, "abc")
+    hot = time.perf_counter() - start
+    if listener is not None:
+        listener.stop()
+    total = time.perf_counter() - start
+    logger.handlers.clear()
+    return {
+        "case": case,
+        "hot_records_per_sec": records / hot,
+        "total_records_per_sec": records / total,
+        "characters": sink.characters,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="loggingと組み合わせた場合のベンチマーク")
+    parser.add_argument("--cases", default=",".join(CASES), help="計測するケース（カンマ区切り）：%s" % ", ".join(CASES))
+    parser.add_argument("--records", type=int, default=20000, help="出力するレコードの数")
+    parser.add_argument("--repeat", type=int, default=3, help="計測を繰り返す回数（最も速い結果を採用する）")
+    parser.add_argument("--color-depth", default="truecolor", help="ColorPrinterの色の深さ")
+    args = parser.parse_args(argv)
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error("unknown case: %s" % ", ".join(unknown))
+
+    header = "%-13s %14s %16s %12s" % ("case", "hot rec/sec", "total rec/sec", "chars/rec")
+    sys.stdout.write(header + "\n" + "-" * len(header) + "\n")
+    for case in cases:
+        results = [run_case(case, args.records, args.color_depth) for _ in range(args.repeat)]
+        best = max(results, key=lambda result: result["total_records_per_sec"])
+        sys.stdout.write("%-13s %14.0f %16.0f %12.1f\n" % (
+            case, best["hot_records_per_sec"], best["total_records_per_sec"], best["characters"] / args.records,
+        ))
+
+
+if __name__ == "__main__":
+    main()
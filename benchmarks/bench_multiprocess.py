@@ -0,0 +1,158 @@
+"""
+複数のワーカープロセスから色付きの行を出力する場合のスループットと、出力が壊れていないかを検証するベンチマーク。
+
+各ワーカーは、自身の番号に対応する色で行を出力する。出力は一時ファイルに書き込まれ、
+すべての行が「色の指定、本文、リセット」の形で1行ずつ完全な状態で、欠落や重複なく含まれているかを検証する。
+  direct:  各ワーカーが出力先を開き、直接書き込む（以前の使い方）
+  writer:  ProcessWriterを介して、親プロセスの書き込みスレッドのみが書き込む
+
+使用例:
+    python benchmarks/bench_multiprocess.py
+    python benchmarks/bench_multiprocess.py --workers 8,32 --lines 5000 --modes writer
+"""
+import argparse
+import concurrent.futures
+import os
+import pathlib
+import re
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ColorPrinter import ColorPrinter, ProcessWriter, print as color_print  # noqa: E402
+
+# ワーカーが順に使用する色
+COLORS = ("red", "green", "yellow", "blue", "magenta", "cyan", "white", "gray")
+
+# 1行の本文（行を長くして、書き込みが分割されやすくする）
+PADDING = "." * 60
+
+MODES = ("direct", "writer")
+
+
+def markup(worker: int, line: int) -> str:
+    return "{fore:%s, bold}worker %d{end} line %d %s" % (COLORS[worker % len(COLORS)], worker, line, PADDING)
+
+
+def run_direct(path: str, worker: int, lines: int):
+    """
+    出力先を追記モードで開き、直接書き込むワーカー。
+    """
+    printer = ColorPrinter(color_depth="truecolor")
+    with open(path, "a", encoding="utf-8") as file:
+        for line in range(lines):
+            printer.print_with_color(markup(worker, line), file=file)
+
+
+def run_writer(worker: int, lines: int):
+    """
+    ProcessWriter.attachで設定された既定プリンタで書き込むワーカー。
+    """
+    for line in range(lines):
+        color_print(markup(worker, line))
+
+
+def expected_lines(workers: int) -> dict:
+    """
+    ワーカーごとの、1行の正しい出力を表す正規表現を作成する。
+    """
+    printer = ColorPrinter(color_depth="truecolor")
+    patterns = {}
+    for worker in range(workers):
+        text = printer.template(markup(worker, 0)).text
+        patterns[worker] = re.compile("^%s$" % re.escape(text).replace("line\\ 0", "line\\ (\\d+)"))
+    return patterns
+
+
+def verify(path: str, workers: int, lines: int) -> tuple:
+    """
+    出力を検証する。
+
+    Returns:
+        tuple: (壊れた行の数, 欠落または重複した行の数)。
+    """
+    patterns = expected_lines(workers)
+    seen = set()
+    torn = duplicated = 0
+    with open(path, encoding="utf-8") as file:
+        for text in file.read().split("\n")[:-1]:
+            for worker, pattern in patterns.items():
+                match = pattern.match(text)
+                if match:
+                    key = (worker, int(match.group(1)))
+                    if key in seen:
+                        duplicated += 1
+                    seen.add(key)
+                    break
+            else:
+                torn += 1
+    return torn, duplicated + workers * lines - len(seen)
+
+
+def run_case(mode: str, workers: int, lines: int) -> dict:
+    """
+    1つのモードとワーカー数の組み合わせを計測する。
+
+    Returns:
+        dict: 計測結果。
+    """
+    handle, path = tempfile.mkstemp(suffix=".log")
+    os.close(handle)
+    try:
+        start = time.perf_counter()
+        if mode == "direct":
+            with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+                for future in [pool.submit(run_direct, path, worker, lines) for worker in range(workers)]:
+                    future.result()
+        else:
+            with open(path, "a", encoding="utf-8") as file:
+                writer = ProcessWriter(color_depth="truecolor", stdout=file)
+                with writer:
+                    with concurrent.futures.ProcessPoolExecutor(workers, initializer=writer.attach) as pool:
+                        for future in [pool.submit(run_writer, worker, lines) for worker in range(workers)]:
+                            future.result()
+        elapsed = time.perf_counter() - start
+        torn, missing = verify(path, workers, lines)
+        return {
+            "mode": mode,
+            "workers": workers,
+            "lines_per_sec": workers * lines / elapsed,
+            "torn": torn,
+            "missing": missing,
+        }
+    finally:
+        os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="複数のプロセスからの出力のベンチマーク")
+    parser.add_argument("--workers", default="8,16,32", help="ワーカーの数（カンマ区切り）")
+    parser.add_argument("--lines", type=int, default=2000, help="1つのワーカーが出力する行数")
+    parser.add_argument("--modes", default=",".join(MODES), help="計測するモード（カンマ区切り）：%s" % ", ".join(MODES))
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error("unknown mode: %s" % ", ".join(unknown))
+
+    header = "%-7s %8s %14s %10s %10s" % ("mode", "workers", "lines/sec", "torn", "missing")
+    sys.stdout.write(header + "\n" + "-" * len(header) + "\n")
+    failed = False
+    for workers in (int(value) for value in args.workers.split(",")):
+        for mode in modes:
+            result = run_case(mode, workers, args.lines)
+            sys.stdout.write("%-7s %8d %14.0f %10d %10d\n" % (
+                result["mode"], result["workers"], result["lines_per_sec"], result["torn"], result["missing"],
+            ))
+            failed = failed or (mode == "writer" and (result["torn"] or result["missing"]))
+    if failed:
+        sys.stdout.write("FAILED: ProcessWriter output is torn or incomplete\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
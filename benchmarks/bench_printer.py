@@ -0,0 +1,246 @@
+"""
+ColorPrinterの主要な処理の速度を計測するベンチマーク。
+
+出力はメモリ上の出力先に書き込まれるため、端末の描画速度は結果に影響しない。
+ColorPrinter/（現在の実装）、lib/ColorPrinter/、トップレベルのmain.py（以前の実装）を比較できる。
+
+使用例:
+    python benchmarks/bench_printer.py
+    python benchmarks/bench_printer.py --variants current,legacy --number 2000 --cold
+    python benchmarks/bench_printer.py --variants current,legacy --unique
+"""
+import argparse
+import importlib.util
+import itertools
+import json
+import pathlib
+import sys
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# 比較できる実装と、その読み込み元
+VARIANTS = {
+    "current": ROOT / "ColorPrinter" / "__init__.py",
+    "lib": ROOT / "lib" / "ColorPrinter" / "__init__.py",
+    "legacy": ROOT / "main.py",
+}
+
+# 統計情報の集計の有無を比較するケースで出力するマークアップ文字列
+STATS_TEXT = "{fore:red}ERROR{end} {fore:yellow, bold}WARN{end} {back:blue}INFO{end} done"
+
+# 計測するケース（名前、1回の操作で出力するマークアップ文字列、モジュールのprintを使用するかどうか、統計情報を集計するかどうか）
+# 統計情報を集計するケースは、enable_statsを持たない実装では計測しない
+CASES = [
+    ("plain", "The quick brown fox jumps over the lazy dog, 0123456789.", False, False),
+    ("tags", "{fore:red}ERROR{end} {fore:yellow, bold}WARN{end} {back:blue}INFO{end} {underline}debug{end} done", False, False),
+    ("rgba", "{fore:rgba(255, 128, 0, 1)}orange{end} {back:rgba(0, 64, 128, 1)}navy{end} {fore:rgba(10,200,30,1)}lime{end}", False, False),
+    ("end-churn", "{fore:red}a{end}{fore:green}b{end}{back:blue}c{end}{bold}d{end}" * 8, False, False),
+    ("long-line", "".join("{fore:%s}%s{end}" % (color, "x" * 100) for color in ["red", "green", "blue", "cyan"] * 25), False, False),
+    ("module-print", "{fore:red}ERROR{end} {fore:yellow, bold}WARN{end} plain tail", True, False),
+    ("stats-off", STATS_TEXT, False, False),
+    ("stats-on", STATS_TEXT, False, True),
+]
+
+
+class CountingSink:
+    """
+    書き込まれた文字数のみを記録する、メモリ上の出力先。
+    """
+
+    def __init__(self):
+        self.characters = 0
+
+    def write(self, data: str) -> int:
+        self.characters += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class CollectingSink(CountingSink):
+    """
+    書き込まれた文字列を保持し、出力のバイト数を求めるための出力先。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+
+    def write(self, data: str) -> int:
+        self.parts.append(data)
+        return super().write(data)
+
+    def bytes(self) -> int:
+        return len("".join(self.parts).encode("utf-8"))
+
+
+def load_variant(name: str):
+    """
+    比較する実装を、互いに干渉しない名前のモジュールとして読み込む。
+
+    Args:
+        name (str): VARIANTSのキー。
+
+    Returns:
+        module: ColorPrinterクラスとprint関数を持つモジュール。
+    """
+    path = VARIANTS[name]
+    module_name = "_bench_%s" % name
+    if path.name == "__init__.py":
+        spec = importlib.util.spec_from_file_location(module_name, path, submodule_search_locations=[str(path.parent)])
+    else:
+        spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_operation(module, text: str, module_print: bool, sink, cold: bool, stats: bool = False, unique: bool = False):
+    """
+    1回の操作を表す関数を作成する。
+
+    Args:
+        module: load_variantで読み込んだモジュール。
+        text (str): 出力するマークアップ文字列。
+        module_print (bool): Trueの場合、モジュールのprint関数を使用する。
+        sink: 出力先。
+        cold (bool): Trueの場合、操作ごとにコンパイル済みテンプレートのキャッシュを破棄する（現在の実装のみ）。
+        stats (bool): Trueの場合、プリンタの統計情報の集計を有効にする。
+        unique (bool): Trueの場合、操作ごとに末尾に連番を付けた異なる文字列を出力する。
+
+    Returns:
+        Callable[[], None]: 引数を取らない関数。
+    """
+    printer_class = module.ColorPrinter
+    current = hasattr(printer_class, "compile")
+    if current:
+        # 出力先が端末かどうかに関わらず、以前の実装と同じ24bitカラーで比較する
+        printer = printer_class(color_depth="truecolor")
+        module.set_default_printer(printer_class(color_depth="truecolor"))
+    else:
+        printer = printer_class()
+    if stats:
+        printer.enable_stats()
+
+    output = module.print if module_print else printer.print_with_color
+    if unique:
+        counter = itertools.count()
+
+        def operation():
+            output("%s %d" % (text, next(counter)), file=sink)
+    elif cold and current:
+        cache_clear = printer_class.cache_clear
+
+        def operation():
+            cache_clear()
+            output(text, file=sink)
+    else:
+        def operation():
+            output(text, file=sink)
+    return operation
+
+
+def measure(operation, number: int, repeat: int) -> float:
+    """
+    操作をnumber回実行する時間をrepeat回計測し、最も短い時間を返す。
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_memory(operation, number: int) -> int:
+    """
+    操作をnumber回実行する間に確保されたメモリの最大量（バイト）を返す。
+    """
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for _ in range(number):
+            operation()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def run(variants, cases, number: int, repeat: int, cold: bool, unique: bool = False) -> list:
+    """
+    すべての実装とケースの組み合わせを計測する。
+
+    Returns:
+        list: 計測結果の辞書のリスト。
+    """
+    results = []
+    for variant in variants:
+        module = load_variant(variant)
+        for case, text, module_print, stats in cases:
+            if stats and not hasattr(module.ColorPrinter, "enable_stats"):
+                continue
+            collecting = CollectingSink()
+            make_operation(module, text, module_print, collecting, cold, stats, unique)()
+
+            sink = CountingSink()
+            operation = make_operation(module, text, module_print, sink, cold, stats, unique)
+            operation()  # 初回の呼び出し（キャッシュの作成など）は計測に含めない
+            elapsed = measure(operation, number, repeat)
+            results.append({
+                "variant": variant,
+                "case": case,
+                "ops_per_sec": number / elapsed,
+                "usec_per_op": elapsed / number * 1e6,
+                "bytes_per_op": collecting.bytes(),
+                "peak_alloc_bytes": measure_memory(operation, min(number, 100)),
+            })
+    return results
+
+
+def format_table(results: list) -> str:
+    """
+    計測結果を表形式の文字列に変換する。
+    """
+    header = "%-8s %-13s %12s %10s %10s %12s" % ("variant", "case", "ops/sec", "us/op", "bytes/op", "peak alloc")
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append("%-8s %-13s %12.0f %10.2f %10d %12d" % (
+            result["variant"], result["case"], result["ops_per_sec"], result["usec_per_op"],
+            result["bytes_per_op"], result["peak_alloc_bytes"],
+        ))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ColorPrinterのベンチマーク")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="計測する実装（カンマ区切り）：%s" % ", ".join(VARIANTS))
+    parser.add_argument("--cases", default=",".join(case[0] for case in CASES), help="計測するケース（カンマ区切り）")
+    parser.add_argument("--number", type=int, default=1000, help="1回の計測で実行する操作の回数")
+    parser.add_argument("--repeat", type=int, default=5, help="計測を繰り返す回数（最も短い時間を採用する）")
+    parser.add_argument("--cold", action="store_true", help="操作ごとにテンプレートのキャッシュを破棄する")
+    parser.add_argument("--unique", action="store_true", help="操作ごとに異なる文字列（末尾に連番を付けたもの）を出力する")
+    parser.add_argument("--json", metavar="PATH", help="計測結果をJSON形式で保存するファイル")
+    args = parser.parse_args(argv)
+
+    variants = [name.strip() for name in args.variants.split(",") if name.strip()]
+    unknown = [name for name in variants if name not in VARIANTS]
+    if unknown:
+        parser.error("unknown variant: %s" % ", ".join(unknown))
+    names = {name.strip() for name in args.cases.split(",")}
+    cases = [case for case in CASES if case[0] in names]
+
+    results = run(variants, cases, args.number, args.repeat, args.cold, args.unique)
+    sys.stdout.write(format_table(results) + "\n")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+多数のプリンタを同時に保持した場合の、スタイルの状態のメモリ使用量と操作の速度を比較するベンチマーク。
+
+current（__slots__のStyleStateを使用する現在の実装）と、legacy（辞書のactive_stylesを使用するトップレベルのmain.py）を比較する。
+  bytes/printer:    プリンタを多数作成した場合の、1つあたりに確保されたメモリ（tracemallocで計測）
+  bytes/styles:     active_styles自体の大きさ（sys.getsizeof）
+  construct:        プリンタの作成時間
+  reset:            reset_styles()の時間（currentはその場でリセットし、legacyは新しい辞書を作成する）
+  save/restore:     スタイルの保存と復元の時間（currentはStyleStateのsnapshot()とrestore()、legacyは辞書のコピー）
+
+使用例:
+    python benchmarks/bench_styles.py
+    python benchmarks/bench_styles.py --printers 100000 --variants current
+"""
+import argparse
+import pathlib
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+from bench_printer import load_variant  # noqa: E402
+
+VARIANTS = ("current", "legacy")
+
+
+class _NullFile:
+    """
+    書き込まれた内容を破棄する出力先。
+    """
+
+    def write(self, data: str) -> int:
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def make_printer(module):
+    """
+    実装ごとのプリンタを作成する。
+    """
+    printer_class = module.ColorPrinter
+    if hasattr(printer_class, "compile"):
+        return printer_class(color_depth="truecolor")
+    return printer_class()
+
+
+def make_save_restore(printer):
+    """
+    スタイルを保存して復元する、引数を取らない関数を作成する。
+    """
+    styles = printer.active_styles
+    if hasattr(styles, "snapshot"):
+        save, restore = styles.snapshot, styles.restore
+
+        def operation():
+            restore(save())
+    else:
+        # 辞書の状態は変更されうるため、保存と復元のどちらでもコピーする
+        def operation():
+            saved = dict(printer.active_styles)
+            printer.active_styles = dict(saved)
+    return operation
+
+
+def per_call(operation, number: int) -> float:
+    """
+    操作をnumber回実行し、1回あたりの時間（ナノ秒）を返す。
+    """
+    start = time.perf_counter()
+    for _ in range(number):
+        operation()
+    return (time.perf_counter() - start) / number * 1e9
+
+
+def run_variant(variant: str, printers: int, number: int) -> dict:
+    """
+    1つの実装を計測する。
+
+    Returns:
+        dict: 計測結果。
+    """
+    module = load_variant(variant)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        alive = [make_printer(module) for _ in range(printers)]
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(printers):
+        make_printer(module)
+    construct = (time.perf_counter() - start) / printers * 1e6
+
+    printer = alive[0]
+    printer.print_with_color("{fore:red, bold}x{end}", file=_NullFile())
+    return {
+        "variant": variant,
+        "bytes_per_printer": allocated / printers,
+        "bytes_per_styles": sys.getsizeof(printer.active_styles),
+        "construct_usec": construct,
+        "reset_nsec": per_call(printer.reset_styles, number),
+        "save_restore_nsec": per_call(make_save_restore(printer), number),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="スタイルの状態のメモリ使用量と速度のベンチマーク")
+    parser.add_argument("--printers", type=int, default=50000, help="同時に保持するプリンタの数")
+    parser.add_argument("--number", type=int, default=200000, help="リセットや保存と復元を実行する回数")
+    parser.add_argument("--variants", default=",".join(VARIANTS), help="計測する実装（カンマ区切り）：%s" % ", ".join(VARIANTS))
+    args = parser.parse_args(argv)
+
+    variants = [name.strip() for name in args.variants.split(",") if name.strip()]
+    unknown = [name for name in variants if name not in VARIANTS]
+    if unknown:
+        parser.error("unknown variant: %s" % ", ".join(unknown))
+
+    header = "%-8s %14s %13s %14s %10s %18s" % (
+        "variant", "bytes/printer", "bytes/styles", "construct (us)", "reset (ns)", "save/restore (ns)",
+    )
+    sys.stdout.write(header + "\n" + "-" * len(header) + "\n")
+    for variant in variants:
+        result = run_variant(variant, args.printers, args.number)
+        sys.stdout.write("%-8s %14.0f %13d %14.2f %10.0f %18.0f\n" % (
+            result["variant"], result["bytes_per_printer"], result["bytes_per_styles"],
+            result["construct_usec"], result["reset_nsec"], result["save_restore_nsec"],
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Tableによる表の描画時間を、行数を変えて計測するベンチマーク。
+
+行数に対して描画時間が線形に増えることを確認するため、1行あたりの時間を表示する。
+  markup:   各セルをマークアップ文字列として追加する（セルごとにコンパイルされる）
+  formats:  列ごとの%書式のテンプレートに値を埋め込む（テンプレートは1回だけコンパイルされる）
+  wide:     全角文字を含むセルを追加する
+
+使用例:
+    python benchmarks/bench_table.py
+    python benchmarks/bench_table.py --rows 1000,100000 --cases formats
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ColorPrinter import ColorPrinter  # noqa: E402
+
+CASES = ("markup", "formats", "wide")
+
+
+def build(case: str, rows: int):
+    """
+    ケースごとの表と、追加する行を作成する。
+
+    Returns:
+        tuple: (Table, 行のリスト)。
+    """
+    printer = ColorPrinter(color_depth="truecolor")
+    header = ["{bold}id{end}", "{bold}name{end}", "{bold}status{end}"]
+    align = ("right", "left", "center")
+    if case == "markup":
+        table = printer.table(header, align)
+        data = [(index, "{fore:cyan}user%d{end}" % index, "{fore:green}OK{end}" if index % 7 else "{fore:red}NG{end}")
+                for index in range(rows)]
+    elif case == "formats":
+        table = printer.table(header, align, formats=[None, "{fore:cyan}user%d{end}", "{fore:green}%s{end}"])
+        data = [(index, index, "OK" if index % 7 else "NG") for index in range(rows)]
+    else:
+        table = printer.table(header, align, formats=[None, "{fore:cyan}%s{end}", None])
+        data = [(index, "利用者%d" % index, "正常" if index % 7 else "異常") for index in range(rows)]
+    return table, data
+
+
+def run_case(case: str, rows: int) -> dict:
+    """
+    1つのケースと行数の組み合わせを計測する。
+
+    Returns:
+        dict: 計測結果。
+    """
+    ColorPrinter.cache_clear()
+    table, data = build(case, rows)
+    start = time.perf_counter()
+    table.add_rows(data)
+    added = time.perf_counter()
+    output = table.render()
+    finished = time.perf_counter()
+    return {
+        "case": case,
+        "rows": rows,
+        "add": added - start,
+        "render": finished - added,
+        "usec_per_row": (finished - start) / rows * 1e6,
+        "characters": len(output),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tableのベンチマーク")
+    parser.add_argument("--rows", default="1000,10000,100000", help="行数（カンマ区切り）")
+    parser.add_argument("--cases", default=",".join(CASES), help="計測するケース（カンマ区切り）：%s" % ", ".join(CASES))
+    args = parser.parse_args(argv)
+
+    cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error("unknown case: %s" % ", ".join(unknown))
+
+    header = "%-8s %8s %10s %10s %10s %12s" % ("case", "rows", "add (s)", "render (s)", "us/row", "characters")
+    sys.stdout.write(header + "\n" + "-" * len(header) + "\n")
+    for case in cases:
+        for rows in (int(value) for value in args.rows.split(",")):
+            result = run_case(case, rows)
+            sys.stdout.write("%-8s %8d %10.3f %10.3f %10.2f %12d\n" % (
+                case, rows, result["add"], result["render"], result["usec_per_row"], result["characters"],
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -24,7 +24,7 @@ INSTALL_REQUIRES = [
 ]
 
 EXTRAS_REQUIRE = {
-    
+    'numpy': ['numpy'],
 }
 
 PACKAGES = [
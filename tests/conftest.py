@@ -0,0 +1,7 @@
+import pathlib
+import sys
+
+# インストールせずにリポジトリ内のColorPrinterパッケージを読み込めるよう、リポジトリのルートを検索パスに追加する
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
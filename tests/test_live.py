@@ -0,0 +1,149 @@
+"""
+LiveRegionの差分による再描画が、フレーム全体を描画し直した場合と同じ画面になることを、小さな端末エミュレータで確認するテスト。
+"""
+import random
+import re
+
+import pytest
+
+from ColorPrinter import ColorPrinter
+from ColorPrinter.table import char_width
+
+# LiveRegionが出力する制御シーケンス（SGR、カーソルの上下移動、桁の指定、行末までの消去）
+_CONTROL_RE = re.compile(r"\033\[([\d;]*)([mABGK])")
+
+
+class Terminal:
+    """
+    LiveRegionの出力を解釈し、各セルの文字とSGRの状態を保持する端末エミュレータ。
+    改行は、端末の出力処理（ONLCR）と同じく次の行の先頭へ移動する。
+    """
+
+    def __init__(self):
+        self.screen = {}
+        self.row = 0
+        self.column = 0
+        self.sgr = {}
+
+    def feed(self, data: str):
+        position = 0
+        for match in _CONTROL_RE.finditer(data):
+            self.write(data[position:match.start()])
+            position = match.end()
+            self.control(match.group(1), match.group(2))
+        self.write(data[position:])
+
+    def control(self, params: str, command: str):
+        count = int(params or 1) if command != "m" else 0
+        if command == "m":
+            self.select(params)
+        elif command == "A":
+            self.row -= count
+        elif command == "B":
+            self.row += count
+        elif command == "G":
+            self.column = count - 1
+        elif command == "K":
+            line = self.screen.setdefault(self.row, {})
+            for column in [column for column in line if column >= self.column]:
+                del line[column]
+
+    def select(self, params: str):
+        codes = [int(code) for code in params.split(";")] if params else [0]
+        index = 0
+        while index < len(codes):
+            code = codes[index]
+            index += 1
+            if code == 0:
+                self.sgr = {}
+            elif code in (1, 3, 4):
+                self.sgr[code] = True
+            elif code in (22, 23, 24):
+                self.sgr.pop({22: 1, 23: 3, 24: 4}[code], None)
+            elif code in (39, 49):
+                self.sgr.pop(code - 1, None)
+            elif code in (38, 48):
+                size = 2 if codes[index] == 5 else 4
+                self.sgr[code] = tuple(codes[index:index + size])
+                index += size
+            elif 30 <= code <= 37 or 90 <= code <= 97:
+                self.sgr[38] = (code,)
+            elif 40 <= code <= 47 or 100 <= code <= 107:
+                self.sgr[48] = (code,)
+            else:
+                raise AssertionError("unexpected SGR code %d" % code)
+
+    def write(self, text: str):
+        sgr = tuple(sorted(self.sgr.items()))
+        for char in text:
+            line = self.screen.setdefault(self.row, {})
+            if char == "\r":
+                self.column = 0
+            elif char == "\n":
+                self.row += 1
+                self.column = 0
+            elif char_width(char) == 0:
+                # 表示幅が0の文字は直前のセルにまとめる
+                column = self.column - 1
+                while column > 0 and line.get(column, ("", ()))[0] == "":
+                    column -= 1
+                cell_char, cell_sgr = line[column]
+                line[column] = (cell_char + char, cell_sgr)
+            else:
+                line[self.column] = (char, sgr)
+                if char_width(char) == 2:
+                    line[self.column + 1] = ("", sgr)
+                self.column += char_width(char)
+
+    def lines(self) -> list:
+        """
+        画面の各行を、既定のスタイルの空白を空のセルとみなし、末尾の空のセルを除いたタプルのリストとして返す。
+        """
+        result = []
+        for row in range(max(self.screen, default=-1) + 1):
+            line = self.screen.get(row, {})
+            cells = [line.get(column) for column in range(max(line, default=-1) + 1)]
+            cells = [None if cell == (" ", ()) else cell for cell in cells]
+            while cells and cells[-1] is None:
+                cells.pop()
+            result.append(tuple(cells))
+        while result and not result[-1]:
+            result.pop()
+        return result
+
+
+# ランダムなフレームの行を組み立てる部品
+PIECES = [
+    "{fore:red}", "{back:blue}", "{bold}", "{underline}", "{fore:rgba(200, 100, 0, 0.5)}", "{end}", "{end all}",
+    "{gradient:red, blue}", "a", "bc", "xyz", "  ", "日本", "é", "0123456789",
+]
+
+
+def random_frame(rng: random.Random) -> str:
+    lines = ["".join(rng.choice(PIECES) for _ in range(rng.randint(0, 8))) for _ in range(rng.randint(1, 6))]
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("depth", ["truecolor", "256", "16"])
+def test_incremental_redraw_matches_full_repaint(depth):
+    rng = random.Random(depth)
+    printer = ColorPrinter(color_depth=depth)
+    for _ in range(60):
+        region = printer.live()
+        terminal = Terminal()
+        for _ in range(rng.randint(1, 12)):
+            frame = random_frame(rng)
+            terminal.feed(region.render(frame))
+
+            repaint = Terminal()
+            repaint.feed(printer.live().render(frame))
+            assert terminal.lines() == repaint.lines(), frame
+            # 描画後はスタイルが既定の状態に戻っている
+            assert terminal.sgr == {}
+
+
+def test_unchanged_frame_writes_nothing():
+    region = ColorPrinter(color_depth="truecolor").live()
+    frame = "{fore:red}cpu{end} 42%\n{bold}mem{end} 1.2G"
+    assert region.render(frame)
+    assert region.render(frame) == ""
@@ -0,0 +1,82 @@
+"""
+print_with_colorの出力が、テンプレートキャッシュの状態に関わらずコンパイル済みのテンプレートと一致することを確認するテスト。
+"""
+import io
+import random
+
+import pytest
+
+from ColorPrinter import ColorPrinter, HtmlBackend
+
+# ランダムなマークアップを組み立てる部品
+PIECES = [
+    "{fore:red}", "{back:blue}", "{bold}", "{italic, underline}", "{fore:rgba(10, 20, 30, 0.5)}", "{back:rgba(9, 8, 7, 0.3)}",
+    "{end}", "{end fore}", "{end back}", "{end all}", "{end, fore:green}", "{gradient:red, blue}", "{fore:nosuchcolor}",
+    "{{", "}}", "{", "}", "a", "bc", "日本", " ", "",
+]
+
+
+def random_markup(rng: random.Random) -> str:
+    return "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 16)))
+
+
+def printed(printer: ColorPrinter, text: str) -> str:
+    out = io.StringIO()
+    printer.print_with_color(text, file=out)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("depth", ["truecolor", "256", "16", "none"])
+def test_print_matches_template(depth):
+    rng = random.Random(depth)
+    ColorPrinter.cache_clear()
+    for _ in range(2000):
+        text = random_markup(rng)
+        expected = ColorPrinter(color_depth=depth)
+        template = expected.template(text)
+        template.apply_styles(expected.active_styles)
+
+        printer = ColorPrinter(color_depth=depth)
+        # 1回目（キャッシュしない描画）、2回目（コンパイルしてキャッシュ）、3回目（キャッシュのヒット）のいずれも同じ出力となる
+        for _ in range(3):
+            if rng.random() < 0.3:
+                ColorPrinter.cache_clear()
+            assert printed(printer, text) == template.text + "\n", text
+            assert printer.active_styles.snapshot() == expected.active_styles.snapshot(), text
+            printer.reset_styles()
+
+
+def test_one_shot_lines_are_not_cached():
+    ColorPrinter.cache_clear()
+    printer = ColorPrinter(color_depth="truecolor")
+    for index in range(100):
+        printed(printer, "{fore:red}line %d{end}" % index)
+    assert ColorPrinter.cache_info().currsize == 0
+
+    for _ in range(3):
+        printed(printer, "{fore:red}hot{end}")
+    info = ColorPrinter.cache_info()
+    assert (info.currsize, info.misses, info.hits) == (1, 1, 1)
+
+
+def test_one_shot_lines_keep_styles_for_backends():
+    ColorPrinter.cache_clear()
+    printer = ColorPrinter(color_depth="none")
+    backend = printer.add_backend(HtmlBackend())
+    printer.print_with_color("{fore:red}x{end} y")
+    printer.print_with_color("plain")
+    assert backend.getvalue() == '<span style="color:#ff0000">x</span> y\nplain\n'
+
+
+def test_color_changes_reach_one_shot_lines():
+    class Printer(ColorPrinter):
+        pass
+
+    printer = Printer(color_depth="truecolor")
+    printed(printer, "{fore:brand}a{end} 1")
+    Printer.register_color("brand", (1, 2, 3))
+    assert printed(printer, "{fore:brand}a{end} 2") == "\033[38;2;1;2;3ma\033[0m 2\n"
+
+    printed(printer, "{fore:rgba(255, 255, 255, 0.5)}b{end} 1")
+    Printer.set_terminal_background((255, 255, 255))
+    assert printed(printer, "{fore:rgba(255, 255, 255, 0.5)}b{end} 2") == "\033[38;2;255;255;255mb\033[0m 2\n"
@@ -0,0 +1,53 @@
+"""
+render_streamの出力が、チャンクの区切り方に関わらず一括でコンパイルした場合と一致することを確認するテスト。
+"""
+import io
+import random
+
+import pytest
+
+from ColorPrinter import ColorPrinter
+
+# ランダムなマークアップを組み立てる部品（タグ、エスケープ、閉じられない波カッコ、全角文字、グラデーションを含む）
+PIECES = [
+    "{fore:red}", "{back:blue}", "{bold}", "{italic, underline}", "{fore:rgba(10, 20, 30, 0.5)}",
+    "{end}", "{end fore}", "{end all}", "{gradient:red, blue}", "{gradient:green, rgba(0, 0, 255, 0.5)}",
+    "{{", "}}", "{", "}", "a", "bc", "日本", " ", "\n", "xyz",
+]
+
+
+def random_markup(rng: random.Random) -> str:
+    return "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 30)))
+
+
+def random_chunks(rng: random.Random, text: str) -> list:
+    """
+    文字列を、ランダムな位置（空のチャンクを含む）で分割する。
+    """
+    cuts = sorted(rng.choice(range(len(text) + 1)) for _ in range(rng.randint(0, 6)))
+    return [text[start:stop] for start, stop in zip([0, *cuts], [*cuts, len(text)])]
+
+
+@pytest.mark.parametrize("depth", ["truecolor", "256", "16"])
+def test_stream_matches_whole_compilation(depth):
+    rng = random.Random(depth)
+    for _ in range(600):
+        text = random_markup(rng)
+        whole = ColorPrinter(color_depth=depth)
+        template = whole.template(text)
+        template.apply_styles(whole.active_styles)
+
+        printer = ColorPrinter(color_depth=depth)
+        chunks = random_chunks(rng, text)
+        assert "".join(printer.render_stream(chunks)) == template.text, (text, chunks)
+        assert printer.active_styles.snapshot() == whole.active_styles.snapshot(), (text, chunks)
+
+
+def test_stream_reads_file_objects_in_small_chunks():
+    rng = random.Random(0)
+    text = "".join(random_markup(rng) for _ in range(50))
+    expected = ColorPrinter(color_depth="truecolor").template(text).text
+    for chunk_size in (1, 2, 3, 7, 64):
+        out = io.StringIO()
+        ColorPrinter(color_depth="truecolor").stream(io.StringIO(text), out, chunk_size=chunk_size)
+        assert out.getvalue() == expected, chunk_size
@@ -0,0 +1,66 @@
+"""
+strip_markupと色を出力しない場合の描画が、字句解析器の文字列とエスケープのトークンと一致することを確認するテスト。
+"""
+import io
+import random
+
+import pytest
+
+from ColorPrinter import ColorPrinter, strip_markup
+from ColorPrinter.lexer import ESCAPE, TEXT, tokenize
+from ColorPrinter.palette import detect_color_depth
+
+# ランダムなマークアップを組み立てる部品（閉じられない波カッコや、波カッコを含むタグの中身を含む）
+PIECES = [
+    "{fore:red}", "{end}", "{bold, back:rgba(1, 2, 3, 0.5)}", "{gradient:red, blue}", "{}", "{ x }",
+    "{{", "}}", "{", "}", "{{{", "}}}", "a", "日本", " ", "\n", "weekend",
+]
+
+
+def lexer_text(text: str) -> str:
+    return "".join(value for kind, value in tokenize(text) if kind == TEXT or kind == ESCAPE)
+
+
+def test_strip_markup_matches_lexer():
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 12)))
+        assert strip_markup(text) == lexer_text(text), text
+
+
+def test_colorless_printer_writes_stripped_text():
+    rng = random.Random(1)
+    printer = ColorPrinter(color_depth="none")
+    for _ in range(500):
+        text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 12)))
+        out = io.StringIO()
+        printer.print_with_color(text, file=out)
+        assert out.getvalue() == lexer_text(text) + "\n", text
+
+
+class _Stream:
+    def __init__(self, tty: bool):
+        self.tty = tty
+
+    def isatty(self) -> bool:
+        return self.tty
+
+
+@pytest.mark.parametrize("force, no_color, tty, expected", [
+    (None, None, False, "none"),
+    (None, "1", True, "none"),
+    ("", "1", False, "none"),
+    ("", None, False, "none"),
+    ("0", None, True, "none"),
+    ("1", "1", False, "16"),
+    ("3", None, False, "truecolor"),
+])
+def test_detect_color_depth_environment(monkeypatch, force, no_color, tty, expected):
+    for name, value in (("FORCE_COLOR", force), ("NO_COLOR", no_color)):
+        if value is None:
+            monkeypatch.delenv(name, raising=False)
+        else:
+            monkeypatch.setenv(name, value)
+    monkeypatch.setenv("TERM", "xterm")
+    monkeypatch.delenv("COLORTERM", raising=False)
+    assert detect_color_depth(_Stream(tty)) == expected
@@ -0,0 +1,20 @@
+"""
+Tableの見出しの下に引く線の描画を確認するテスト。
+"""
+import pytest
+
+from ColorPrinter import ColorPrinter
+
+
+@pytest.mark.parametrize("rule, expected", [
+    ("-", "name  n\n-------\napple 1\n"),
+    ("=-", "name  n\n=-=-=-\napple 1\n"),
+    ("", "name  n\napple 1\n"),
+    (None, "name  n\napple 1\n"),
+    # 表示幅が0の文字列（結合文字）は線を引かない
+    ("́", "name  n\napple 1\n"),
+])
+def test_header_rule(rule, expected):
+    table = ColorPrinter(color_depth="none").table(header=["name", "n"], sep=" ", rule=rule)
+    table.add_row("apple", 1)
+    assert table.render() == expected